@@ -288,7 +288,7 @@ export function AppMaterial() {
                       summary={article.summary || ''}
                       image={article.image}
                       source={article.source || 'Unknown'}
-                      published={article.published || new Date().toISOString()}
+                      published={article.published}
                       category={article.category || 'General'}
                       link={article.link || '#'}
                     />
@@ -10,12 +10,12 @@ interface NewsCardProps {
 }
 
 export function NewsCard({ item, index = 0 }: NewsCardProps) {
-    // Format date
-    const formattedDate = new Date(item.published).toLocaleDateString('en-US', {
+    // Format date (undated articles show none)
+    const formattedDate = item.published ? new Date(item.published).toLocaleDateString('en-US', {
         month: 'short',
         day: 'numeric',
         year: 'numeric'
-    });
+    }) : null;
 
     // Get category color using Material 3 tokens
     const getCategoryColor = (category?: string) => {
@@ -91,11 +91,13 @@ export function NewsCard({ item, index = 0 }: NewsCardProps) {
             {/* Content Section */}
             <div className="p-4 flex flex-col flex-grow relative">
                 {/* Date */}
-                <div className="flex items-center gap-2 mb-2">
-                    <span className="m3-label-small text-[var(--text-muted)] uppercase tracking-wider">
-                        {formattedDate}
-                    </span>
-                </div>
+                {formattedDate && (
+                    <div className="flex items-center gap-2 mb-2">
+                        <span className="m3-label-small text-[var(--text-muted)] uppercase tracking-wider">
+                            {formattedDate}
+                        </span>
+                    </div>
+                )}
 
                 {/* Title */}
                 <h3 className="m3-title-medium text-[var(--text-main)] mb-2 line-clamp-2 group-hover:text-[var(--md-sys-color-primary)] transition-colors leading-snug">
@@ -15,7 +15,7 @@ interface NewsCardProps {
   summary?: string;
   image?: string;
   source: string;
-  published: string;
+  published: string | null;
   category: string;
   link: string;
 }
@@ -113,12 +113,14 @@ export function NewsCard({
               size="small"
               sx={{ fontWeight: 600, fontSize: '0.75rem' }}
             />
-            <Stack direction="row" spacing={0.5} alignItems="center">
-              <Schedule sx={{ fontSize: 14, color: 'text.disabled' }} />
-              <Typography variant="caption" color="text.secondary" fontWeight={500}>
-                {formatDate(published)}
-              </Typography>
-            </Stack>
+            {published && (
+              <Stack direction="row" spacing={0.5} alignItems="center">
+                <Schedule sx={{ fontSize: 14, color: 'text.disabled' }} />
+                <Typography variant="caption" color="text.secondary" fontWeight={500}>
+                  {formatDate(published)}
+                </Typography>
+              </Stack>
+            )}
           </Stack>
 
           {/* Title */}
@@ -128,7 +128,7 @@ async function fetchRSSNews(): Promise<NewsItem[]> {
 
     // Return top 20 most recent
     const sortedNews = allNews
-        .sort((a, b) => new Date(b.published).getTime() - new Date(a.published).getTime())
+        .sort((a, b) => new Date(b.published ?? 0).getTime() - new Date(a.published ?? 0).getTime())
         .slice(0, 20);
 
     if (sortedNews.length === 0) {
@@ -1,3 +1,17 @@
+export interface AssetNewsRef {
+  title: string;
+  link: string;
+  source: string;
+  published: string | null;
+}
+
+export interface SentimentSummary {
+  score: number;
+  articles: number;
+  positive: number;
+  negative: number;
+}
+
 export interface StockData {
   symbol: string;
   name: string;
@@ -33,6 +47,14 @@ export interface StockData {
   rsi?: number;
   esg_score?: number;
   earnings_quality?: string;
+  long_name?: string;
+  news?: AssetNewsRef[];
+  news_sentiment?: SentimentSummary;
+  // Carried forward from the previous run (not fetched this run)
+  stale?: boolean;
+  stale_since?: string;
+  // Hash of the inputs the score was derived from (unchanged inputs reuse it)
+  input_hash?: string;
 }
 
 export interface CryptoData {
@@ -71,6 +93,7 @@ export interface CryptoData {
   macd_vs_200ema?: string;
   adx?: number;
   cmf?: number;
+  ohlc_source?: string | null; // null: no daily OHLCV, ADX/CMF are neutral defaults
   distance_from_200_ema?: number;
   macd_slope?: number;
   squeeze?: string;
@@ -80,6 +103,14 @@ export interface CryptoData {
   score_breakdown?: string;
   recommendation?: string;
 
+  news?: AssetNewsRef[];
+  news_sentiment?: SentimentSummary;
+  stale?: boolean;
+  stale_since?: string;
+  // Indicators reused from an earlier run when the history request failed
+  indicators_stale_since?: string;
+  indicators_defaulted?: boolean;
+
   last_updated: string;
 }
 
@@ -87,10 +118,24 @@ export interface NewsItem {
   title: string;
   link: string;
   source: string;
-  published: string;
+  // null when the feed gave no usable date
+  published: string | null;
+  published_ts?: number;
   summary?: string;
   category?: string;
   image?: string;
+  related_symbols?: string[];
+  sentiment?: number;
+  sentiment_label?: 'positive' | 'neutral' | 'negative';
+}
+
+export interface SectionCoverage {
+  fetched: number;
+  processed: number;
+  total: number;
+  stale?: number;
+  stale_since?: string;
+  plan?: 'skip' | 'quotes' | 'full';
 }
 
 export interface AppData {
@@ -99,4 +144,12 @@ export interface AppData {
   us_stocks: StockData[];
   crypto: CryptoData[];
   news: NewsItem[];
+  news_sentiment?: Record<string, SentimentSummary>;
+  refresh_mode?: 'full' | 'quotes';
+  complete?: boolean;
+  coverage?: Record<string, SectionCoverage>;
+  // Per section: last fresh data (updated_at), full fetch and quote refresh
+  updated_at?: Record<string, string>;
+  fetched_at?: Record<string, string>;
+  quoted_at?: Record<string, string>;
 }
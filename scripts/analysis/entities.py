@@ -0,0 +1,256 @@
+"""
+Entity linking between news articles and tracked assets.
+
+Builds a single Aho-Corasick automaton from ticker symbols, company names and
+coin names/symbols, then scans every article title and summary in one linear
+pass. Cost is O(total text + matches) regardless of how many names are indexed,
+so thousands of names x thousands of articles stays cheap.
+"""
+import logging
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Corporate suffixes stripped from yfinance short/long names so that
+# "Apple Inc." also matches plain "Apple" in headlines.
+COMPANY_SUFFIXES = re.compile(
+    r'[\s,]+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|'
+    r'holdings|group|sa|ag|nv|llc|class [a-z])\.?$',
+    re.IGNORECASE
+)
+
+# Generic words that are also company/coin names and would flood the links.
+STOP_NAMES = {
+    'the', 'and', 'for', 'new', 'all', 'one', 'now', 'are', 'can', 'has',
+    'visa', 'target', 'ripple', 'polygon', 'stellar', 'titan',
+}
+
+MIN_NAME_LENGTH = 3
+MIN_SYMBOL_LENGTH = 2
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over lowercased text.
+
+    Each pattern carries a payload set (the asset symbols it refers to) and a
+    ``case_sensitive`` flag. Matching always runs on the lowercased text;
+    case-sensitive patterns (bare tickers such as ``ITC`` or ``ETH``) are
+    verified against the original text after a hit so that ordinary words
+    do not link to a ticker.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[Tuple[str, bool, Set[str]]] = []
+        self._pattern_ids: Dict[Tuple[str, bool], int] = {}
+        self._built = False
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def add(self, pattern: str, symbol: str, case_sensitive: bool = False):
+        """Register ``pattern`` as referring to ``symbol``."""
+        if not pattern:
+            return
+        key = (pattern if case_sensitive else pattern.lower(), case_sensitive)
+        pattern_id = self._pattern_ids.get(key)
+        if pattern_id is not None:
+            self._patterns[pattern_id][2].add(symbol)
+            return
+
+        pattern_id = len(self._patterns)
+        self._pattern_ids[key] = pattern_id
+        self._patterns.append((key[0], case_sensitive, {symbol}))
+
+        state = 0
+        for char in pattern.lower():
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pattern_id)
+        self._built = False
+
+    def build(self):
+        """Compute failure links (BFS over the trie)."""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+        self._built = True
+
+    def find(self, text: str) -> Set[str]:
+        """Return every symbol whose pattern occurs as a whole word in ``text``."""
+        if not self._built:
+            self.build()
+
+        found: Set[str] = set()
+        lowered = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        length = len(text)
+        state = 0
+
+        for end, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+
+            for pattern_id in out[state]:
+                pattern, case_sensitive, symbols = self._patterns[pattern_id]
+                start = end - len(pattern) + 1
+                # Whole-word boundaries only
+                if start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if end + 1 < length and lowered[end + 1].isalnum():
+                    continue
+                if case_sensitive and text[start:end + 1] != pattern:
+                    continue
+                found.update(symbols)
+
+        return found
+
+
+def normalize_company_name(name: str) -> str:
+    """Strip corporate suffixes ("Inc.", "Limited", ...) from a company name."""
+    name = (name or '').strip()
+    previous = None
+    while name and name != previous:
+        previous = name
+        name = COMPANY_SUFFIXES.sub('', name).strip(' ,.')
+    return name
+
+
+def _bare_symbol(symbol: str) -> str:
+    """RELIANCE.NS -> RELIANCE, BRK-B -> BRK-B"""
+    return symbol.split('.')[0]
+
+
+def build_entity_index(
+    stocks: Optional[Iterable[Dict]] = None,
+    cryptos: Optional[Iterable[Dict]] = None,
+    tickers: Optional[Iterable[str]] = None
+) -> AhoCorasick:
+    """
+    Build one automaton covering every tracked asset.
+
+    Args:
+        stocks: Stock records (``symbol``, ``name`` as returned by the fetchers)
+        cryptos: Crypto records (``id``, ``symbol``, ``name``)
+        tickers: Extra bare ticker symbols with no fetched record (e.g. failed fetches)
+
+    Returns:
+        Built AhoCorasick index mapping names to asset symbols
+    """
+    index = AhoCorasick()
+
+    def add_name(name: str, symbol: str):
+        name = (name or '').strip()
+        # A name equal to the ticker ("ITC Limited" -> "ITC") stays case-sensitive
+        if name.upper() == _bare_symbol(symbol).upper():
+            return
+        if len(name) >= MIN_NAME_LENGTH and name.lower() not in STOP_NAMES:
+            index.add(name, symbol)
+
+    def add_symbol(token: str, symbol: str):
+        if len(token) >= MIN_SYMBOL_LENGTH:
+            index.add(token, symbol, case_sensitive=True)
+        # Cashtags ($V, $AAPL) are unambiguous even for one-letter tickers
+        index.add(f"${token}", symbol)
+
+    for stock in stocks or []:
+        symbol = stock.get('symbol')
+        if not symbol:
+            continue
+        add_symbol(_bare_symbol(symbol), symbol)
+        for name in {stock.get('name'), stock.get('long_name')}:
+            if name and name != symbol:
+                add_name(name, symbol)
+                add_name(normalize_company_name(name), symbol)
+
+    for coin in cryptos or []:
+        symbol = (coin.get('symbol') or '').upper()
+        if not symbol:
+            continue
+        add_symbol(symbol, symbol)
+        add_name(coin.get('name', ''), symbol)
+        coin_id = coin.get('id', '')
+        if coin_id and not coin_id[-1].isdigit():
+            add_name(coin_id.replace('-', ' '), symbol)
+
+    for ticker in tickers or []:
+        add_symbol(_bare_symbol(ticker), ticker)
+
+    index.build()
+    logger.info(f"Entity index built with {len(index)} patterns")
+    return index
+
+
+def link_articles(articles: List[Dict], index: AhoCorasick) -> Dict[str, List[Dict]]:
+    """
+    Attach ``related_symbols`` to each article and group articles per symbol.
+
+    Args:
+        articles: News article dictionaries (modified in place)
+        index: Entity index from build_entity_index
+
+    Returns:
+        Dictionary mapping asset symbol to the articles that mention it
+    """
+    symbol_news: Dict[str, List[Dict]] = {}
+
+    for article in articles:
+        text = f"{article.get('title', '')}\n{article.get('summary', '')}"
+        symbols = sorted(index.find(text))
+        article['related_symbols'] = symbols
+        for symbol in symbols:
+            symbol_news.setdefault(symbol, []).append(article)
+
+    linked = sum(1 for a in articles if a['related_symbols'])
+    logger.info(f"Linked {linked}/{len(articles)} articles to {len(symbol_news)} assets")
+    return symbol_news
+
+
+def attach_news_to_assets(assets: Iterable[Dict], symbol_news: Dict[str, List[Dict]], limit: int = 5):
+    """Give each asset a compact ``news`` list of its most recent linked articles."""
+    for asset in assets:
+        symbol = asset.get('symbol', '')
+        articles = symbol_news.get(symbol) or symbol_news.get(symbol.upper()) or []
+        asset['news'] = [
+            {
+                'title': a.get('title'),
+                'link': a.get('link'),
+                'source': a.get('source'),
+                'published': a.get('published'),
+            }
+            for a in articles[:limit]
+        ]
+
+
+def link_news_to_assets(articles: List[Dict], stocks: List[Dict], cryptos: List[Dict], limit: int = 5):
+    """Pipeline stage: build the index, link articles and attach per-asset news."""
+    index = build_entity_index(stocks=stocks, cryptos=cryptos)
+    symbol_news = link_articles(articles, index)
+    attach_news_to_assets(stocks, symbol_news, limit)
+    attach_news_to_assets(cryptos, symbol_news, limit)
+    return symbol_news
@@ -0,0 +1,256 @@
+"""
+Memoization for indicator calculations.
+
+Results are keyed by (symbol, last bar, data hash, indicator, params), so the
+same indicator on the same data is computed once per run no matter how many
+code paths ask for it. An in-memory LRU serves repeats within a run; an
+optional disk tier serves reruns on unchanged data.
+
+Usage:
+    @memoize_indicator('rsi')
+    def calculate_rsi(series, period=14): ...
+
+Every caller gets its own copy of a cached result (NumPy arrays as read-only
+views), so mutating a result cannot change what later callers see. The disk
+tier is an .npz file read with ``allow_pickle=False``: numbers, strings,
+lists, tuples, string-keyed dicts, numeric arrays and Series are stored;
+other results stay in memory only.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pipeline.publish import atomic_file
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+DISK_PATH = os.path.join(DATA_DIR, 'indicator_cache.npz')
+MAX_ENTRIES = 4096
+MAX_DISK_ENTRIES = 20000
+CACHE_VERSION = 2
+
+Key = Tuple[str, str, str, str, str]
+
+
+def data_fingerprint(data) -> Tuple[str, str]:
+    """(last bar label, content hash) for a Series, DataFrame or array."""
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        last = str(data.index[-1]) if len(data) else ''
+        if isinstance(data, pd.DataFrame) and 'timestamp' in data and len(data):
+            last = str(data['timestamp'].iloc[-1])
+        raw = pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()
+    else:
+        array = np.ascontiguousarray(data)
+        last = str(len(array))
+        raw = array.tobytes() + str(array.dtype).encode()
+    return last, hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _encode(value, arrays: List[np.ndarray]):
+    """JSON-safe form of a cached value, with arrays appended to ``arrays``; TypeError if unsupported."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind not in 'biuf':
+            raise TypeError(f"{value.dtype} array")
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    if isinstance(value, pd.Series):
+        index = value.index
+        if isinstance(index, pd.DatetimeIndex):
+            encoded_index = {'datetime': _encode(index.as_unit('ns').asi8, arrays), 'unit': index.unit,
+                             'tz': str(index.tz) if index.tz else None, 'freq': index.freqstr}
+        elif isinstance(index, pd.RangeIndex):
+            encoded_index = {'range': [index.start, index.stop, index.step]}
+        else:
+            raise TypeError(f"{type(index).__name__} index")
+        if value.name is not None and not isinstance(value.name, str):
+            raise TypeError(f"series name {value.name!r}")
+        return {'__series__': _encode(value.to_numpy(), arrays), 'index': encoded_index, 'name': value.name}
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return {'__dict__': {k: _encode(v, arrays) for k, v in value.items()}}
+    if type(value) in (list, tuple):
+        return {f'__{type(value).__name__}__': [_encode(v, arrays) for v in value]}
+    raise TypeError(type(value).__name__)
+
+
+def _decode(value, arrays):
+    if not isinstance(value, dict):
+        return value
+    if '__array__' in value:
+        return arrays[f"a{value['__array__']}"]
+    if '__series__' in value:
+        spec = value['index']
+        if 'range' in spec:
+            index = pd.RangeIndex(*spec['range'])
+        else:
+            index = pd.DatetimeIndex(_decode(spec['datetime'], arrays).astype('datetime64[ns]'))
+            if spec['tz']:
+                index = index.tz_localize('UTC').tz_convert(spec['tz'])
+            index = pd.DatetimeIndex(index.as_unit(spec['unit']), freq=spec['freq'])
+        return pd.Series(_decode(value['__series__'], arrays), index=index, name=value['name'])
+    if '__dict__' in value:
+        return {k: _decode(v, arrays) for k, v in value['__dict__'].items()}
+    if '__tuple__' in value:
+        return tuple(_decode(v, arrays) for v in value['__tuple__'])
+    return [_decode(v, arrays) for v in value['__list__']]
+
+
+def _detached(value):
+    """A copy of a cached value that the caller may keep or mutate; arrays become read-only views."""
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _detached(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_detached(v) for v in value]
+    if isinstance(value, tuple):
+        items = [_detached(v) for v in value]
+        return type(value)(*items) if hasattr(value, '_fields') else tuple(items)
+    return value
+
+
+class IndicatorCache:
+    """Thread-safe LRU of indicator results with an optional disk tier."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.memory: 'OrderedDict[Key, Any]' = OrderedDict()
+        self.disk: Dict[Key, Any] = {}
+        self.path = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path:
+            self.attach_disk(path)
+
+    def attach_disk(self, path: str = DISK_PATH):
+        """Enable the disk tier, loading entries saved by a previous run."""
+        self.path = path
+        try:
+            with np.load(path, allow_pickle=False) as payload:
+                manifest = json.loads(payload['manifest'].item())
+                if manifest.get('version') == CACHE_VERSION:
+                    self.disk = {tuple(key): _decode(value, payload) for key, value in manifest['entries']}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Indicator cache unreadable, starting empty: {e}")
+            self.disk = {}
+
+    @staticmethod
+    def make_key(indicator: str, data, params: Tuple = (), symbol: Optional[str] = None) -> Key:
+        last, digest = data_fingerprint(data)
+        return (symbol or '', last, digest, indicator, repr(params))
+
+    def get_or_compute(self, indicator: str, data, compute: Callable[[], Any],
+                       params: Tuple = (), symbol: Optional[str] = None):
+        """Return the cached result for this key, computing and storing it on a miss."""
+        key = self.make_key(indicator, data, params, symbol)
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return _detached(self.memory[key])
+            if key in self.disk:
+                self.disk_hits += 1
+                value = self.disk[key]
+                self._store(key, value)
+                return _detached(value)
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._store(key, value)
+        return _detached(value)
+
+    def _store(self, key: Key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'entries': len(self.memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self.disk.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def save(self):
+        """Merge this run's entries into the disk tier (no-op without one)."""
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self.disk)
+            entries.update(self.memory)
+        # Newest entries (this run's) are last; keep the tail
+        if len(entries) > MAX_DISK_ENTRIES:
+            entries = dict(list(entries.items())[-MAX_DISK_ENTRIES:])
+        arrays: List[np.ndarray] = []
+        encoded = []
+        for key, value in entries.items():
+            mark = len(arrays)
+            try:
+                encoded.append([list(key), _encode(value, arrays)])
+            except TypeError as e:
+                del arrays[mark:]
+                logger.debug(f"Indicator cache: {key[3]} result not stored on disk ({e})")
+        manifest = json.dumps({'version': CACHE_VERSION, 'entries': encoded})
+        try:
+            with atomic_file(self.path, 'wb') as f:
+                np.savez(f, manifest=np.array(manifest), **{f'a{i}': a for i, a in enumerate(arrays)})
+        except Exception as e:
+            logger.warning(f"Could not save indicator cache: {e}")
+
+
+_default_cache = IndicatorCache()
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Process-wide cache used by @memoize_indicator."""
+    return _default_cache
+
+
+def memoize_indicator(name: str):
+    """
+    Memoize ``func(data, *params)`` in the process-wide cache.
+
+    Callers may pass ``symbol=`` to scope the key; it is not forwarded.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(data, *args, symbol: Optional[str] = None, **kwargs):
+            params = (args, tuple(sorted(kwargs.items())))
+            return _default_cache.get_or_compute(
+                name, data, lambda: func(data, *args, **kwargs), params=params, symbol=symbol
+            )
+        wrapper.uncached = func
+        return wrapper
+    return decorator
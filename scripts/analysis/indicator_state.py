@@ -0,0 +1,396 @@
+"""
+Incremental (streaming) indicator state.
+
+Each state object is updated with one new bar in O(1) and round-trips through
+plain dicts, so it can be persisted between runs. Results match the batch
+pandas calculations used by the fetchers:
+
+  EMAState        close.ewm(span=n, adjust=False).mean()
+  RSIState        SMA RSI (rolling(14).mean() of gains/losses) or Wilder RSI
+  MACDState       EMA(12) - EMA(26), signal EMA(9), 5-bar slope
+  RollingStats    rolling(n).mean() / rolling(n).std() via Welford with eviction
+
+AssetIndicatorState bundles them per asset; IndicatorStore persists them to
+data/indicator_state.json for quote refreshes (full fetches recompute from
+the complete history).
+"""
+import json
+import logging
+import math
+import os
+from collections import deque
+from datetime import timezone
+from typing import Dict, Iterable, Optional
+
+from pipeline.market_calendar import market_of, session_day
+from pipeline.publish import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+STATE_PATH = os.path.join(DATA_DIR, 'indicator_state.json')
+STATE_VERSION = 1
+
+
+class EMAState:
+    """Exponential moving average, equivalent to ewm(span, adjust=False)."""
+
+    def __init__(self, span: int, value: Optional[float] = None, count: int = 0):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.value = value
+        self.count = count
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = float(x)
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.value
+
+    def to_dict(self) -> Dict:
+        return {'span': self.span, 'value': self.value, 'count': self.count}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EMAState':
+        return cls(data['span'], data['value'], data['count'])
+
+
+class RSIState:
+    """
+    RSI over close-to-close changes.
+
+    smoothing='sma' keeps the last ``period`` gains/losses (the batch
+    rolling-mean RSI used throughout the fetchers); smoothing='wilder' keeps
+    Wilder's running averages, seeded with the SMA of the first ``period``
+    changes.
+    """
+
+    def __init__(self, period: int = 14, smoothing: str = 'sma'):
+        if smoothing not in ('sma', 'wilder'):
+            raise ValueError(f"Unknown RSI smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.prev_close: Optional[float] = None
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.count = 0
+
+    def update(self, close: float) -> float:
+        close = float(close)
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            if self.smoothing == 'sma' or self.avg_gain is None:
+                self.gains.append(gain)
+                self.losses.append(loss)
+                if self.smoothing == 'wilder' and len(self.gains) == self.period:
+                    self.avg_gain = sum(self.gains) / self.period
+                    self.avg_loss = sum(self.losses) / self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.prev_close = close
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        """Current RSI, 50.0 until ``period + 1`` closes have been seen."""
+        if self.count <= self.period:
+            return 50.0
+        if self.smoothing == 'sma':
+            # Re-summing a fixed-size window is O(period) and avoids float drift
+            gain, loss = sum(self.gains) / self.period, sum(self.losses) / self.period
+        else:
+            gain, loss = self.avg_gain, self.avg_loss
+        if loss == 0:
+            return 100.0 if gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+    def to_dict(self) -> Dict:
+        return {
+            'period': self.period, 'smoothing': self.smoothing, 'prev_close': self.prev_close,
+            'gains': list(self.gains), 'losses': list(self.losses),
+            'avg_gain': self.avg_gain, 'avg_loss': self.avg_loss, 'count': self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RSIState':
+        state = cls(data['period'], data['smoothing'])
+        state.prev_close = data['prev_close']
+        state.gains.extend(data['gains'])
+        state.losses.extend(data['losses'])
+        state.avg_gain = data['avg_gain']
+        state.avg_loss = data['avg_loss']
+        state.count = data['count']
+        return state
+
+
+class MACDState:
+    """MACD line, signal line and the 5-bar MACD slope."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, slope_bars: int = 5):
+        self.fast = EMAState(fast)
+        self.slow = EMAState(slow)
+        self.signal = EMAState(signal)
+        self.recent = deque(maxlen=slope_bars)
+
+    def update(self, close: float):
+        macd = self.fast.update(close) - self.slow.update(close)
+        signal = self.signal.update(macd)
+        self.recent.append(macd)
+        return macd, signal
+
+    @property
+    def macd(self) -> Optional[float]:
+        return self.recent[-1] if self.recent else None
+
+    @property
+    def slope(self) -> float:
+        """macd[-1] - macd[-slope_bars], 0 until enough bars."""
+        if len(self.recent) < self.recent.maxlen:
+            return 0.0
+        return self.recent[-1] - self.recent[0]
+
+    def to_dict(self) -> Dict:
+        return {
+            'fast': self.fast.to_dict(), 'slow': self.slow.to_dict(), 'signal': self.signal.to_dict(),
+            'slope_bars': self.recent.maxlen, 'recent': list(self.recent),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MACDState':
+        state = cls(slope_bars=data['slope_bars'])
+        state.fast = EMAState.from_dict(data['fast'])
+        state.slow = EMAState.from_dict(data['slow'])
+        state.signal = EMAState.from_dict(data['signal'])
+        state.recent.extend(data['recent'])
+        return state
+
+
+class RollingStats:
+    """Rolling mean / sample variance over the last ``window`` values (Welford with eviction)."""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x: float):
+        x = float(x)
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+
+    def _remove(self, y: float):
+        n = len(self.values)  # size after eviction (the value is already popped)
+        if n == 0:
+            self.mean = 0.0
+            self.m2 = 0.0
+            return
+        delta = y - self.mean
+        self.mean -= delta / n
+        self.m2 = max(self.m2 - delta * (y - self.mean), 0.0)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def variance(self) -> float:
+        n = len(self.values)
+        return self.m2 / (n - 1) if n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, x: Optional[float] = None) -> float:
+        """Z-score of ``x`` (default: latest value), 0 until the window is full or flat."""
+        if not self.full:
+            return 0.0
+        std = self.std
+        if std == 0:
+            return 0.0
+        x = self.values[-1] if x is None else x
+        return (x - self.mean) / std
+
+    def to_dict(self) -> Dict:
+        return {'window': self.window, 'values': list(self.values), 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollingStats':
+        state = cls(data['window'])
+        state.values.extend(data['values'])
+        state.mean = data['mean']
+        state.m2 = data['m2']
+        return state
+
+
+class AssetIndicatorState:
+    """
+    All streaming indicators for one asset.
+
+    Updates carry an optional epoch timestamp: a second update on the same
+    exchange-local day (``tz``, UTC by default) replaces that day's bar
+    (intraday refreshes) instead of appending one.
+    """
+
+    def __init__(self, ema_span: int = 200, rsi_period: int = 14, zscore_window: int = 20):
+        self.ema = EMAState(ema_span)
+        self.rsi = RSIState(rsi_period)
+        self.macd = MACDState()
+        self.stats = RollingStats(zscore_window)
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self._prev: Optional[Dict] = None
+
+    @classmethod
+    def from_history(cls, closes: Iterable[float], timestamps: Optional[Iterable[int]] = None,
+                     tz=timezone.utc, **kwargs) -> 'AssetIndicatorState':
+        """Seed a state by replaying a close history (one-off O(n))."""
+        state = cls(**kwargs)
+        closes = list(closes)
+        timestamps = list(timestamps) if timestamps is not None else [None] * len(closes)
+        for close, ts in zip(closes, timestamps):
+            state.update(close, ts, tz)
+        return state
+
+    def update(self, close: float, ts: Optional[int] = None, tz=timezone.utc) -> Dict:
+        """Add one bar and return the current indicator snapshot."""
+        if ts is not None and self.last_ts is not None and session_day(ts, tz) == session_day(self.last_ts, tz):
+            if self._prev is not None:
+                self._restore(self._prev)
+        else:
+            self._prev = self._core_dict()
+
+        self.ema.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.stats.update(close)
+        self.last_close = float(close)
+        if ts is not None:
+            self.last_ts = int(ts)
+        return self.snapshot()
+
+    def snapshot(self) -> Dict:
+        """Indicator values in the shape of calculate_technical_indicators()."""
+        close, ema, macd = self.last_close, self.ema.value, self.macd.macd
+        if self.ema.count >= self.ema.span and ema:
+            distance = (close - ema) / ema * 100
+            if close > ema and macd > 0:
+                trend = "BULLISH"
+            elif close < ema and macd < 0:
+                trend = "BEARISH"
+            else:
+                trend = "NEUTRAL"
+        else:
+            distance, trend = 0, "NEUTRAL"
+        return {
+            'rsi': self.rsi.value,
+            'ema_200': ema,
+            'distance_from_200_ema': distance,
+            'macd': macd,
+            'macd_signal': self.macd.signal.value,
+            'macd_slope': self.macd.slope,
+            'macd_vs_200ema': trend,
+            'z_score': self.stats.zscore(),
+            'bars': self.ema.count,
+        }
+
+    def _core_dict(self) -> Dict:
+        return {
+            'ema': self.ema.to_dict(), 'rsi': self.rsi.to_dict(), 'macd': self.macd.to_dict(),
+            'stats': self.stats.to_dict(), 'last_ts': self.last_ts, 'last_close': self.last_close,
+        }
+
+    def _restore(self, data: Dict):
+        self.ema = EMAState.from_dict(data['ema'])
+        self.rsi = RSIState.from_dict(data['rsi'])
+        self.macd = MACDState.from_dict(data['macd'])
+        self.stats = RollingStats.from_dict(data['stats'])
+        self.last_ts = data['last_ts']
+        self.last_close = data['last_close']
+
+    def to_dict(self) -> Dict:
+        data = self._core_dict()
+        data['prev'] = self._prev
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'AssetIndicatorState':
+        state = cls()
+        state._restore(data)
+        state._prev = data.get('prev')
+        return state
+
+
+class IndicatorStore:
+    """Per-symbol AssetIndicatorState persisted as JSON."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or STATE_PATH
+        self.states: Dict[str, AssetIndicatorState] = {}
+        self.dirty = False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') == STATE_VERSION:
+                self.states = {k: AssetIndicatorState.from_dict(v) for k, v in data['states'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if os.path.exists(self.path):
+                logger.warning(f"Indicator state unreadable, starting empty: {e}")
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.states
+
+    def __len__(self):
+        return len(self.states)
+
+    def get(self, symbol: str) -> Optional[AssetIndicatorState]:
+        return self.states.get(symbol)
+
+    def get_or_seed(self, symbol: str, history=None) -> Optional[AssetIndicatorState]:
+        """
+        State for ``symbol``, reseeded from ``history`` (timestamps, closes) when
+        missing or older than the history (e.g. after a full run refreshed it).
+        """
+        state = self.states.get(symbol)
+        if history is not None and len(history[1]):
+            timestamps, closes = history
+            tz = market_of(symbol).tz
+            if state is None or state.last_ts is None or session_day(state.last_ts, tz) < session_day(timestamps[-1], tz):
+                state = AssetIndicatorState.from_history(closes, timestamps, tz)
+                self.put(symbol, state)
+        return state
+
+    def put(self, symbol: str, state: AssetIndicatorState):
+        self.states[symbol] = state
+        self.dirty = True
+
+    def update(self, symbol: str, close: float, ts: Optional[int] = None) -> Optional[Dict]:
+        """O(1) update of a known symbol; None if it has no state yet."""
+        state = self.states.get(symbol)
+        if state is None:
+            return None
+        self.dirty = True
+        return state.update(close, ts, market_of(symbol).tz)
+
+    def save(self):
+        if not self.dirty:
+            return
+        payload = {'version': STATE_VERSION, 'states': {k: v.to_dict() for k, v in self.states.items()}}
+        try:
+            write_json_atomic(self.path, payload)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save indicator state: {e}")
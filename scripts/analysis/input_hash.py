@@ -0,0 +1,85 @@
+"""
+Input-hash change detection for derived asset fields.
+
+Each scored record is tagged with ``input_hash``: a digest of everything
+its derived fields (metrics, indicators, score, recommendation, reasons)
+were computed from, plus the version of the scoring rules. When the next
+run sees identical inputs for an asset, the previous record's derived
+fields are reused instead of recomputed. Bump the rules version passed by
+a scorer whenever its formulas change, so every asset is recomputed once.
+
+Usage:
+    digest = input_hash(info, closes, version=SCORING_VERSION)
+    if not reuse_derived(record, previous, digest, DERIVED_FIELDS, section='us_stocks'):
+        ...compute...
+        record['input_hash'] = digest
+"""
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.indicator_cache import data_fingerprint
+
+_counts = Counter()  # (section, 'recomputed' | 'reused') -> assets
+_lock = threading.Lock()
+
+
+def input_hash(*parts: Any, version: int = 1) -> str:
+    """Digest of JSON-like values and arrays/Series/DataFrames, tagged with a rules version."""
+    digest = hashlib.blake2b(f"v{version}".encode(), digest_size=16)
+    for part in parts:
+        if isinstance(part, (np.ndarray, pd.Series, pd.DataFrame)):
+            digest.update(''.join(data_fingerprint(part)).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def reuse_derived(
+    record: Dict,
+    previous: Optional[Dict],
+    digest: str,
+    fields: Iterable[str],
+    section: str = 'assets'
+) -> bool:
+    """
+    Copy ``fields`` from ``previous`` into ``record`` if its inputs are unchanged.
+
+    Args:
+        record: This run's record (updated in place)
+        previous: The asset's last published record, if any
+        digest: input_hash of this run's inputs
+        fields: Derived fields to carry over
+        section: Name used in the recomputed/reused counts
+
+    Returns:
+        True if the previous derived fields were reused; otherwise the caller
+        recomputes them (the record is tagged with ``digest`` either way)
+    """
+    reused = bool(previous) and previous.get('input_hash') == digest
+    if reused:
+        record.update({field: previous[field] for field in fields if field in previous})
+    record['input_hash'] = digest
+    with _lock:
+        _counts[section, 'reused' if reused else 'recomputed'] += 1
+    return reused
+
+
+def reuse_stats() -> Dict[str, Dict[str, int]]:
+    """{section: {'recomputed': n, 'reused': n}} since the last reset."""
+    with _lock:
+        stats: Dict[str, Dict[str, int]] = {}
+        for (section, outcome), n in _counts.items():
+            stats.setdefault(section, {'recomputed': 0, 'reused': 0})[outcome] = n
+        return stats
+
+
+def reset_reuse_stats():
+    with _lock:
+        _counts.clear()
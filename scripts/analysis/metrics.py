@@ -1,6 +1,13 @@
 import pandas as pd
 import numpy as np
 
+from analysis.indicator_cache import memoize_indicator
+from analysis.rolling import rolling_window_series
+
+# Bump when score_stock's rules change
+SCORING_VERSION = 1
+
+@memoize_indicator('metrics.rsi')
 def calculate_rsi(series, period=14):
     delta = series.diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -8,6 +15,7 @@ def calculate_rsi(series, period=14):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
+@memoize_indicator('metrics.macd')
 def calculate_macd(series, fast=12, slow=26, signal=9):
     exp1 = series.ewm(span=fast, adjust=False).mean()
     exp2 = series.ewm(span=slow, adjust=False).mean()
@@ -15,9 +23,10 @@ def calculate_macd(series, fast=12, slow=26, signal=9):
     signal_line = macd.ewm(span=signal, adjust=False).mean()
     return macd, signal_line
 
+@memoize_indicator('metrics.bollinger')
 def calculate_bollinger_bands(series, window=20, num_std=2):
-    rolling_mean = series.rolling(window=window).mean()
-    rolling_std = series.rolling(window=window).std()
+    stats = rolling_window_series(series, window)
+    rolling_mean, rolling_std = stats.mean, stats.std
     upper_band = rolling_mean + (rolling_std * num_std)
     lower_band = rolling_mean - (rolling_std * num_std)
     return upper_band, lower_band
@@ -0,0 +1,216 @@
+"""
+Path-dependent OHLCV indicator kernels: Wilder ATR/ADX, SuperTrend and
+Chaikin Money Flow.
+
+Every kernel takes 1-D arrays (one asset) or 2-D arrays shaped
+(assets, bars) with aligned, gap-free bars, and returns arrays of the same
+shape (NaN until enough bars). When numba is installed the recursive
+kernels run JIT-compiled per asset; otherwise linear recursions (Wilder
+smoothing) go through scipy.signal.lfilter and SuperTrend's ratchet loops
+over bars with NumPy operations across all assets at once (or per asset in
+plain Python for small batches).
+"""
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _as_2d(*arrays):
+    converted = [np.atleast_2d(np.asarray(a, dtype=np.float64)) for a in arrays]
+    return converted, np.ndim(arrays[0]) == 1
+
+
+def _restore(array: np.ndarray, squeeze: bool) -> np.ndarray:
+    return array[0] if squeeze else array
+
+
+# Below this many assets the per-asset loops beat vectorising across assets
+VECTOR_MIN_ASSETS = 16
+
+
+def _wilder_loop(x, period, start, out):
+    first = start + period - 1
+    for row in range(x.shape[0]):
+        total = 0.0
+        for t in range(start, first + 1):
+            total += x[row, t]
+        value = total / period
+        out[row, first] = value
+        for t in range(first + 1, x.shape[1]):
+            value += (x[row, t] - value) / period
+            out[row, t] = value
+
+
+def _supertrend_loop(close, upper, lower, first, line, direction):
+    for row in range(close.shape[0]):
+        final_upper, final_lower, trend = upper[row, first], lower[row, first], 1.0
+        line[row, first] = final_lower
+        direction[row, first] = trend
+        for t in range(first + 1, close.shape[1]):
+            prev_close = close[row, t - 1]
+            if upper[row, t] < final_upper or prev_close > final_upper:
+                final_upper = upper[row, t]
+            if lower[row, t] > final_lower or prev_close < final_lower:
+                final_lower = lower[row, t]
+            if trend < 0 and close[row, t] > final_upper:
+                trend = 1.0
+            elif trend > 0 and close[row, t] < final_lower:
+                trend = -1.0
+            line[row, t] = final_lower if trend > 0 else final_upper
+            direction[row, t] = trend
+
+
+if NUMBA_AVAILABLE:
+    _wilder_loop = numba.njit(cache=True)(_wilder_loop)
+    _supertrend_loop = numba.njit(cache=True)(_supertrend_loop)
+
+
+def wilder_smooth(x, period: int, start: int = 0) -> np.ndarray:
+    """
+    Wilder's moving average (RMA): seeded with the mean of ``period`` values
+    starting at ``start``, then y[t] = y[t-1] + (x[t] - y[t-1]) / period.
+    """
+    (values,), squeeze = _as_2d(x)
+    out = np.full_like(values, np.nan)
+    first = start + period - 1
+    if values.shape[1] <= first:
+        return _restore(out, squeeze)
+
+    if NUMBA_AVAILABLE:
+        _wilder_loop(values, period, start, out)
+    else:
+        seed = values[:, start:first + 1].mean(axis=1)
+        out[:, first] = seed
+        if values.shape[1] > first + 1:
+            alpha = 1.0 / period
+            out[:, first + 1:] = lfilter(
+                [alpha], [1.0, alpha - 1.0], values[:, first + 1:], axis=1, zi=((1 - alpha) * seed)[:, None]
+            )[0]
+    return _restore(out, squeeze)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar is high - low."""
+    (high, low, close), squeeze = _as_2d(high, low, close)
+    prev_close = close[:, :-1]
+    tr = high - low
+    tr[:, 1:] = np.maximum.reduce([
+        tr[:, 1:], np.abs(high[:, 1:] - prev_close), np.abs(low[:, 1:] - prev_close)
+    ])
+    return _restore(tr, squeeze)
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Wilder ATR, first value at bar ``period``."""
+    return wilder_smooth(true_range(high, low, close), period, start=1)
+
+
+def adx(high, low, close, period: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Wilder's Average Directional Index.
+
+    Returns:
+        (adx, plus_di, minus_di); DI from bar ``period``, ADX from bar ``2 * period - 1``
+    """
+    (high, low, close), squeeze = _as_2d(high, low, close)
+    up = np.diff(high, axis=1)
+    down = -np.diff(low, axis=1)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    tr = true_range(high, low, close)[:, 1:]
+
+    smoothed = wilder_smooth(np.concatenate([tr, plus_dm, minus_dm]), period)
+    rows = len(high)
+    smoothed_tr, smoothed_plus, smoothed_minus = smoothed[:rows], smoothed[rows:2 * rows], smoothed[2 * rows:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = np.where(smoothed_tr > 0, 100 * smoothed_plus / smoothed_tr, 0.0)
+        minus_di = np.where(smoothed_tr > 0, 100 * smoothed_minus / smoothed_tr, 0.0)
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum > 0, 100 * np.abs(plus_di - minus_di) / di_sum, 0.0)
+    warmup = np.isnan(smoothed_tr)
+    plus_di[warmup] = minus_di[warmup] = dx[warmup] = np.nan
+
+    adx_values = wilder_smooth(dx, period, start=period - 1)
+    pad = np.full((rows, 1), np.nan)
+    return tuple(_restore(np.hstack([pad, a]), squeeze) for a in (adx_values, plus_di, minus_di))
+
+
+def supertrend(high, low, close, period: int = 10, multiplier: float = 3.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    SuperTrend on Wilder ATR.
+
+    Returns:
+        (line, direction) with direction +1 (up-trend) / -1 (down-trend), from bar ``period``
+    """
+    (high, low, close), squeeze = _as_2d(high, low, close)
+    band_atr = atr(high, low, close, period)
+    mid = (high + low) / 2
+    upper, lower = mid + multiplier * band_atr, mid - multiplier * band_atr
+
+    line = np.full_like(close, np.nan)
+    direction = np.full_like(close, np.nan)
+    first = period
+    if close.shape[1] <= first:
+        return _restore(line, squeeze), _restore(direction, squeeze)
+
+    if NUMBA_AVAILABLE or len(close) < VECTOR_MIN_ASSETS:
+        _supertrend_loop(close, upper, lower, first, line, direction)
+    else:
+        # Ratchet is non-linear: loop over bars, vectorised across assets
+        final_upper, final_lower = upper[:, first].copy(), lower[:, first].copy()
+        trend = np.ones(len(close))
+        line[:, first], direction[:, first] = final_lower, trend
+        for t in range(first + 1, close.shape[1]):
+            prev_close = close[:, t - 1]
+            final_upper = np.where((upper[:, t] < final_upper) | (prev_close > final_upper), upper[:, t], final_upper)
+            final_lower = np.where((lower[:, t] > final_lower) | (prev_close < final_lower), lower[:, t], final_lower)
+            trend = np.where((trend < 0) & (close[:, t] > final_upper), 1.0,
+                             np.where((trend > 0) & (close[:, t] < final_lower), -1.0, trend))
+            line[:, t] = np.where(trend > 0, final_lower, final_upper)
+            direction[:, t] = trend
+    return _restore(line, squeeze), _restore(direction, squeeze)
+
+
+def _rolling_sum(values: np.ndarray, period: int) -> np.ndarray:
+    out = np.full_like(values, np.nan)
+    if values.shape[1] >= period:
+        csum = np.cumsum(values, axis=1)
+        out[:, period - 1] = csum[:, period - 1]
+        out[:, period:] = csum[:, period:] - csum[:, :-period]
+    return out
+
+
+def cmf(high, low, close, volume, period: int = 20) -> np.ndarray:
+    """Chaikin Money Flow, first value at bar ``period - 1``."""
+    (high, low, close, volume), squeeze = _as_2d(high, low, close, volume)
+    spread = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        multiplier = np.where(spread > 0, ((close - low) - (high - close)) / spread, 0.0)
+        volume_sum = _rolling_sum(volume, period)
+        values = np.where(volume_sum > 0, _rolling_sum(multiplier * volume, period) / volume_sum, 0.0)
+    values[np.isnan(volume_sum)] = np.nan
+    return _restore(values, squeeze)
+
+
+def latest_indicators(high, low, close, volume=None) -> Dict:
+    """Last-bar ADX, ATR, SuperTrend direction and CMF for one asset (NaN if not enough bars)."""
+    adx_values, plus_di, minus_di = adx(high, low, close)
+    _, direction = supertrend(high, low, close)
+    return {
+        'adx': float(adx_values[-1]),
+        'plus_di': float(plus_di[-1]),
+        'minus_di': float(minus_di[-1]),
+        'atr': float(atr(high, low, close)[-1]),
+        'supertrend': float(direction[-1]),
+        'cmf': float(cmf(high, low, close, volume)[-1]) if volume is not None else float('nan'),
+    }
@@ -0,0 +1,143 @@
+"""
+Shared O(n) rolling-window statistics.
+
+One call computes the rolling mean, std, min and max of a 1-D series or a
+2-D (assets, bars) array:
+  - mean/std from prefix sums restarted every ``window`` bars, each block
+    centred on its own mean and each window re-centred on its first block,
+    so the sums stay on the scale of the window's spread however far the
+    series drifts (row-wide prefix sums lose small variances on trends),
+  - min/max with the van Herk / Gil-Werman block scan, the vectorised
+    equivalent of a monotonic deque: a prefix and a suffix running extreme
+    per window-sized block, so each output is the extreme of two lookups.
+
+Semantics match pandas ``rolling(window)`` with the default
+``min_periods=window``: NaN until a full window, and NaN for any window that
+contains a NaN.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.indicator_cache import memoize_indicator
+
+RollingWindow = namedtuple('RollingWindow', ['mean', 'std', 'min', 'max'])
+
+# Rows per block: single-row temporaries stay cache-resident, which measured
+# ~1.5x faster than whole-array passes on 1k x 10k universes
+CHUNK_ROWS = 1
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum over each trailing window, aligned to the window's last bar (width n - window + 1)."""
+    csum = np.cumsum(values, axis=1)
+    sums = csum[:, window - 1:].copy()
+    sums[:, 1:] -= csum[:, :-window]
+    return sums
+
+
+def _window_moments(values: np.ndarray, window: int, has_missing: bool):
+    """
+    Mean and sum of squared deviations over each trailing window (width n - window + 1).
+
+    Sums run within blocks of ``window`` bars about the block mean. The window
+    starting ``r`` bars into block ``a`` is the tail of block ``a`` plus the
+    first ``r`` bars of block ``a + 1``, whose sums are shifted onto block
+    ``a``'s mean before they are combined.
+    """
+    rows, n = values.shape
+    blocks = -(-n // window) + 1  # a spare block so every window has a next block
+    padded = np.empty((rows, blocks * window))
+    padded[:, :n] = values
+    padded[:, n:] = values[:, -1:]
+    shaped = padded.reshape(rows, blocks, window)
+    if has_missing:
+        present = ~np.isnan(shaped)
+        filled = np.where(present, shaped, 0.0)
+        centre = filled.sum(axis=2) / np.maximum(present.sum(axis=2), 1)
+        deviations = np.where(present, filled - centre[:, :, None], 0.0)
+    else:
+        centre = shaped.mean(axis=2)
+        deviations = shaped - centre[:, :, None]
+    first = np.cumsum(deviations, axis=2)
+    second = np.cumsum(deviations * deviations, axis=2)
+
+    shift = (centre[:, 1:] - centre[:, :-1])[:, :, None]
+    head1, head2 = first[:, 1:, :-1], second[:, 1:, :-1]
+    offset = np.arange(1, window)
+    sum1 = np.empty((rows, blocks - 1, window))
+    sum2 = np.empty((rows, blocks - 1, window))
+    sum1[:, :, :1], sum2[:, :, :1] = first[:, :-1, -1:], second[:, :-1, -1:]
+    sum1[:, :, 1:] = first[:, :-1, -1:] - first[:, :-1, :-1] + head1 + offset * shift
+    sum2[:, :, 1:] = second[:, :-1, -1:] - second[:, :-1, :-1] + head2 + shift * (2 * head1 + offset * shift)
+    mean = sum1 / window
+    squares = np.maximum(sum2 - sum1 * mean, 0.0)
+    mean += centre[:, :-1, None]
+    width = n - window + 1
+    return mean.reshape(rows, -1)[:, :width], squares.reshape(rows, -1)[:, :width]
+
+
+def _window_extreme(values: np.ndarray, window: int, ufunc, fill: float) -> np.ndarray:
+    """Rolling max (ufunc=np.maximum) or min (ufunc=np.minimum) in O(n)."""
+    rows, n = values.shape
+    blocks = -(-n // window)
+    padded = np.full((rows, blocks * window), fill)
+    padded[:, :n] = values
+    shaped = padded.reshape(rows, blocks, window)
+    prefix = ufunc.accumulate(shaped, axis=2).reshape(rows, -1)
+    suffix = ufunc.accumulate(shaped[:, :, ::-1], axis=2)[:, :, ::-1].reshape(rows, -1)
+    return ufunc(suffix[:, :n - window + 1], prefix[:, window - 1:n])
+
+
+def _rolling_rows(data: np.ndarray, window: int, ddof: int, out):
+    """Fill ``out`` (mean, std, min, max) for a block of rows."""
+    missing = np.isnan(data)
+    has_missing = missing.any()
+
+    mean, squares = _window_moments(data, window, has_missing)
+    if window > ddof:
+        variance = squares / (window - ddof)
+    else:
+        variance = np.full_like(mean, np.nan)
+
+    out[0][:, window - 1:] = mean
+    out[1][:, window - 1:] = np.sqrt(variance)
+    out[2][:, window - 1:] = _window_extreme(np.where(missing, np.inf, data), window, np.minimum, np.inf)
+    out[3][:, window - 1:] = _window_extreme(np.where(missing, -np.inf, data), window, np.maximum, -np.inf)
+
+    if has_missing:
+        incomplete = _window_sums(missing.astype(np.float64), window) > 0
+        for o in out:
+            o[:, window - 1:][incomplete] = np.nan
+
+
+def rolling_window(values, window: int, ddof: int = 1) -> RollingWindow:
+    """
+    Rolling mean, std (``ddof`` like pandas), min and max in one pass.
+
+    Args:
+        values: 1-D series or 2-D (assets, bars) array
+        window: Window length in bars
+        ddof: Delta degrees of freedom for std
+
+    Returns:
+        RollingWindow of arrays shaped like ``values``
+    """
+    array = np.asarray(values, dtype=np.float64)
+    squeeze = array.ndim == 1
+    data = np.atleast_2d(array)
+    rows, n = data.shape
+    out = [np.full((rows, n), np.nan) for _ in range(4)]
+    if 1 <= window <= n:
+        for lo in range(0, rows, CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, rows)
+            _rolling_rows(data[lo:hi], window, ddof, [o[lo:hi] for o in out])
+    return RollingWindow(*(o[0] if squeeze else o for o in out))
+
+
+@memoize_indicator('rolling.window')
+def rolling_window_series(series: pd.Series, window: int) -> RollingWindow:
+    """rolling_window for a pandas Series, returning Series on the same index (memoized)."""
+    stats = rolling_window(series.to_numpy(dtype=np.float64), window)
+    return RollingWindow(*(pd.Series(s, index=series.index) for s in stats))
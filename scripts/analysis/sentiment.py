@@ -0,0 +1,231 @@
+"""
+Batch lexicon-based sentiment scoring for news articles.
+
+All titles + summaries are tokenised in one pass into a sparse
+(articles x lexicon terms) count matrix; scores are a single sparse
+matrix-vector product against the lexicon weights. Results are memoised by
+article content hash (optionally on disk), so unchanged articles are never
+rescored across runs.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from pipeline.publish import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+LEXICON_VERSION = 2
+
+# Finance-oriented polarity lexicon (Loughran-McDonald style), weights in [-3, 3]
+FINANCE_LEXICON = {
+    # positive
+    'beat': 2, 'beats': 2, 'surge': 2.5, 'surges': 2.5, 'surged': 2.5, 'soar': 2.5, 'soars': 2.5,
+    'soared': 2.5, 'rally': 2, 'rallies': 2, 'rallied': 2, 'gain': 1.5, 'gains': 1.5, 'gained': 1.5,
+    'jump': 1.5, 'jumps': 1.5, 'jumped': 1.5, 'rise': 1, 'rises': 1, 'rose': 1, 'rising': 1,
+    'climb': 1.5, 'climbs': 1.5, 'record': 1, 'high': 0.5, 'higher': 1, 'growth': 1.5, 'grow': 1,
+    'grows': 1, 'profit': 1.5, 'profits': 1.5, 'profitable': 2, 'upgrade': 2, 'upgraded': 2,
+    'upgrades': 2, 'outperform': 2, 'outperforms': 2, 'bullish': 2.5, 'strong': 1.5, 'stronger': 1.5,
+    'robust': 1.5, 'boost': 1.5, 'boosts': 1.5, 'boosted': 1.5, 'recover': 1, 'recovery': 1.5,
+    'rebound': 1.5, 'rebounds': 1.5, 'optimism': 2, 'optimistic': 2, 'approval': 1.5, 'approved': 1.5,
+    'dividend': 1, 'buyback': 1.5, 'expand': 1, 'expansion': 1, 'win': 1.5, 'wins': 1.5,
+    'breakthrough': 2, 'innovative': 1, 'exceed': 2, 'exceeds': 2, 'exceeded': 2, 'positive': 1.5,
+    'upbeat': 2, 'raise': 1, 'raises': 1, 'raised': 1, 'partnership': 1, 'launch': 0.5,
+    # negative
+    'miss': -2, 'misses': -2, 'missed': -2, 'plunge': -2.5, 'plunges': -2.5, 'plunged': -2.5,
+    'crash': -3, 'crashes': -3, 'crashed': -3, 'tumble': -2, 'tumbles': -2, 'tumbled': -2,
+    'slump': -2, 'slumps': -2, 'slumped': -2, 'fall': -1, 'falls': -1, 'fell': -1, 'falling': -1,
+    'drop': -1.5, 'drops': -1.5, 'dropped': -1.5, 'decline': -1.5, 'declines': -1.5, 'declined': -1.5,
+    'loss': -2, 'losses': -2, 'lose': -1.5, 'loses': -1.5, 'lower': -1, 'low': -0.5, 'weak': -1.5,
+    'weaker': -1.5, 'weakness': -1.5, 'downgrade': -2, 'downgraded': -2, 'downgrades': -2,
+    'underperform': -2, 'bearish': -2.5, 'sell-off': -2, 'selloff': -2, 'fear': -2, 'fears': -2,
+    'concern': -1, 'concerns': -1, 'worry': -1.5, 'worries': -1.5, 'risk': -1, 'risks': -1,
+    'volatile': -1, 'volatility': -1, 'recession': -2.5, 'inflation': -1, 'default': -2.5,
+    'bankrupt': -3, 'bankruptcy': -3, 'fraud': -3, 'lawsuit': -2, 'sued': -2, 'probe': -1.5,
+    'investigation': -1.5, 'fined': -2, 'penalty': -2, 'layoff': -2, 'layoffs': -2,
+    'cut': -1, 'cuts': -1, 'warning': -1.5, 'warns': -1.5, 'hack': -2.5, 'hacked': -2.5,
+    'exploit': -2, 'scam': -3, 'ban': -2, 'banned': -2, 'crisis': -2.5, 'slowdown': -1.5,
+    'negative': -1.5, 'pessimism': -2, 'uncertainty': -1.5, 'delay': -1, 'delayed': -1,
+    'shortfall': -2, 'debt': -0.5, 'halt': -1.5, 'halted': -1.5, 'collapse': -3, 'collapsed': -3,
+}
+
+NEGATORS = {'not', 'no', 'never', "n't", 'without', 'neither', 'nor', "don't", "didn't", "won't", "isn't"}
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z'\-]*")
+
+# compound = s / sqrt(s^2 + ALPHA) maps raw sums into (-1, 1)
+NORMALIZATION_ALPHA = 15.0
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+CACHE_PATH = os.path.join(DATA_DIR, 'sentiment_cache.json')
+CACHE_MAX_ENTRIES = 20000
+
+
+def _build_vocabulary(lexicon: Dict[str, float]):
+    """Vocabulary covers each term and its negated form ("not_<term>")."""
+    terms = list(lexicon)
+    vocab = {term: i for i, term in enumerate(terms)}
+    vocab.update({f"not_{term}": i + len(terms) for i, term in enumerate(terms)})
+    weights = np.array([lexicon[t] for t in terms], dtype=np.float64)
+    return vocab, np.concatenate([weights, -0.5 * weights])
+
+
+VOCAB, WEIGHTS = _build_vocabulary(FINANCE_LEXICON)
+
+
+def content_hash(article: Dict) -> str:
+    """Hash of the scored text plus lexicon version."""
+    text = f"{LEXICON_VERSION}\x00{article.get('title', '')}\x00{article.get('summary', '')}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens with the word after a negator marked as ``not_<word>``."""
+    tokens = []
+    negate = False
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in NEGATORS or token.endswith("n't"):
+            negate = True
+            continue
+        tokens.append(f"not_{token}" if negate else token)
+        negate = False
+    return tokens
+
+
+def score_texts(texts: List[str]) -> np.ndarray:
+    """
+    Score a batch of texts.
+
+    Args:
+        texts: Raw article texts
+
+    Returns:
+        Array of compound scores in (-1, 1), one per text
+    """
+    if not texts:
+        return np.zeros(0)
+
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            col = VOCAB.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(texts), len(VOCAB))
+    )
+    raw = counts @ WEIGHTS
+    return raw / np.sqrt(raw * raw + NORMALIZATION_ALPHA)
+
+
+def sentiment_label(score: float) -> str:
+    if score >= POSITIVE_THRESHOLD:
+        return 'positive'
+    if score <= NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
+
+
+class SentimentScorer:
+    """Batch scorer with a content-hash memo (optionally persisted to disk)."""
+
+    def __init__(self, cache_path: Optional[str] = CACHE_PATH):
+        self.cache_path = cache_path
+        self.cache: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_path:
+            try:
+                with open(cache_path) as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError):
+                self.cache = {}
+
+    def score_articles(self, articles: List[Dict]) -> List[Dict]:
+        """Attach ``sentiment`` and ``sentiment_label`` to each article (in place)."""
+        hashes = [content_hash(a) for a in articles]
+        pending = [i for i, h in enumerate(hashes) if h not in self.cache]
+        self.hits += len(articles) - len(pending)
+        self.misses += len(pending)
+
+        if pending:
+            texts = [f"{articles[i].get('title', '')} {articles[i].get('summary', '')}" for i in pending]
+            for i, score in zip(pending, score_texts(texts)):
+                self.cache[hashes[i]] = round(float(score), 4)
+
+        for article, h in zip(articles, hashes):
+            score = self.cache[h]
+            article['sentiment'] = score
+            article['sentiment_label'] = sentiment_label(score)
+
+        logger.info(f"Sentiment: scored {len(pending)} new, {len(articles) - len(pending)} memoized")
+        return articles
+
+    def save(self):
+        if not self.cache_path:
+            return
+        # Keep the most recently inserted entries (dicts preserve insertion order)
+        if len(self.cache) > CACHE_MAX_ENTRIES:
+            self.cache = dict(list(self.cache.items())[-CACHE_MAX_ENTRIES:])
+        try:
+            write_json_atomic(self.cache_path, self.cache)
+        except OSError as e:
+            logger.warning(f"Could not persist sentiment cache: {e}")
+
+
+def _summarize(scores: List[float]) -> Dict:
+    return {
+        'score': round(float(np.mean(scores)), 4) if scores else 0.0,
+        'articles': len(scores),
+        'positive': sum(1 for s in scores if s >= POSITIVE_THRESHOLD),
+        'negative': sum(1 for s in scores if s <= NEGATIVE_THRESHOLD),
+    }
+
+
+def aggregate_sentiment(articles: Iterable[Dict]) -> Dict[str, Dict]:
+    """Per-symbol and per-category sentiment summaries of scored articles."""
+    by_symbol: Dict[str, List[float]] = {}
+    by_category: Dict[str, List[float]] = {}
+    for article in articles:
+        score = article.get('sentiment')
+        if score is None:
+            continue
+        by_category.setdefault(article.get('category') or 'General', []).append(score)
+        for symbol in article.get('related_symbols', []):
+            by_symbol.setdefault(symbol, []).append(score)
+
+    return {
+        'symbols': {s: _summarize(v) for s, v in by_symbol.items()},
+        'categories': {c: _summarize(v) for c, v in by_category.items()},
+    }
+
+
+def score_news_sentiment(articles: List[Dict], assets: Iterable[Dict], cache_path: Optional[str] = CACHE_PATH) -> Dict[str, Dict]:
+    """
+    Pipeline stage: score articles, attach per-asset ``news_sentiment``.
+
+    Returns:
+        Per-category sentiment summaries
+    """
+    scorer = SentimentScorer(cache_path)
+    scorer.score_articles(articles)
+    scorer.save()
+
+    summary = aggregate_sentiment(articles)
+    for asset in assets:
+        symbol = asset.get('symbol', '')
+        asset_summary = summary['symbols'].get(symbol) or summary['symbols'].get(symbol.upper())
+        if asset_summary:
+            asset['news_sentiment'] = asset_summary
+    return summary['categories']
@@ -0,0 +1,79 @@
+"""
+Microbenchmark: feed date normalization vs. dateutil on every entry.
+
+Corpus mirrors the formats our RSS feeds and news APIs actually emit
+(BBC/Reuters RFC 822 with GMT, Economic Times +0530 offsets, NewsAPI/GNews
+ISO 'Z', Atom ISO with offsets, plus a few oddballs that need dateutil).
+
+Usage: python benchmarks/bench_feed_dates.py [entries]
+"""
+import os
+import sys
+import time
+import warnings
+from email.utils import parsedate
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dateutil import parser as date_parser
+from fetchers.feed_dates import entry_timestamp, parse_date_to_epoch
+
+REAL_FORMATS = [
+    'Mon, 01 Dec 2025 06:39:44 GMT',          # BBC, CNBC
+    'Mon, 01 Dec 2025 06:39:44 +0000',        # Variety, TechCrunch
+    'Mon, 01 Dec 2025 12:09:44 +0530',        # Economic Times, Business Standard
+    'Mon, 1 Dec 2025 01:39:44 EST',           # MarketWatch
+    'Mon, 01 Dec 2025 06:39:44 Z',            # Bloomberg
+    '2025-12-01T06:39:44Z',                   # NewsAPI / GNews publishedAt
+    '2025-12-01T06:39:44+00:00',              # Atom (The Verge)
+    '2025-12-01T12:09:44.123+05:30',          # Atom with fraction
+    '2025-12-01 06:39:44',                    # naive ISO
+    'December 1, 2025 6:39 AM',               # oddball, dateutil only
+]
+
+
+class Entry(dict):
+    """feedparser-like entry: string field plus optional pre-parsed struct_time"""
+
+
+def build_corpus(size):
+    corpus = []
+    for i in range(size):
+        value = REAL_FORMATS[i % len(REAL_FORMATS)]
+        entry = Entry(published=value)
+        # feedparser pre-parses most entries; emulate that for half of the RFC 822 ones
+        if i % 2 == 0 and parsedate(value):
+            entry['published_parsed'] = time.struct_time(parsedate(value))
+        corpus.append(entry)
+    return corpus
+
+
+def bench(label, func, corpus):
+    start = time.perf_counter()
+    for entry in corpus:
+        func(entry)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:8.1f} ms  ({elapsed / len(corpus) * 1e6:6.2f} us/entry)")
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    corpus = build_corpus(size)
+    print(f"{size} entries, {len(REAL_FORMATS)} formats")
+
+    # dateutil warns on every "EST" it cannot resolve
+    warnings.filterwarnings('ignore', module='dateutil')
+
+    for value in REAL_FORMATS:
+        assert parse_date_to_epoch(value) is not None, value
+
+    baseline = bench("dateutil.parser.parse", lambda e: date_parser.parse(e['published']), corpus)
+    strings = bench("parse_date_to_epoch (strings)", lambda e: parse_date_to_epoch(e['published']), corpus)
+    entries = bench("entry_timestamp (struct_time)", entry_timestamp, corpus)
+
+    print(f"speedup: {baseline / strings:.1f}x on strings, {baseline / entries:.1f}x on feed entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: OHLCV kernels (Wilder ADX/ATR, SuperTrend, CMF) on a whole
+universe at once vs. per-asset pandas, over 1,000 assets x 1,000 bars.
+
+The pandas baseline is the rolling-mean ADX/CMF previously inlined in
+crypto_enhanced plus a per-bar Python SuperTrend loop.
+
+Usage: python benchmarks/bench_ohlcv_kernels.py [assets] [bars]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from analysis.ohlcv_kernels import NUMBA_AVAILABLE, adx, atr, cmf, supertrend
+
+
+def make_universe(assets, bars, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (assets, bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.02, (assets, bars)))
+    low = close * (1 - rng.uniform(0, 0.02, (assets, bars)))
+    volume = rng.uniform(1e5, 1e6, (assets, bars))
+    return high, low, close, volume
+
+
+def pandas_asset(high, low, close, volume):
+    high, low, close, volume = (pd.Series(a) for a in (high, low, close, volume))
+    tr = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1).max(axis=1)
+    atr_values = tr.rolling(14).mean()
+    plus_dm = high.diff().clip(lower=0)
+    minus_dm = (-low.diff()).clip(lower=0)
+    plus_di = 100 * plus_dm.rolling(14).mean() / atr_values
+    minus_di = 100 * minus_dm.rolling(14).mean() / atr_values
+    adx_values = (100 * (plus_di - minus_di).abs() / (plus_di + minus_di)).rolling(14).mean()
+    mfm = (((close - low) - (high - close)) / (high - low)).fillna(0)
+    cmf_values = (mfm * volume).rolling(20).sum() / volume.rolling(20).sum()
+
+    st_atr = tr.ewm(alpha=1 / 10, adjust=False).mean()
+    upper = ((high + low) / 2 + 3 * st_atr).tolist()
+    lower = ((high + low) / 2 - 3 * st_atr).tolist()
+    c = close.tolist()
+    final_upper, final_lower, trend = upper[10], lower[10], 1
+    for t in range(11, len(c)):
+        if upper[t] < final_upper or c[t - 1] > final_upper:
+            final_upper = upper[t]
+        if lower[t] > final_lower or c[t - 1] < final_lower:
+            final_lower = lower[t]
+        if trend < 0 and c[t] > final_upper:
+            trend = 1
+        elif trend > 0 and c[t] < final_lower:
+            trend = -1
+    return adx_values.iloc[-1], cmf_values.iloc[-1], trend
+
+
+def kernels(high, low, close, volume):
+    return adx(high, low, close)[0], atr(high, low, close), supertrend(high, low, close)[1], cmf(high, low, close, volume)
+
+
+def main():
+    assets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    bars = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    high, low, close, volume = make_universe(assets, bars)
+    print(f"{assets} assets x {bars} bars, numba: {'yes' if NUMBA_AVAILABLE else 'no (lfilter / NumPy fallback)'}")
+
+    if NUMBA_AVAILABLE:
+        kernels(high[:2, :50], low[:2, :50], close[:2, :50], volume[:2, :50])  # JIT warm-up
+
+    start = time.perf_counter()
+    for row in range(assets):
+        pandas_asset(high[row], low[row], close[row], volume[row])
+    baseline = time.perf_counter() - start
+    print(f"{'pandas per asset':<28} {baseline * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    kernels(high, low, close, volume)
+    batched = time.perf_counter() - start
+    print(f"{'kernels, whole universe':<28} {batched * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    for row in range(assets):
+        kernels(high[row], low[row], close[row], volume[row])
+    per_asset = time.perf_counter() - start
+    print(f"{'kernels, per asset':<28} {per_asset * 1000:9.1f} ms")
+
+    print(f"speedup: {baseline / batched:.1f}x batched, {baseline / per_asset:.1f}x per asset")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: batch sparse sentiment scoring vs. scoring one article at a time.
+
+The baseline is a per-article loop summing lexicon weights token by token,
+which is what a naive scorer would do. The batch path builds one sparse
+(articles x terms) matrix and does a single matrix-vector product; the
+memoized rerun is what a typical run does with articles already seen.
+
+Usage: python benchmarks/bench_sentiment.py [articles]
+"""
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from analysis.sentiment import (FINANCE_LEXICON, NORMALIZATION_ALPHA, SentimentScorer, score_texts,
+                                tokenize)
+
+TARGET_SECONDS = 1.0
+
+WORDS = ('market', 'shares', 'company', 'quarter', 'investors', 'analysts', 'said', 'the', 'after',
+         'on', 'report', 'year', 'sector', 'price', 'not', 'no')
+
+
+def build_corpus(size):
+    rng = np.random.default_rng(7)
+    vocabulary = list(FINANCE_LEXICON) + list(WORDS) * 10
+    articles = []
+    for i in range(size):
+        title = ' '.join(rng.choice(vocabulary, 10))
+        summary = ' '.join(rng.choice(vocabulary, 50))
+        articles.append({'title': f"{title} {i}", 'summary': summary})
+    return articles
+
+
+def score_one_by_one(texts):
+    scores = []
+    for text in texts:
+        raw = 0.0
+        for token in tokenize(text):
+            if token.startswith('not_'):
+                raw += -0.5 * FINANCE_LEXICON.get(token[4:], 0.0)
+            else:
+                raw += FINANCE_LEXICON.get(token, 0.0)
+        scores.append(raw / math.sqrt(raw * raw + NORMALIZATION_ALPHA))
+    return np.array(scores)
+
+
+def bench(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms")
+    return elapsed, result
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    articles = build_corpus(size)
+    texts = [f"{a['title']} {a['summary']}" for a in articles]
+    print(f"{size} articles, {len(FINANCE_LEXICON)} lexicon terms")
+
+    baseline, expected = bench("one article at a time", lambda: score_one_by_one(texts))
+    batch, scores = bench("sparse batch", lambda: score_texts(texts))
+    assert np.allclose(scores, expected)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sentiment.json')
+
+        def cold_run():
+            scorer = SentimentScorer(path)
+            scorer.score_articles(articles)
+            scorer.save()
+
+        cold, _ = bench("scorer, cold cache + save", cold_run)
+        warm, _ = bench("scorer, memoized rerun", lambda: SentimentScorer(path).score_articles(articles))
+
+    print(f"speedup: {baseline / batch:.1f}x batch vs one-by-one")
+    verdict = 'OK' if cold < TARGET_SECONDS else 'SLOW'
+    print(f"target: {size} articles under {TARGET_SECONDS:.0f}s including the cache: {cold:.2f}s {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Persistent on-disk news article store (SQLite)
+Each run inserts only unseen articles, old articles are evicted after a rolling
+window, and the app payload is an indexed "latest N per category" query.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from fetchers.feed_dates import parse_date_to_epoch, epoch_to_iso
+except ImportError:
+    from feed_dates import parse_date_to_epoch, epoch_to_iso
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'news.db')
+RETENTION_DAYS = 7
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    link_hash    TEXT PRIMARY KEY,
+    link         TEXT NOT NULL,
+    title        TEXT NOT NULL,
+    source       TEXT,
+    published    TEXT,
+    published_ts INTEGER NOT NULL,
+    summary      TEXT,
+    category     TEXT NOT NULL,
+    image        TEXT,
+    ingested_ts  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_ts DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category, published_ts DESC);
+"""
+
+ARTICLE_FIELDS = ('title', 'link', 'source', 'published', 'summary', 'category', 'image')
+
+
+def link_hash(article: Dict) -> str:
+    """Stable identity for an article: its link, or the title if the link is missing."""
+    key = article.get('link') or ''
+    if not key or key == '#':
+        key = (article.get('title') or '').strip().lower()
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _published_ts(article: Dict) -> Optional[int]:
+    """Epoch seconds for an article's published date, None if it has none."""
+    ts = article.get('published_ts')
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    return parse_date_to_epoch(article.get('published'))
+
+
+class ArticleStore:
+    """Rolling-window article store backed by a single SQLite file."""
+
+    def __init__(self, path: Optional[str] = None, retention_days: int = RETENTION_DAYS):
+        path = path or DEFAULT_DB_PATH
+        self.path = path
+        self.retention_days = retention_days
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def known_hashes(self, hashes: Iterable[str]) -> set:
+        """Return the subset of ``hashes`` already in the store."""
+        hashes = list(hashes)
+        known = set()
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT link_hash FROM articles WHERE link_hash IN ({placeholders})", chunk
+            )
+            known.update(row[0] for row in rows)
+        return known
+
+    def ingest(self, articles: List[Dict]) -> int:
+        """
+        Insert unseen articles.
+
+        Args:
+            articles: Article dictionaries as produced by the news fetchers
+
+        Returns:
+            Number of newly stored articles
+        """
+        now = int(time.time())
+        cutoff = now - self.retention_days * 86400
+        rows = []
+        for article in articles:
+            # Undated articles keep their first-seen time (INSERT OR IGNORE never overwrites it)
+            published_ts = _published_ts(article) or now
+            if published_ts < cutoff:
+                continue
+            rows.append((
+                link_hash(article),
+                article.get('link') or '#',
+                article.get('title') or 'No Title',
+                article.get('source'),
+                article.get('published') or epoch_to_iso(published_ts),
+                published_ts,
+                article.get('summary'),
+                article.get('category') or 'General',
+                article.get('image'),
+                now,
+            ))
+
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            inserted = self.conn.total_changes - before
+
+        logger.info(f"Article store: {inserted} new of {len(articles)} fetched")
+        return inserted
+
+    def evict(self, now: Optional[int] = None) -> int:
+        """Delete articles older than the retention window. Returns rows removed."""
+        now = int(now if now is not None else time.time())
+        cutoff = now - self.retention_days * 86400
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM articles WHERE published_ts < ?", (cutoff,))
+        if cursor.rowcount:
+            logger.info(f"Article store: evicted {cursor.rowcount} articles older than {self.retention_days}d")
+        return cursor.rowcount
+
+    def latest(self, limit: int = 50, category: Optional[str] = None, offset: int = 0) -> List[Dict]:
+        """Newest articles overall or within one category (paginated)."""
+        if category:
+            rows = self.conn.execute(
+                "SELECT * FROM articles WHERE category = ? ORDER BY published_ts DESC LIMIT ? OFFSET ?",
+                (category, limit, offset)
+            )
+        else:
+            rows = self.conn.execute(
+                "SELECT * FROM articles ORDER BY published_ts DESC LIMIT ? OFFSET ?",
+                (limit, offset)
+            )
+        return [self._to_article(row) for row in rows]
+
+    def latest_per_category(self, per_category: int = 15) -> List[Dict]:
+        """Newest ``per_category`` articles of every category, newest first overall."""
+        categories = [row[0] for row in self.conn.execute("SELECT DISTINCT category FROM articles")]
+        articles = []
+        for category in categories:
+            # Each query is a range scan on idx_articles_category
+            articles.extend(self.latest(per_category, category=category))
+        articles.sort(key=lambda a: a['published_ts'], reverse=True)
+        return articles
+
+    def categories(self) -> Dict[str, int]:
+        """Article count per category."""
+        rows = self.conn.execute("SELECT category, COUNT(*) FROM articles GROUP BY category")
+        return {category: count for category, count in rows}
+
+    @staticmethod
+    def _to_article(row: sqlite3.Row) -> Dict:
+        article = {field: row[field] for field in ARTICLE_FIELDS}
+        article['published_ts'] = row['published_ts']
+        return article
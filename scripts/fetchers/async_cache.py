@@ -0,0 +1,186 @@
+"""
+Async response cache used by DataAggregator.
+
+A bounded LRU whose entries expire after a per-entry TTL. Failures (an
+exception or an empty result) are cached as None for a shorter
+``negative_ttl`` so a down source isn't hammered. Concurrent requests for
+the same key share one upstream call (single-flight). Entries that survive a
+JSON round trip unchanged can be persisted to a JSON file between runs; others
+stay in memory (no pickle: data/ comes from a shared Actions cache).
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from pipeline.publish import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+DISK_PATH = os.path.join(DATA_DIR, 'aggregator_cache.json')
+MAX_ENTRIES = 1024
+DEFAULT_TTL = 300  # seconds
+NEGATIVE_TTL = 30  # seconds a failure is remembered
+CACHE_VERSION = 2
+
+# key -> (value, expires at (epoch seconds), negative)
+Entry = Tuple[Any, float, bool]
+
+
+def _key_to_json(key):
+    return [_key_to_json(k) for k in key] if isinstance(key, tuple) else key
+
+
+def _key_from_json(key):
+    return tuple(_key_from_json(k) for k in key) if isinstance(key, list) else key
+
+
+def _json_round_trips(value) -> bool:
+    try:
+        return json.loads(json.dumps(value, allow_nan=False)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+class AsyncTTLCache:
+    """LRU + TTL cache for coroutine results with single-flight and negative caching."""
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = DEFAULT_TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries: 'OrderedDict[Hashable, Entry]' = OrderedDict()
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+        self.path = None
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self.attach_disk(path)
+
+    def attach_disk(self, path: str = DISK_PATH):
+        """Persist positive entries to ``path``, loading any saved by a previous run."""
+        self.path = path
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            if payload.get('version') == CACHE_VERSION:
+                now = time.time()
+                for key, value, expires in payload['entries']:
+                    if expires > now:
+                        self._store(_key_from_json(key), value, expires, negative=False)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Aggregator cache unreadable, starting empty: {e}")
+
+    def _store(self, key: Hashable, value: Any, expires: float, negative: bool):
+        self.entries[key] = (value, expires, negative)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, key: Hashable) -> Optional[Entry]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable], ttl: Optional[float] = None) -> Any:
+        """
+        Cached result of ``fetch()`` for ``key``.
+
+        Args:
+            key: Hashable request identity
+            fetch: Coroutine function making the upstream call
+            ttl: Seconds to keep a successful result (default: the cache's ttl)
+
+        Returns:
+            The result, or None if the fetch failed (now or within negative_ttl)
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, _, negative = entry
+            if negative:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+        # Single-flight: identical concurrent requests wait for the first one
+        if key in self.inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self.inflight[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        value = None
+        try:
+            value = await fetch()
+        except Exception as e:
+            logger.warning(f"Fetch for {key!r} failed, caching the failure for {self.negative_ttl}s: {e}")
+        finally:
+            del self.inflight[key]
+            future.set_result(value if value else None)
+
+        if value:
+            self._store(key, value, time.time() + (self.ttl if ttl is None else ttl), negative=False)
+            return value
+        self._store(key, None, time.time() + self.negative_ttl, negative=True)
+        return None
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.negative_hits = self.misses = self.coalesced = 0
+        self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.negative_hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round((self.hits + self.negative_hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            'entries': len(self.entries),
+        }
+
+    def save(self):
+        """Write unexpired positive entries that JSON can represent (no-op without a disk file)."""
+        if not self.path:
+            return
+        now = time.time()
+        entries = [[_key_to_json(key), value, expires] for key, (value, expires, negative) in self.entries.items()
+                   if not negative and expires > now and _json_round_trips(_key_to_json(key))
+                   and _json_round_trips(value)]
+        try:
+            write_json_atomic(self.path, {'version': CACHE_VERSION, 'entries': entries})
+        except Exception as e:
+            logger.warning(f"Could not save aggregator cache: {e}")
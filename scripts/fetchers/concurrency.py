@@ -0,0 +1,255 @@
+"""
+Adaptive (AIMD) concurrency limits per upstream.
+
+Every request to an upstream (Yahoo, CoinGecko, ...) takes a slot from that
+upstream's AdaptiveLimiter, whether it is made from a worker thread or a
+coroutine. The limit grows additively (about +1 per limit's worth of
+healthy responses) while latency stays near the best recently observed and
+halves on a 429, a 5xx or a network error, like TCP congestion control.
+Permanent errors (other 4xx, unparseable payloads) say nothing about
+upstream load and leave the limit alone. The
+learned limits are saved to data/concurrency.json so the next run starts
+from what this runner could sustain last time.
+
+Usage:
+    with get_limiter('yahoo').slot() as request:
+        response = requests.get(...)
+        request.status = response.status_code
+
+    async with get_limiter('yahoo').async_slot() as request:
+        ...
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from pipeline.publish import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+LIMITS_PATH = os.path.join(DATA_DIR, 'concurrency.json')
+
+# upstream -> (initial, min, max) concurrent requests
+UPSTREAMS = {
+    'yahoo': (8, 2, 64),
+    'coingecko': (1, 1, 4),  # free tier is rate limited per minute; keep it low
+    'news': (4, 1, 16),
+    'binance': (4, 1, 16),
+}
+DEFAULT_LIMITS = (4, 1, 32)
+
+DECREASE_FACTOR = 0.5
+LATENCY_TOLERANCE = 2.0  # healthy while latency < 2x the recent best
+LATENCY_WINDOW = 100
+BACKOFF_COOLDOWN = 1.0  # seconds; one burst of errors halves the limit once
+THROTTLE_MARKERS = ('429', 'Too Many Requests', 'Rate limit', 'rate limit')
+
+
+def is_throttle(error: BaseException) -> bool:
+    """Whether an exception looks like upstream rate limiting."""
+    return any(marker in str(error) for marker in THROTTLE_MARKERS) or type(error).__name__ == 'YFRateLimitError'
+
+
+class Request:
+    """Outcome of one request; set ``status`` to the HTTP status code if known."""
+
+    __slots__ = ('status',)
+
+    def __init__(self):
+        self.status: Optional[int] = None
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent requests, shared by threads and event loops."""
+
+    def __init__(self, name: str, initial: int, min_limit: int = 1, max_limit: int = 32):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0
+        self.throttled = 0
+        self.errors = 0
+        self.peak = self.limit
+        self._last_backoff = 0.0
+        self._waiters = deque()  # threading.Event or (loop, future)
+        self._lock = threading.Lock()
+
+    # -- slots -------------------------------------------------------------
+
+    def _grant_locked(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake_locked(self):
+        """Hand free slots to waiters, in arrival order."""
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future = waiter
+                loop.call_soon_threadsafe(_resolve, future)
+
+    def acquire(self):
+        with self._lock:
+            if self._grant_locked():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._grant_locked():
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed over; give it back
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_locked()
+
+    # -- feedback ----------------------------------------------------------
+
+    def record(self, latency: float, status: Optional[int] = None, error: Optional[BaseException] = None):
+        """Adjust the limit from one finished request."""
+        from fetchers.retry import is_retryable  # retry imports this module
+
+        throttled = status == 429 or (error is not None and is_throttle(error))
+        failed = throttled or (status is not None and status >= 500) or (error is not None and is_retryable(error))
+        if not failed and (error is not None or (status is not None and status >= 400)):
+            return  # permanent: a delisted symbol or bad request, not an overloaded upstream
+        with self._lock:
+            if failed:
+                if throttled:
+                    self.throttled += 1
+                else:
+                    self.errors += 1
+                now = time.monotonic()
+                if now - self._last_backoff >= BACKOFF_COOLDOWN:
+                    self._last_backoff = now
+                    old = self.limit
+                    self.limit = max(float(self.min_limit), self.limit * DECREASE_FACTOR)
+                    if int(old) != int(self.limit):
+                        logger.info(f"{self.name}: backing off to {int(self.limit)} concurrent "
+                                    f"({'throttled' if throttled else 'error'})")
+                return
+
+            self.successes += 1
+            self.latencies.append(latency)
+            best = min(self.latencies)
+            if latency <= best * LATENCY_TOLERANCE and self.limit < self.max_limit:
+                # +1 per `limit` healthy responses: additive increase per round trip
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+                self.peak = max(self.peak, self.limit)
+                self._wake_locked()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Blocking slot for thread-based callers; records the outcome on exit."""
+        self.acquire()
+        request = Request()
+        start = time.monotonic()
+        try:
+            yield request
+        except Exception as e:
+            self.record(time.monotonic() - start, request.status, error=e)
+            raise
+        else:
+            self.record(time.monotonic() - start, request.status)
+        finally:
+            self.release()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self):
+        """Slot for coroutines; records the outcome on exit."""
+        await self.acquire_async()
+        request = Request()
+        start = time.monotonic()
+        try:
+            yield request
+        except Exception as e:
+            self.record(time.monotonic() - start, request.status, error=e)
+            raise
+        else:
+            self.record(time.monotonic() - start, request.status)
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'limit': int(self.limit),
+                'peak': int(self.peak),
+                'in_flight': self.in_flight,
+                'successes': self.successes,
+                'throttled': self.throttled,
+                'errors': self.errors,
+            }
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def _load_saved() -> Dict[str, float]:
+    try:
+        with open(LIMITS_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """Process-wide limiter for an upstream, seeded from the last run's learned limit."""
+    with _registry_lock:
+        if name not in _limiters:
+            initial, low, high = UPSTREAMS.get(name, DEFAULT_LIMITS)
+            saved = _load_saved().get(name)
+            _limiters[name] = AdaptiveLimiter(name, int(saved) if saved else initial, low, high)
+        return _limiters[name]
+
+
+def limiter_stats() -> Dict[str, Dict]:
+    with _registry_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+def save_limits():
+    """Persist each upstream's current limit as the next run's starting point."""
+    with _registry_lock:
+        limits = dict(_load_saved(), **{name: int(l.limit) for name, l in _limiters.items()})
+    try:
+        write_json_atomic(LIMITS_PATH, limits, indent=2)
+    except OSError as e:
+        logger.warning(f"Could not save concurrency limits: {e}")
@@ -11,9 +11,13 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from analysis.indicator_cache import memoize_indicator
+from analysis.rolling import rolling_window_series
+
 cg = CoinGeckoAPI()
 logger = logging.getLogger(__name__)
 
+@memoize_indicator('crypto.rsi')
 def calculate_rsi(series, period=14):
     """Calculate Relative Strength Index"""
     if len(series) < period + 1:
@@ -25,6 +29,7 @@ def calculate_rsi(series, period=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50
 
+@memoize_indicator('crypto.macd')
 def calculate_macd(series, fast=12, slow=26, signal=9):
     """Calculate MACD and Signal Line"""
     if len(series) < slow + signal:
@@ -40,6 +45,7 @@ def calculate_macd(series, fast=12, slow=26, signal=9):
         histogram.iloc[-1] if not pd.isna(histogram.iloc[-1]) else 0
     )
 
+@memoize_indicator('crypto.ema')
 def calculate_ema(series, period):
     """Calculate Exponential Moving Average"""
     if len(series) < period:
@@ -47,6 +53,7 @@ def calculate_ema(series, period):
     ema = series.ewm(span=period, adjust=False).mean()
     return ema.iloc[-1] if not pd.isna(ema.iloc[-1]) else series.iloc[-1]
 
+@memoize_indicator('crypto.adx')
 def calculate_adx(series, period=14):
     """Simplified ADX calculation based on price momentum"""
     if len(series) < period * 2:
@@ -58,23 +65,27 @@ def calculate_adx(series, period=14):
     adx = min(100, max(0, directional_movement.iloc[-1] * 500))  # Scale to 0-100
     return adx
 
+@memoize_indicator('crypto.cmf')
 def calculate_cmf(series, period=20):
     """Simplified Chaikin Money Flow (using price as volume proxy)"""
     if len(series) < period:
         return 0
     
     # Simplified: use price position in range as money flow proxy
-    money_flow = (series - series.rolling(period).min()) / (series.rolling(period).max() - series.rolling(period).min() + 1e-10)
-    cmf = (money_flow.rolling(period).mean().iloc[-1] - 0.5) * 2  # Scale to -1 to 1
+    window = rolling_window_series(series, period)
+    money_flow = (series - window.min) / (window.max - window.min + 1e-10)
+    cmf = (rolling_window_series(money_flow, period).mean.iloc[-1] - 0.5) * 2  # Scale to -1 to 1
     return np.clip(cmf, -1, 1)
 
+@memoize_indicator('crypto.supertrend')
 def calculate_supertrend(series, period=10, multiplier=3):
     """Simplified SuperTrend indicator"""
     if len(series) < period:
         return "Neutral"
     
-    atr = series.rolling(period).std()
-    hl_avg = series.rolling(period).mean()
+    window = rolling_window_series(series, period)
+    atr = window.std
+    hl_avg = window.mean
     
     upper_band = hl_avg + multiplier * atr
     lower_band = hl_avg - multiplier * atr
@@ -88,26 +99,29 @@ def calculate_supertrend(series, period=10, multiplier=3):
     else:
         return "Neutral"
 
+@memoize_indicator('crypto.squeeze_momentum')
 def calculate_squeeze_momentum(series, period=20):
     """Simplified Squeeze Momentum Indicator"""
     if len(series) < period:
         return 0
     
-    bb_std = series.rolling(period).std()
-    kc_atr = series.rolling(period).std() * 1.5
+    bb_std = rolling_window_series(series, period).std
+    kc_atr = bb_std * 1.5
     
     squeeze_on = bb_std.iloc[-1] < kc_atr.iloc[-1]
     momentum = series.pct_change(period).iloc[-1] * 100
     
     return momentum if squeeze_on else momentum * 0.5
 
+@memoize_indicator('crypto.z_score')
 def calculate_z_score(series, period=20):
     """Calculate Z-Score for volatility analysis"""
     if len(series) < period:
         return 0
     
-    mean = series.rolling(period).mean().iloc[-1]
-    std = series.rolling(period).std().iloc[-1]
+    window = rolling_window_series(series, period)
+    mean = window.mean.iloc[-1]
+    std = window.std.iloc[-1]
     current = series.iloc[-1]
     
     if std == 0:
@@ -433,6 +447,7 @@ def fetch_crypto_data(top_n=20):
 
 
 
+@memoize_indicator('crypto.rsi')
 def calculate_rsi(series, period=14):
     """Calculate Relative Strength Index"""
     if len(series) < period + 1:
@@ -444,6 +459,7 @@ def calculate_rsi(series, period=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50
 
+@memoize_indicator('crypto.macd')
 def calculate_macd(series, fast=12, slow=26, signal=9):
     """Calculate MACD and Signal Line"""
     if len(series) < slow + signal:
@@ -459,6 +475,7 @@ def calculate_macd(series, fast=12, slow=26, signal=9):
         histogram.iloc[-1] if not pd.isna(histogram.iloc[-1]) else 0
     )
 
+@memoize_indicator('crypto.ema')
 def calculate_ema(series, period):
     """Calculate Exponential Moving Average"""
     if len(series) < period:
@@ -466,6 +483,7 @@ def calculate_ema(series, period):
     ema = series.ewm(span=period, adjust=False).mean()
     return ema.iloc[-1] if not pd.isna(ema.iloc[-1]) else series.iloc[-1]
 
+@memoize_indicator('crypto.adx')
 def calculate_adx(series, period=14):
     """Simplified ADX calculation based on price momentum"""
     if len(series) < period * 2:
@@ -477,23 +495,27 @@ def calculate_adx(series, period=14):
     adx = min(100, max(0, directional_movement.iloc[-1] * 500))  # Scale to 0-100
     return adx
 
+@memoize_indicator('crypto.cmf')
 def calculate_cmf(series, period=20):
     """Simplified Chaikin Money Flow (using price as volume proxy)"""
     if len(series) < period:
         return 0
     
     # Simplified: use price position in range as money flow proxy
-    money_flow = (series - series.rolling(period).min()) / (series.rolling(period).max() - series.rolling(period).min() + 1e-10)
-    cmf = (money_flow.rolling(period).mean().iloc[-1] - 0.5) * 2  # Scale to -1 to 1
+    window = rolling_window_series(series, period)
+    money_flow = (series - window.min) / (window.max - window.min + 1e-10)
+    cmf = (rolling_window_series(money_flow, period).mean.iloc[-1] - 0.5) * 2  # Scale to -1 to 1
     return np.clip(cmf, -1, 1)
 
+@memoize_indicator('crypto.supertrend')
 def calculate_supertrend(series, period=10, multiplier=3):
     """Simplified SuperTrend indicator"""
     if len(series) < period:
         return "Neutral"
     
-    atr = series.rolling(period).std()
-    hl_avg = series.rolling(period).mean()
+    window = rolling_window_series(series, period)
+    atr = window.std
+    hl_avg = window.mean
     
     upper_band = hl_avg + multiplier * atr
     lower_band = hl_avg - multiplier * atr
@@ -507,26 +529,29 @@ def calculate_supertrend(series, period=10, multiplier=3):
     else:
         return "Neutral"
 
+@memoize_indicator('crypto.squeeze_momentum')
 def calculate_squeeze_momentum(series, period=20):
     """Simplified Squeeze Momentum Indicator"""
     if len(series) < period:
         return 0
     
-    bb_std = series.rolling(period).std()
-    kc_atr = series.rolling(period).std() * 1.5
+    bb_std = rolling_window_series(series, period).std
+    kc_atr = bb_std * 1.5
     
     squeeze_on = bb_std.iloc[-1] < kc_atr.iloc[-1]
     momentum = series.pct_change(period).iloc[-1] * 100
     
     return momentum if squeeze_on else momentum * 0.5
 
+@memoize_indicator('crypto.z_score')
 def calculate_z_score(series, period=20):
     """Calculate Z-Score for volatility analysis"""
     if len(series) < period:
         return 0
     
-    mean = series.rolling(period).mean().iloc[-1]
-    std = series.rolling(period).std().iloc[-1]
+    window = rolling_window_series(series, period)
+    mean = window.mean.iloc[-1]
+    std = window.std.iloc[-1]
     current = series.iloc[-1]
     
     if std == 0:
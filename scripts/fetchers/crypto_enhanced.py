@@ -7,21 +7,83 @@ import requests
 import pandas as pd
 import numpy as np
 import logging
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 import time
 
+from analysis.indicator_cache import memoize_indicator
+from analysis.ohlcv_kernels import latest_indicators
+from pipeline.universe import load_universe
+from pipeline.deadline import deadline_timeout, out_of_time
+from fetchers.concurrency import get_limiter
+from fetchers.retry import HTTPStatusError, call_with_retry, raise_for_status
+
 logger = logging.getLogger(__name__)
 
 COINGECKO_BASE = "https://api.coingecko.com/api/v3"
-BINANCE_BASE = "https://api.binance.com/api/v3"
+# Binance's public market-data host: the same klines as api.binance.com, which
+# answers HTTP 451 to US IPs (including GitHub-hosted runners)
+BINANCE_BASE = os.getenv('MARKET_BINANCE_BASE', "https://data-api.binance.vision/api/v3")
+
+# Top cryptocurrencies by market cap (universe registry)
+CRYPTO_IDS = load_universe('crypto')
+
+# Set once Binance refuses this region; later coins don't ask again this run
+_binance_blocked = False
+
+def build_price_frame(prices, volumes=None):
+    """DataFrame (timestamp, price[, volume]) from CoinGecko [ms, value] pairs
+    
+    CoinGecko's market_chart only has closes; real high/low bars for ADX and
+    CMF come from fetch_daily_ohlc.
+    """
+    df = pd.DataFrame(prices, columns=['timestamp', 'price'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    if volumes and len(volumes) == len(prices):
+        df['volume'] = [v[1] for v in volumes]
+    return df
 
-# Top cryptocurrencies by market cap
-CRYPTO_IDS = [
-    'bitcoin', 'ethereum', 'tether', 'binancecoin', 'solana', 'ripple',
-    'usd-coin', 'cardano', 'avalanche-2', 'dogecoin', 'polkadot', 'matic-network',
-    'chainlink', 'litecoin', 'bitcoin-cash', 'uniswap', 'stellar', 'monero'
-]
+def fetch_daily_ohlc(symbol, limit=200):
+    """Daily OHLCV bars for SYMBOL/USDT from Binance's public klines
+    
+    Returns:
+        DataFrame (timestamp, open, high, low, price, volume), or None when the
+        pair is not listed or Binance is unreachable
+    """
+    global _binance_blocked
+    if _binance_blocked:
+        return None
+    url = f"{BINANCE_BASE}/klines"
+    params = {'symbol': f"{symbol.upper()}USDT", 'interval': '1d', 'limit': limit}
+    
+    def attempt():
+        with get_limiter('binance').slot() as request:
+            response = requests.get(url, params=params, timeout=deadline_timeout(10))
+            request.status = response.status_code
+        return raise_for_status(response)
+    try:
+        rows = call_with_retry(attempt, attempts=2, label='Binance').json()
+    except HTTPStatusError as e:
+        if e.status in (403, 451):
+            _binance_blocked = True
+            logger.warning(f"Binance refused klines (HTTP {e.status}); ADX/CMF use defaults for this run")
+        else:
+            # 400: no such pair (stablecoins, wrapped tokens)
+            logger.info(f"No Binance klines for {symbol} (HTTP {e.status})")
+        return None
+    except Exception as e:
+        logger.warning(f"Binance klines failed for {symbol}: {e}")
+        return None
+    if not rows:
+        return None
+    df = pd.DataFrame([row[:6] for row in rows],
+                      columns=['timestamp', 'open', 'high', 'low', 'price', 'volume'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    for column in ('open', 'high', 'low', 'price', 'volume'):
+        df[column] = df[column].astype(float)
+    return df
 
+@memoize_indicator('crypto_enhanced.technical_indicators')
 def calculate_technical_indicators(prices_df):
     """Calculate institutional-grade technical indicators"""
     if len(prices_df) < 50:
@@ -59,47 +121,22 @@ def calculate_technical_indicators(prices_df):
     else:
         macd_vs_200ema = "NEUTRAL"
     
-    # ADX (Average Directional Index) - trend strength
-    high = prices_df['high'] if 'high' in prices_df else close
-    low = prices_df['low'] if 'low' in prices_df else close
-    
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(14).mean()
-    
-    plus_dm = high.diff()
-    minus_dm = -low.diff()
-    plus_dm[plus_dm < 0] = 0
-    minus_dm[minus_dm < 0] = 0
-    
-    plus_di = 100 * (plus_dm.rolling(14).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(14).mean() / atr)
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(14).mean()
-    adx_value = float(adx.iloc[-1]) if not pd.isna(adx.iloc[-1]) else 25.0
-    
-    # CMF (Chaikin Money Flow) - volume-weighted indicator
-    if 'volume' in prices_df:
-        volume = prices_df['volume']
-        mfm = ((close - low) - (high - close)) / (high - low)
-        mfm = mfm.fillna(0)
-        mfv = mfm * volume
-        cmf = mfv.rolling(20).sum() / volume.rolling(20).sum()
-        cmf_value = float(cmf.iloc[-1]) if not pd.isna(cmf.iloc[-1]) else 0.0
-    else:
-        cmf_value = 0.0
-    
     return {
         'rsi': rsi_value,
         'macd_vs_200ema': macd_vs_200ema,
         'distance_from_200_ema': distance_from_200_ema,
-        'macd_slope': macd_slope,
-        'adx': adx_value,
-        'cmf': cmf_value
+        'macd_slope': macd_slope
     }
 
+@memoize_indicator('crypto_enhanced.range_indicators')
+def calculate_range_indicators(ohlc_df):
+    """Wilder ADX (trend strength) and Chaikin Money Flow from daily OHLCV bars"""
+    if len(ohlc_df) < 50:
+        return {}
+    values = latest_indicators(ohlc_df['high'].to_numpy(), ohlc_df['low'].to_numpy(),
+                               ohlc_df['price'].to_numpy(), ohlc_df['volume'].to_numpy())
+    return {key: values[key] for key in ('adx', 'cmf') if not np.isnan(values[key])}
+
 def calculate_institutional_score(crypto_data):
     """Calculate institutional-grade composite score (0-100)"""
     score = 50  # Base score
@@ -162,16 +199,124 @@ def get_recommendation(score, rsi, trend):
     else:
         return "STRONG SELL"
 
-def fetch_crypto_data():
-    """Fetch crypto data from CoinGecko with enhanced metrics and retry logic"""
+def score_crypto(crypto_obj):
+    """Set score, recommendation and score_breakdown on a crypto record"""
+    score = calculate_institutional_score(crypto_obj)
+    recommendation = get_recommendation(score, crypto_obj['rsi'], crypto_obj['macd_vs_200ema'])
+    
+    crypto_obj['score'] = score
+    crypto_obj['recommendation'] = recommendation
+    crypto_obj['score_breakdown'] = f"RSI:{crypto_obj['rsi']:.1f} | Trend:{crypto_obj['macd_vs_200ema']} | ADX:{crypto_obj['adx']:.1f} | CMF:{crypto_obj['cmf']:.3f}"
+    return score, recommendation
+
+def history_key(coin_id):
+    """Key for a coin's closes in the shared history cache"""
+    return f"crypto:{coin_id}"
+
+def coingecko_get(url, params, timeout, attempts=3):
+    """GET against CoinGecko through the shared adaptive concurrency limit
+    
+    429/5xx responses and network errors are retried with jittered backoff
+    honouring Retry-After (fetchers.retry); the last response is returned
+    either way so callers can inspect its status.
+    """
+    def attempt():
+        with get_limiter('coingecko').slot() as request:
+            response = requests.get(url, params=params, timeout=deadline_timeout(timeout))
+            request.status = response.status_code
+        return raise_for_status(response)
+    try:
+        return call_with_retry(attempt, attempts=attempts, label='CoinGecko')
+    except HTTPStatusError as e:
+        return e.response
+
+def fetch_simple_prices(ids):
+    """Latest price, 24h change, market cap and volume for many coins in one request"""
+    url = f"{COINGECKO_BASE}/simple/price"
+    params = {
+        'ids': ','.join(ids),
+        'vs_currencies': 'usd',
+        'include_market_cap': 'true',
+        'include_24hr_vol': 'true',
+        'include_24hr_change': 'true',
+        'include_last_updated_at': 'true'
+    }
+    response = coingecko_get(url, params, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def refresh_from_price(crypto_obj, price_info, history=None, indicators=None):
+    """
+    Quotes-only refresh: apply a simple/price entry and recompute the
+    price-derived indicators (RSI, EMA distance, MACD trend/slope) and score.
+    ADX and CMF need volume/range history and are carried forward.
+    
+    Args:
+        crypto_obj: Previously published crypto record (updated in place)
+        price_info: Entry from fetch_simple_prices for this coin
+        history: Cached (timestamps, closes) including the latest price
+        indicators: Streaming indicator snapshot (analysis.indicator_state);
+            used instead of rebuilding indicators from ``history``
+    
+    Returns:
+        True if the record was refreshed
+    """
+    price = price_info.get('usd')
+    if not price:
+        return False
+    
+    crypto_obj['current_price'] = price
+    change_pct = price_info.get('usd_24h_change')
+    if change_pct is not None:
+        crypto_obj['price_change_percentage_24h'] = change_pct
+        crypto_obj['price_change_24h'] = price - price / (1 + change_pct / 100)
+    if price_info.get('usd_market_cap'):
+        crypto_obj['market_cap'] = price_info['usd_market_cap']
+    if price_info.get('usd_24h_vol'):
+        crypto_obj['total_volume'] = price_info['usd_24h_vol']
+    if price_info.get('last_updated_at'):
+        crypto_obj['last_updated'] = datetime.utcfromtimestamp(price_info['last_updated_at']).isoformat()
+    
+    if indicators is None and history is not None and len(history[1]) > 50:
+        timestamps, closes = history
+        df = build_price_frame([[int(t) * 1000, float(c)] for t, c in zip(timestamps, closes)])
+        indicators = calculate_technical_indicators(df)
+    if indicators and indicators.get('bars', 51) > 50:
+        for key in ('rsi', 'macd_vs_200ema', 'distance_from_200_ema', 'macd_slope'):
+            if key in indicators:
+                crypto_obj[key] = indicators[key]
+    
+    score_crypto(crypto_obj)
+    return True
+
+# Fields derived from the price history (see calculate_technical_indicators
+# and calculate_range_indicators)
+INDICATOR_FIELDS = ('rsi', 'macd_vs_200ema', 'distance_from_200_ema', 'macd_slope', 'adx', 'cmf', 'ohlc_source')
+
+def fetch_crypto_data(history_cache=None, ids=None, previous=None):
+    """Fetch crypto data from CoinGecko with enhanced metrics and retry logic
+    
+    Args:
+        history_cache: Optional HistoryCache that receives each coin's daily closes
+        ids: CoinGecko ids to fetch (default: the 'crypto' universe)
+        previous: Last published crypto records; when a coin's history request
+            fails, its previous indicators are reused (marked with
+            ``indicators_stale_since``) instead of neutral defaults
+    """
     logger.info("Fetching cryptocurrency data with rate limit handling...")
+    ids = ids or CRYPTO_IDS
+    previous_by_id = {c['id']: c for c in previous or [] if c.get('id')}
     
     # Split into smaller batches to avoid rate limiting
     batch_size = 5
     all_market_data = []
     
-    for i in range(0, len(CRYPTO_IDS), batch_size):
-        batch = CRYPTO_IDS[i:i + batch_size]
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        
+        if out_of_time():
+            logger.warning(f"Run deadline reached, skipping {len(ids) - i} remaining coins")
+            break
         
         try:
             # Add delay between requests to respect rate limits
@@ -189,17 +334,10 @@ def fetch_crypto_data():
             }
             
             batch_num = i // batch_size + 1
-            total_batches = (len(CRYPTO_IDS) + batch_size - 1) // batch_size
+            total_batches = (len(ids) + batch_size - 1) // batch_size
             logger.info(f"Fetching batch {batch_num}/{total_batches} ({len(batch)} coins)...")
             
-            response = requests.get(url, params=params, timeout=15)
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                logger.warning(f"Rate limited on batch {batch_num}, waiting 10 seconds...")
-                time.sleep(10)
-                response = requests.get(url, params=params, timeout=15)
-            
+            response = coingecko_get(url, params, timeout=15)
             response.raise_for_status()
             batch_data = response.json()
             all_market_data.extend(batch_data)
@@ -226,6 +364,10 @@ def fetch_crypto_data():
     enhanced_data = []
     
     for crypto in all_market_data:
+        # Coins not reached are carried forward from the previous run
+        if out_of_time():
+            logger.warning(f"Run deadline reached, {len(all_market_data) - len(enhanced_data)} coins left unprocessed")
+            break
         try:
             symbol = crypto['symbol'].upper()
             
@@ -239,7 +381,7 @@ def fetch_crypto_data():
             
             indicators = {}
             try:
-                hist_response = requests.get(hist_url, params=hist_params, timeout=15)
+                hist_response = coingecko_get(hist_url, hist_params, timeout=15, attempts=2)
                 
                 if hist_response.status_code == 200:
                     hist_data = hist_response.json()
@@ -248,27 +390,17 @@ def fetch_crypto_data():
                     
                     if prices and len(prices) > 50:
                         # Convert to DataFrame with proper OHLC data
-                        df = pd.DataFrame(prices, columns=['timestamp', 'price'])
-                        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+                        df = build_price_frame(prices, volumes)
+                        if history_cache is not None:
+                            history_cache.put(history_key(crypto['id']),
+                                              [int(p[0]) // 1000 for p in prices], [p[1] for p in prices])
                         
-                        # Create realistic high/low based on price volatility
-                        df['returns'] = df['price'].pct_change()
-                        daily_vol = df['returns'].std()
-                        if daily_vol > 0:
-                            df['high'] = df['price'] * (1 + abs(daily_vol))
-                            df['low'] = df['price'] * (1 - abs(daily_vol))
-                        else:
-                            df['high'] = df['price'] * 1.02
-                            df['low'] = df['price'] * 0.98
-                        
-                        # Add volume data if available
-                        if volumes and len(volumes) == len(prices):
-                            df['volume'] = [v[1] for v in volumes]
-                        else:
-                            df['volume'] = df['price'] * 1000000  # Volume proxy
-                        
-                        # Calculate technical indicators
+                        # Calculate technical indicators; ADX/CMF need real daily ranges
                         indicators = calculate_technical_indicators(df)
+                        ohlc = fetch_daily_ohlc(symbol)
+                        range_indicators = calculate_range_indicators(ohlc) if ohlc is not None else {}
+                        if range_indicators:
+                            indicators = {**indicators, **range_indicators, 'ohlc_source': 'binance'}
                         logger.info(f"✓ Calculated indicators for {symbol}: RSI={indicators.get('rsi', 50):.1f}")
                     else:
                         logger.warning(f"Not enough price data for {symbol} ({len(prices) if prices else 0} points), using defaults")
@@ -279,6 +411,14 @@ def fetch_crypto_data():
             except Exception as e:
                 logger.warning(f"Error fetching historical data for {symbol}: {e}")
             
+            # History failed: last good indicators beat neutral defaults
+            indicators_stale_since = None
+            last_good = previous_by_id.get(crypto['id'])
+            if not indicators and last_good and not last_good.get('indicators_defaulted'):
+                indicators = {field: last_good[field] for field in INDICATOR_FIELDS if field in last_good}
+                indicators_stale_since = last_good.get('indicators_stale_since') or last_good.get('last_updated')
+                logger.info(f"{symbol}: reusing indicators from {indicators_stale_since}")
+            
             # Build crypto data object
             crypto_obj = {
                 'id': crypto['id'],
@@ -307,7 +447,7 @@ def fetch_crypto_data():
                 'atl': crypto.get('atl', crypto['current_price']),
                 'atl_change_percentage': crypto.get('atl_change_percentage', 0),
                 'atl_date': crypto.get('atl_date', ''),
-                'last_updated': crypto.get('last_updated', datetime.now().isoformat()),
+                'last_updated': crypto.get('last_updated', datetime.now(timezone.utc).isoformat()),
                 
                 # Technical indicators
                 'rsi': indicators.get('rsi', 50.0),
@@ -316,16 +456,17 @@ def fetch_crypto_data():
                 'macd_slope': indicators.get('macd_slope', 0),
                 'adx': indicators.get('adx', 25.0),
                 'cmf': indicators.get('cmf', 0.0),
+                # None: no daily OHLCV bars, so ADX/CMF are neutral defaults
+                'ohlc_source': indicators.get('ohlc_source'),
                 'squeeze': None  # Advanced indicator, placeholder
             }
+            if indicators_stale_since:
+                crypto_obj['indicators_stale_since'] = indicators_stale_since
+            elif not indicators:
+                crypto_obj['indicators_defaulted'] = True
             
             # Calculate score and recommendation
-            score = calculate_institutional_score(crypto_obj)
-            recommendation = get_recommendation(score, crypto_obj['rsi'], crypto_obj['macd_vs_200ema'])
-            
-            crypto_obj['score'] = score
-            crypto_obj['recommendation'] = recommendation
-            crypto_obj['score_breakdown'] = f"RSI:{crypto_obj['rsi']:.1f} | Trend:{crypto_obj['macd_vs_200ema']} | ADX:{crypto_obj['adx']:.1f} | CMF:{crypto_obj['cmf']:.3f}"
+            score, recommendation = score_crypto(crypto_obj)
             
             enhanced_data.append(crypto_obj)
             logger.info(f"✓ {symbol}: ${crypto['current_price']:,.2f} | Score: {score} | {recommendation}")
@@ -1,31 +1,162 @@
 """
 Multi-source data aggregator with fallback mechanisms for reliable data fetching.
+
+Sources are tried in order of recent health (success rate, then latency),
+and in hedged mode a slow source does not hold up the rest: if it hasn't
+answered within its observed p90 latency, the next source is started in
+parallel and the first valid answer wins.
+
+Responses are cached (LRU + TTL, negative caching, single-flight; see
+async_cache), so identical requests through the aggregator hit upstream
+once per TTL.
 """
 import logging
 import asyncio
-from typing import Dict, List, Callable, Any, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential
+import time
+from collections import deque
+from typing import Dict, List, Callable, Any, Optional, Tuple
+
+from fetchers.async_cache import AsyncTTLCache
+from fetchers.concurrency import get_limiter
+from fetchers.retry import async_call_with_retry, is_retryable
 
 logger = logging.getLogger(__name__)
 
+LATENCY_WINDOW = 50  # recent calls kept per source
+MIN_SAMPLES = 5  # calls needed before a source's p90 is trusted
+DEFAULT_HEDGE_DELAY = 1.0  # seconds, until the p90 is known
+MIN_HEDGE_DELAY = 0.05
+UNHEALTHY_AFTER = 3  # consecutive failures before a source is tried last
+CHAIN_ATTEMPTS = 2  # whole fallback chain, only when every failure was transient
+
+
+class SourceStats:
+    """Recent latency and outcome history of one source."""
+    
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cancelled = 0
+        self.status = 'unknown'
+    
+    def record(self, ok: bool, latency: float):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+        self.status = 'success' if ok else 'failed'
+    
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    @property
+    def success_rate(self) -> Optional[float]:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else None
+    
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_failures < UNHEALTHY_AFTER
+    
+    def hedge_delay(self) -> float:
+        """How long to wait for this source before starting the next one."""
+        p90 = self.percentile(0.9) if len(self.latencies) >= MIN_SAMPLES else None
+        return max(MIN_HEDGE_DELAY, p90 if p90 is not None else DEFAULT_HEDGE_DELAY)
+    
+    def expected_cost(self) -> float:
+        """Median latency inflated by the failure rate (lower is better)."""
+        median = self.percentile(0.5)
+        rate = self.success_rate
+        if median is None or rate is None:
+            return DEFAULT_HEDGE_DELAY
+        return median / max(rate, 0.1)
+    
+    def to_dict(self) -> Dict:
+        p50, p90 = self.percentile(0.5), self.percentile(0.9)
+        return {
+            'status': self.status,
+            'calls': len(self.outcomes),
+            'success_rate': round(self.success_rate, 3) if self.success_rate is not None else None,
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p90_ms': round(p90 * 1000) if p90 is not None else None,
+            'consecutive_failures': self.consecutive_failures,
+            'cancelled': self.cancelled,
+            'healthy': self.healthy,
+        }
+
 
 class DataAggregator:
-    """Manages multi-source data fetching with automatic fallback."""
+    """
+    Manages multi-source data fetching with automatic fallback.
+    
+    Args:
+        hedge: Start the next source when the current one is slower than its
+            p90 latency, instead of waiting for it to fail
+        adaptive_order: Try the fastest healthy source first rather than in
+            the order given
+        cache: Response cache (default: in-memory AsyncTTLCache)
+    """
+    
+    def __init__(self, hedge: bool = True, adaptive_order: bool = True, cache: Optional[AsyncTTLCache] = None):
+        self.cache = cache if cache is not None else AsyncTTLCache()
+        self.hedge = hedge
+        self.adaptive_order = adaptive_order
+        self.stats: Dict[str, SourceStats] = {}
+        self.source_status: Dict[str, Dict] = {}
     
-    def __init__(self):
-        self.cache = {}
-        self.source_status = {}
+    def _stats(self, name: str) -> SourceStats:
+        if name not in self.stats:
+            self.stats[name] = SourceStats()
+        return self.stats[name]
+    
+    def _record(self, name: str, ok: bool, latency: float):
+        stats = self._stats(name)
+        stats.record(ok, latency)
+        self.source_status[name] = stats.to_dict()
+    
+    def order_sources(self, sources: List[Callable], source_names: List[str]) -> List[Tuple[Callable, str]]:
+        """Healthy sources first, cheapest expected latency first; ties keep the given order."""
+        pairs = list(zip(sources, source_names))
+        if not self.adaptive_order:
+            return pairs
+        return sorted(pairs, key=lambda pair: (not self._stats(pair[1]).healthy,
+                                                self._stats(pair[1]).expected_cost()))
+    
+    async def _call(self, source: Callable, name: str, args, kwargs) -> Tuple[str, Any, Optional[Exception]]:
+        """Run one source, recording its latency and outcome; never raises except on cancel."""
+        start = time.monotonic()
+        try:
+            data = await source(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._stats(name).cancelled += 1
+            self.source_status[name] = self._stats(name).to_dict()
+            raise
+        except Exception as e:
+            logger.warning(f"✗ Failed to fetch from {name}: {e}")
+            self._record(name, False, time.monotonic() - start)
+            return name, None, e
+        self._record(name, bool(data), time.monotonic() - start)
+        return name, data, None
+    
+    @staticmethod
+    def request_key(source_names: List[str], args: Tuple, kwargs: Dict) -> Tuple:
+        """Cache key of a multi-source request: the sources and the call arguments."""
+        return (tuple(source_names), repr(args), repr(sorted(kwargs.items())))
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
     async def fetch_with_fallback(
-        self, 
-        sources: List[Callable], 
+        self,
+        sources: List[Callable],
         source_names: List[str],
-        *args, 
+        *args,
         **kwargs
     ) -> Optional[Any]:
         """
-        Attempt to fetch data from multiple sources with fallback.
+        Attempt to fetch data from multiple sources with fallback, cached.
         
         Args:
             sources: List of async callable functions to fetch data
@@ -35,28 +166,102 @@ class DataAggregator:
         Returns:
             Data from first successful source, or None if all fail
         """
-        for source, name in zip(sources, source_names):
-            try:
+        key = self.request_key(source_names, args, kwargs)
+        return await self.cache.get_or_fetch(
+            key, lambda: self._fetch_uncached(sources, source_names, *args, **kwargs)
+        )
+    
+    async def _fetch_uncached(
+        self, 
+        sources: List[Callable], 
+        source_names: List[str],
+        *args, 
+        **kwargs
+    ) -> Optional[Any]:
+        """fetch_with_fallback without the cache; the chain is retried (fetchers.retry) if every failure was transient."""
+        try:
+            return await async_call_with_retry(self._fetch_chain, sources, source_names, args, kwargs,
+                                               attempts=CHAIN_ATTEMPTS, label='fallback chain')
+        except Exception:
+            logger.error("All data sources failed")
+            return None
+    
+    async def _fetch_chain(self, sources: List[Callable], source_names: List[str], args, kwargs) -> Optional[Any]:
+        """One pass over the sources; raises a representative error if they all failed."""
+        ordered = self.order_sources(sources, source_names)
+        errors: List[Exception] = []
+        if self.hedge:
+            data = await self._fetch_hedged(ordered, args, kwargs, errors)
+        else:
+            data = None
+            for source, name in ordered:
                 logger.info(f"Attempting to fetch from {name}...")
-                data = await source(*args, **kwargs)
-                
+                _, data, error = await self._call(source, name, args, kwargs)
+                if error is not None:
+                    errors.append(error)
                 if data:
                     logger.info(f"✓ Successfully fetched from {name}")
-                    self.source_status[name] = 'success'
-                    return data
-                    
-            except Exception as e:
-                logger.warning(f"✗ Failed to fetch from {name}: {e}")
-                self.source_status[name] = 'failed'
-                continue
+                    break
+        
+        if not data and errors:
+            # Permanent errors win: retrying the chain would not help
+            raise next((e for e in errors if not is_retryable(e)), errors[-1])
+        return data or None
+    
+    async def _fetch_hedged(self, ordered: List[Tuple[Callable, str]], args, kwargs,
+                            errors: List[Exception]) -> Optional[Any]:
+        """
+        Start sources one by one, each as soon as the previous one fails or
+        outlives its p90 latency; return the first valid result and cancel
+        the others.
+        """
+        if not ordered:
+            return None
+        pending = set()
+        queue = list(ordered)
+        current: Optional[str] = None
+        
+        def launch():
+            nonlocal current
+            source, current = queue.pop(0)
+            logger.info(f"Attempting to fetch from {current}...")
+            pending.add(asyncio.ensure_future(self._call(source, current, args, kwargs)))
         
-        logger.error("All data sources failed")
-        return None
+        launch()
+        try:
+            while pending:
+                # Wait for an answer, or until the newest source is slower than usual
+                delay = self._stats(current).hedge_delay() if queue else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"{current} slower than its p90, hedging with {queue[0][1]}")
+                    launch()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    name, data, error = task.result()
+                    if error is not None:
+                        errors.append(error)
+                    if data:
+                        logger.info(f"✓ Successfully fetched from {name}")
+                        return data
+                # A source failed: fall back to the next one immediately
+                if queue:
+                    launch()
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
     
     async def fetch_concurrent(
         self, 
         fetch_funcs: List[Callable],
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        keys: Optional[List[Any]] = None,
+        ttl: Optional[float] = None,
+        upstream: Optional[str] = None
     ) -> List[Any]:
         """
         Execute multiple fetch operations concurrently with rate limiting.
@@ -64,21 +269,32 @@ class DataAggregator:
         Args:
             fetch_funcs: List of async functions to execute
             max_concurrent: Maximum number of concurrent requests
+            keys: Cache key per function (None entries are not cached)
+            ttl: Cache lifetime of successful results (default: the cache's ttl)
+            upstream: Share that upstream's adaptive limit (fetchers.concurrency)
+                instead of a fixed ``max_concurrent``
         
         Returns:
             List of results from all functions
         """
+        limiter = get_limiter(upstream) if upstream else None
         semaphore = asyncio.Semaphore(max_concurrent)
         
         async def limited_fetch(func):
-            async with semaphore:
-                try:
+            try:
+                async with (limiter.async_slot() if limiter else semaphore):
                     return await func()
-                except Exception as e:
-                    logger.error(f"Error in concurrent fetch: {e}")
-                    return None
+            except Exception as e:
+                logger.error(f"Error in concurrent fetch: {e}")
+                return None
+        
+        async def cached_fetch(func, key):
+            if key is None:
+                return await limited_fetch(func)
+            # Cache hits and coalesced duplicates don't take a semaphore slot
+            return await self.cache.get_or_fetch(key, lambda: limited_fetch(func), ttl=ttl)
         
-        tasks = [limited_fetch(func) for func in fetch_funcs]
+        tasks = [cached_fetch(func, key) for func, key in zip(fetch_funcs, keys or [None] * len(fetch_funcs))]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Filter out exceptions and None values
@@ -0,0 +1,107 @@
+"""
+Fast published-date normalization for RSS/Atom entries and news APIs.
+
+Everything is normalised to UTC epoch seconds (int) so sorting and windowing
+are numeric. Resolution order, cheapest first:
+  1. feedparser's pre-parsed ``*_parsed`` struct_time (already UTC)
+  2. ISO 8601 via ``datetime.fromisoformat``
+  3. RFC 822 via ``email.utils.parsedate_tz``
+  4. ``dateutil`` as a last resort for odd formats
+"""
+import calendar
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_tz, mktime_tz
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_date_parser = None
+
+
+def _parse_with_dateutil(value: str) -> Optional[datetime]:
+    """Slow heuristic fallback, imported lazily."""
+    global _date_parser
+    if _date_parser is None:
+        from dateutil import parser as date_parser
+        _date_parser = date_parser
+    try:
+        return _date_parser.parse(value)
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def _to_epoch(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def parse_date_to_epoch(value: Any) -> Optional[int]:
+    """
+    Convert a date value to UTC epoch seconds.
+
+    Args:
+        value: struct_time, datetime, epoch number or date string
+
+    Returns:
+        Epoch seconds, or None if the value cannot be parsed
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return _to_epoch(value)
+    if hasattr(value, 'tm_year'):
+        return calendar.timegm(value)
+
+    text = str(value).strip()
+    if not text:
+        return None
+
+    # ISO 8601 ("2025-12-01T06:39:44Z", "2025-12-01 06:39:44+05:30")
+    if text[0].isdigit():
+        try:
+            return _to_epoch(datetime.fromisoformat(text))
+        except ValueError:
+            pass
+
+    # RFC 822 ("Mon, 01 Dec 2025 06:39:44 GMT", "01 Dec 2025 12:09:44 +0530")
+    parsed = parsedate_tz(text)
+    if parsed is not None:
+        try:
+            return mktime_tz(parsed)
+        except (OverflowError, ValueError):
+            pass
+
+    dt = _parse_with_dateutil(text)
+    if dt is not None:
+        return _to_epoch(dt)
+
+    logger.debug(f"Unparseable date: {text!r}")
+    return None
+
+
+def entry_timestamp(entry: Any) -> Optional[int]:
+    """Best published timestamp for a feedparser entry (or plain dict)."""
+    get = entry.get if hasattr(entry, 'get') else lambda key, default=None: getattr(entry, key, default)
+
+    for key in ('published_parsed', 'updated_parsed', 'created_parsed'):
+        parsed = get(key)
+        if parsed:
+            return calendar.timegm(parsed)
+
+    for key in ('published', 'updated', 'created', 'publishedAt'):
+        ts = parse_date_to_epoch(get(key))
+        if ts is not None:
+            return ts
+
+    return None
+
+
+def epoch_to_iso(ts: Optional[int]) -> Optional[str]:
+    """UTC ISO 8601 string for an epoch timestamp."""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
@@ -0,0 +1,105 @@
+"""
+Compact on-disk cache of daily close histories (NumPy .npz).
+
+Full runs store the histories they already download; quotes-only runs append
+the latest price as today's bar and recompute price-derived fields without
+refetching any history.
+"""
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from pipeline.market_calendar import market_of, session_day
+from pipeline.publish import atomic_file
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+DEFAULT_PATH = os.path.join(DATA_DIR, 'price_history.npz')
+MAX_BARS = 400
+
+History = Tuple[np.ndarray, np.ndarray]
+
+
+class HistoryCache:
+    """Per-symbol (timestamps, closes) arrays keyed by symbol."""
+
+    def __init__(self, path: Optional[str] = None, max_bars: int = MAX_BARS):
+        self.path = path or DEFAULT_PATH
+        self.max_bars = max_bars
+        self.series: Dict[str, History] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                for key in data.files:
+                    symbol, field = key.rsplit('|', 1)
+                    if field == 't':
+                        self.series[symbol] = (data[key], data[f"{symbol}|c"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"History cache unreadable, starting empty: {e}")
+            self.series = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.series
+
+    def __len__(self):
+        return len(self.series)
+
+    def get(self, symbol: str) -> Optional[History]:
+        return self.series.get(symbol)
+
+    def put(self, symbol: str, timestamps, closes):
+        """Replace a symbol's history (timestamps in epoch seconds, ascending)."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)[-self.max_bars:]
+        closes = np.asarray(closes, dtype=np.float64)[-self.max_bars:]
+        self.series[symbol] = (timestamps, closes)
+        self.dirty = True
+
+    def append_price(self, symbol: str, price: float, ts: Optional[int] = None) -> Optional[History]:
+        """
+        Record ``price`` as the latest bar: replaces the last bar if it falls on
+        the same exchange-local day (pipeline.market_calendar.session_day),
+        otherwise appends a new one.
+
+        Returns:
+            Updated (timestamps, closes), or None if the symbol has no history
+        """
+        history = self.series.get(symbol)
+        if history is None:
+            return None
+        ts = int(ts or time.time())
+        timestamps, closes = history
+        tz = market_of(symbol).tz
+        if len(timestamps) and session_day(timestamps[-1], tz) == session_day(ts, tz):
+            closes = closes.copy()
+            closes[-1] = price
+            timestamps = timestamps.copy()
+            timestamps[-1] = ts
+        else:
+            timestamps = np.append(timestamps, ts)[-self.max_bars:]
+            closes = np.append(closes, price)[-self.max_bars:]
+        self.series[symbol] = (timestamps, closes)
+        self.dirty = True
+        return timestamps, closes
+
+    def save(self):
+        if not self.dirty:
+            return
+        arrays = {}
+        for symbol, (timestamps, closes) in self.series.items():
+            arrays[f"{symbol}|t"] = timestamps
+            arrays[f"{symbol}|c"] = closes
+        try:
+            with atomic_file(self.path, 'wb') as f:
+                np.savez(f, **arrays)
+            self.dirty = False
+        except OSError as e:
+            logger.warning(f"Could not save history cache: {e}")
@@ -4,10 +4,13 @@ Async news fetcher with parallel RSS feed parsing for diverse content.
 import feedparser
 import logging
 import asyncio
-from datetime import datetime
-from dateutil import parser as date_parser
 from typing import List, Dict
 
+try:
+    from fetchers.feed_dates import entry_timestamp, epoch_to_iso
+except ImportError:
+    from feed_dates import entry_timestamp, epoch_to_iso
+
 RSS_FEEDS = {
     "Markets": [
         "https://search.cnbc.com/rs/search/combinedcms/view.xml?partnerId=wrss01&id=10000664",  # CNBC Business
@@ -109,24 +112,15 @@ async def fetch_single_feed(url: str, category: str, max_articles: int = 3) -> L
             elif hasattr(entry, 'description'):
                 summary = entry.description[:200]
             
-            # Parse published date
-            published = datetime.now().isoformat()
-            if hasattr(entry, 'published'):
-                try:
-                    published = date_parser.parse(entry.published).isoformat()
-                except:
-                    published = entry.published
-            elif hasattr(entry, 'updated'):
-                try:
-                    published = date_parser.parse(entry.updated).isoformat()
-                except:
-                    published = entry.updated
+            # Normalise published date to UTC epoch (None if the feed has no date)
+            published_ts = entry_timestamp(entry)
             
             articles.append({
                 "title": title,
                 "link": entry.link,
                 "source": feed.feed.get('title', category) if hasattr(feed, 'feed') else category,
-                "published": published,
+                "published": epoch_to_iso(published_ts),
+                "published_ts": published_ts,
                 "summary": summary,
                 "category": category,
                 "image": image
@@ -191,11 +185,8 @@ async def fetch_news_async(limit: int = 50) -> List[Dict]:
                 seen_titles.add(title)
                 all_news.append(article)
     
-    # Sort by published date (newest first)
-    try:
-        all_news.sort(key=lambda x: x['published'], reverse=True)
-    except:
-        pass  # If sorting fails, use as-is
+    # Sort by published date (newest first, undated last)
+    all_news.sort(key=lambda x: x['published_ts'] or 0, reverse=True)
     
     logging.info(f"Fetched {len(all_news)} total news articles")
     return all_news[:limit]
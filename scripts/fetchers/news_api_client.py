@@ -0,0 +1,181 @@
+"""
+Quota-aware client for the free NewsAPI.org / GNews.io tiers (100 requests/day each).
+
+Every request goes through:
+  - a persisted per-key daily quota ledger (UTC day),
+  - a response cache with TTL, so reruns within the TTL cost nothing,
+  - a pacing check that spreads the daily budget across the day instead of
+    burning it in the first few runs.
+When a request is not allowed (quota exhausted, ahead of pace, HTTP error,
+429) the last cached response is served, however old. The client never
+raises into the pipeline.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import requests
+
+from pipeline.deadline import deadline_timeout
+from pipeline.publish import write_json_atomic
+from fetchers.concurrency import get_limiter
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+LEDGER_PATH = os.path.join(DATA_DIR, 'news_api_quota.json')
+CACHE_PATH = os.path.join(DATA_DIR, 'news_api_cache.json')
+
+DAILY_LIMITS = {
+    'newsapi': 100,
+    'gnews': 100,
+}
+CACHE_TTL = 3 * 3600  # seconds
+PACE_BURST = 10  # requests allowed ahead of an even spread across the day
+CACHE_MAX_AGE = 2 * 86400  # drop cached responses older than this
+
+
+def _utc_today() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def _day_fraction_elapsed() -> float:
+    now = datetime.now(timezone.utc)
+    return (now.hour * 3600 + now.minute * 60 + now.second + 1) / 86400
+
+
+def _load_json(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class NewsApiClient:
+    """Cached, quota-accounted GET for keyed news APIs."""
+
+    def __init__(
+        self,
+        ledger_path: str = LEDGER_PATH,
+        cache_path: str = CACHE_PATH,
+        ttl: int = CACHE_TTL,
+        daily_limits: Optional[Dict[str, int]] = None
+    ):
+        self.ledger_path = ledger_path
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.daily_limits = daily_limits or DAILY_LIMITS
+        self.ledger = _load_json(ledger_path)
+        self.cache = _load_json(cache_path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ledger_key(provider: str, api_key: str) -> str:
+        return f"{provider}:{hashlib.sha1(api_key.encode()).hexdigest()[:10]}"
+
+    @staticmethod
+    def _cache_key(provider: str, url: str, params: Dict) -> str:
+        payload = json.dumps([provider, url, sorted(params.items())], default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _entry(self, ledger_key: str) -> Dict:
+        """Ledger entry for today, reset at UTC midnight."""
+        today = _utc_today()
+        entry = self.ledger.get(ledger_key)
+        if not entry or entry.get('date') != today:
+            entry = {'date': today, 'used': 0, 'exhausted': False}
+            self.ledger[ledger_key] = entry
+        return entry
+
+    def remaining(self, provider: str, api_key: str) -> int:
+        """Requests left today for this key."""
+        with self._lock:
+            entry = self._entry(self._ledger_key(provider, api_key))
+            if entry['exhausted']:
+                return 0
+            return max(0, self.daily_limits.get(provider, 100) - entry['used'])
+
+    def _may_request(self, provider: str, entry: Dict) -> bool:
+        limit = self.daily_limits.get(provider, 100)
+        if entry['exhausted'] or entry['used'] >= limit:
+            return False
+        # Even spread across the day plus a small burst allowance
+        paced = math.ceil(limit * _day_fraction_elapsed()) + PACE_BURST
+        return entry['used'] < paced
+
+    def get(self, provider: str, api_key: str, url: str, params: Dict, timeout: int = 10) -> Optional[Dict]:
+        """
+        Fetch a JSON response, preferring cache and respecting the daily budget.
+
+        Args:
+            provider: Provider name ('newsapi' or 'gnews')
+            api_key: API key (used for the ledger, sent by the caller inside params)
+            url: Endpoint URL
+            params: Query parameters including the key
+            timeout: Request timeout in seconds
+
+        Returns:
+            Decoded JSON, the last cached response if a request is not possible,
+            or None if nothing is available
+        """
+        cache_params = {k: v for k, v in params.items() if v != api_key}
+        cache_key = self._cache_key(provider, url, cache_params)
+        ledger_key = self._ledger_key(provider, api_key)
+        now = time.time()
+
+        with self._lock:
+            cached = self.cache.get(cache_key)
+            if cached and now - cached['ts'] < self.ttl:
+                logger.info(f"{provider}: cache hit ({int(now - cached['ts'])}s old)")
+                return cached['data']
+
+            entry = self._entry(ledger_key)
+            if not self._may_request(provider, entry):
+                logger.info(f"{provider}: budget held ({entry['used']} used today), serving cache")
+                return cached['data'] if cached else None
+            # Reserve before the request so concurrent callers see it
+            entry['used'] += 1
+
+        try:
+            with get_limiter('news').slot() as request:
+                response = requests.get(url, params=params, timeout=deadline_timeout(timeout))
+                request.status = response.status_code
+        except requests.RequestException as e:
+            logger.warning(f"{provider}: request failed ({e}), serving cache")
+            return cached['data'] if cached else None
+
+        if response.status_code == 429:
+            with self._lock:
+                entry['exhausted'] = True
+            logger.warning(f"{provider}: quota exhausted upstream, serving cache")
+            return cached['data'] if cached else None
+        if response.status_code != 200:
+            logger.warning(f"{provider}: HTTP {response.status_code}, serving cache")
+            return cached['data'] if cached else None
+
+        try:
+            data = response.json()
+        except ValueError:
+            return cached['data'] if cached else None
+
+        with self._lock:
+            self.cache[cache_key] = {'ts': now, 'data': data}
+        return data
+
+    def save(self):
+        """Persist the ledger and cache (expired cache entries are pruned)."""
+        with self._lock:
+            cutoff = time.time() - CACHE_MAX_AGE
+            self.cache = {k: v for k, v in self.cache.items() if v['ts'] >= cutoff}
+            try:
+                write_json_atomic(self.ledger_path, self.ledger)
+                write_json_atomic(self.cache_path, self.cache)
+            except OSError as e:
+                logger.warning(f"Could not persist news API state: {e}")
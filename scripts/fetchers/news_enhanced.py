@@ -2,11 +2,20 @@
 Enhanced News Fetcher using only free/open-source APIs
 Sources: NewsAPI (free tier), GNews, RSS feeds from major outlets
 """
-import requests
 import feedparser
 import logging
-from datetime import datetime, timedelta
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from fetchers.article_store import ArticleStore
+    from fetchers.feed_dates import entry_timestamp, parse_date_to_epoch, epoch_to_iso
+    from fetchers.news_api_client import NewsApiClient
+except ImportError:
+    from article_store import ArticleStore
+    from feed_dates import entry_timestamp, parse_date_to_epoch, epoch_to_iso
+    from news_api_client import NewsApiClient
+from pipeline.deadline import out_of_time
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +23,19 @@ logger = logging.getLogger(__name__)
 NEWSAPI_KEY = os.getenv('NEWSAPI_KEY', '')  # newsapi.org - free 100 requests/day
 GNEWS_KEY = os.getenv('GNEWS_KEY', '')  # gnews.io - free 100 requests/day
 
+# Articles in the output: the 100 most recent, as before the article store.
+# MARKET_NEWS_PER_CATEGORY=N takes the newest N of each category instead
+# (still capped at NEWS_LIMIT) so busy categories cannot crowd out quiet ones.
+NEWS_LIMIT = 100
+NEWS_PER_CATEGORY = int(os.getenv('MARKET_NEWS_PER_CATEGORY', '0')) or None
+
+# Keyed API queries per category (each costs one request from the daily quota)
+API_QUERIES = {
+    'AI': 'artificial intelligence OR machine learning',
+    'Cryptocurrency': 'bitcoin OR ethereum OR cryptocurrency',
+    'Technology': 'technology OR tech',
+}
+
 # Free RSS feeds (no API key needed)
 RSS_FEEDS = {
     'World Markets': [
@@ -55,16 +77,8 @@ def fetch_from_rss(feed_url, category):
         
         for entry in feed.entries[:10]:  # Limit to 10 per feed
             try:
-                # Parse published date
-                published = entry.get('published', entry.get('updated', ''))
-                if published:
-                    try:
-                        pub_date = datetime(*entry.published_parsed[:6])
-                        published = pub_date.isoformat()
-                    except:
-                        published = datetime.now().isoformat()
-                else:
-                    published = datetime.now().isoformat()
+                # Normalise published date to UTC epoch (None if the feed has no date)
+                published_ts = entry_timestamp(entry)
                 
                 # Get image
                 image = None
@@ -93,7 +107,8 @@ def fetch_from_rss(feed_url, category):
                     'title': entry.get('title', 'No Title'),
                     'link': entry.get('link', '#'),
                     'source': feed.feed.get('title', 'Unknown'),
-                    'published': published,
+                    'published': epoch_to_iso(published_ts),
+                    'published_ts': published_ts,
                     'summary': entry.get('summary', entry.get('description', ''))[:200],
                     'category': category,
                     'image': image
@@ -108,11 +123,13 @@ def fetch_from_rss(feed_url, category):
         logger.warning(f"Error fetching RSS feed {feed_url}: {e}")
         return []
 
-def fetch_from_newsapi(query, category):
-    """Fetch news from NewsAPI.org (free tier)"""
+def fetch_from_newsapi(query, category, client=None):
+    """Fetch news from NewsAPI.org (free tier, quota-aware and cached)"""
     if not NEWSAPI_KEY:
         return []
     
+    owns_client = client is None
+    client = client or NewsApiClient()
     try:
         url = "https://newsapi.org/v2/everything"
         params = {
@@ -123,18 +140,19 @@ def fetch_from_newsapi(query, category):
             'pageSize': 10
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        data = client.get('newsapi', NEWSAPI_KEY, url, params)
+        if data:
             articles = []
             
             for item in data.get('articles', []):
+                published_ts = parse_date_to_epoch(item.get('publishedAt'))
                 article = {
                     'title': item.get('title', 'No Title'),
                     'link': item.get('url', '#'),
                     'source': item.get('source', {}).get('name', 'Unknown'),
-                    'published': item.get('publishedAt', datetime.now().isoformat()),
-                    'summary': item.get('description', '')[:200],
+                    'published': epoch_to_iso(published_ts),
+                    'published_ts': published_ts,
+                    'summary': (item.get('description') or '')[:200],
                     'category': category,
                     'image': item.get('urlToImage', 'https://images.unsplash.com/photo-1504711434969-e33886168f5c?w=800')
                 }
@@ -143,14 +161,19 @@ def fetch_from_newsapi(query, category):
             return articles
     except Exception as e:
         logger.warning(f"Error fetching from NewsAPI: {e}")
+    finally:
+        if owns_client:
+            client.save()
     
     return []
 
-def fetch_from_gnews(query, category):
-    """Fetch news from GNews.io (free tier)"""
+def fetch_from_gnews(query, category, client=None):
+    """Fetch news from GNews.io (free tier, quota-aware and cached)"""
     if not GNEWS_KEY:
         return []
     
+    owns_client = client is None
+    client = client or NewsApiClient()
     try:
         url = "https://gnews.io/api/v4/search"
         params = {
@@ -160,18 +183,19 @@ def fetch_from_gnews(query, category):
             'max': 10
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        data = client.get('gnews', GNEWS_KEY, url, params)
+        if data:
             articles = []
             
             for item in data.get('articles', []):
+                published_ts = parse_date_to_epoch(item.get('publishedAt'))
                 article = {
                     'title': item.get('title', 'No Title'),
                     'link': item.get('url', '#'),
                     'source': item.get('source', {}).get('name', 'Unknown'),
-                    'published': item.get('publishedAt', datetime.now().isoformat()),
-                    'summary': item.get('description', '')[:200],
+                    'published': epoch_to_iso(published_ts),
+                    'published_ts': published_ts,
+                    'summary': (item.get('description') or '')[:200],
                     'category': category,
                     'image': item.get('image', 'https://images.unsplash.com/photo-1504711434969-e33886168f5c?w=800')
                 }
@@ -180,35 +204,55 @@ def fetch_from_gnews(query, category):
             return articles
     except Exception as e:
         logger.warning(f"Error fetching from GNews: {e}")
+    finally:
+        if owns_client:
+            client.save()
     
     return []
 
-def fetch_news():
-    """Main function to fetch news from all sources"""
+def fetch_news(limit=NEWS_LIMIT, per_category=NEWS_PER_CATEGORY, store_path=None):
+    """
+    Main function to fetch news from all sources.
+    
+    Fresh articles are ingested into the persistent article store and the
+    result is read from the store's rolling window: the ``limit`` most recent
+    articles, or with ``per_category`` the newest ``per_category`` of each
+    category (at most ``limit`` in total). Falls back to the fresh snapshot
+    if the store is unavailable.
+    """
     logger.info("Fetching news from multiple sources...")
     all_articles = []
     
     # Fetch from RSS feeds (free, no API key needed)
     for category, feeds in RSS_FEEDS.items():
         for feed_url in feeds:
+            # feedparser has no timeout; don't start feeds past the run deadline
+            if out_of_time():
+                logger.warning(f"Run deadline reached, skipping {feed_url}")
+                continue
             articles = fetch_from_rss(feed_url, category)
             all_articles.extend(articles)
             logger.info(f"✓ {category}: {len(articles)} articles from RSS")
     
-    # Optionally fetch from NewsAPI if key is available
-    if NEWSAPI_KEY:
-        api_queries = {
-            'AI': 'artificial intelligence OR machine learning',
-            'Cryptocurrency': 'bitcoin OR ethereum OR cryptocurrency',
-            'Technology': 'technology OR tech',
-        }
-        for category, query in api_queries.items():
-            articles = fetch_from_newsapi(query, category)
-            all_articles.extend(articles)
-            logger.info(f"✓ {category}: {len(articles)} articles from NewsAPI")
+    # Optionally fetch from keyed APIs, all category queries concurrently.
+    # The client serves cached responses once the daily quota is spent.
+    api_sources = [(name, func) for name, func, key in (
+        ('NewsAPI', fetch_from_newsapi, NEWSAPI_KEY),
+        ('GNews', fetch_from_gnews, GNEWS_KEY),
+    ) if key]
+    if api_sources:
+        client = NewsApiClient()
+        jobs = [(name, func, category, query) for name, func in api_sources
+                for category, query in API_QUERIES.items()]
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            results = executor.map(lambda job: job[1](job[3], job[2], client), jobs)
+            for (name, _, category, _), articles in zip(jobs, results):
+                all_articles.extend(articles)
+                logger.info(f"✓ {category}: {len(articles)} articles from {name}")
+        client.save()
     
     # Sort by published date (most recent first)
-    all_articles.sort(key=lambda x: x['published'], reverse=True)
+    all_articles.sort(key=lambda x: x['published_ts'] or 0, reverse=True)
     
     # Remove duplicates by title
     seen_titles = set()
@@ -220,7 +264,21 @@ def fetch_news():
             unique_articles.append(article)
     
     logger.info(f"Total unique articles: {len(unique_articles)}")
-    return unique_articles[:100]  # Limit to 100 most recent
+    
+    try:
+        with ArticleStore(store_path) as store:
+            store.ingest(unique_articles)
+            store.evict()
+            if per_category:
+                articles = store.latest_per_category(per_category)[:limit]
+            else:
+                articles = store.latest(limit)
+        logger.info(f"Serving {len(articles)} articles from store" +
+                    (f" ({per_category} per category)" if per_category else ''))
+        return articles
+    except Exception as e:
+        logger.warning(f"Article store unavailable, using fresh snapshot: {e}")
+        return unique_articles[:limit]  # Most recent first
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,239 @@
+"""
+Shared retry policy for upstream requests.
+
+- Errors are classified: network errors, timeouts and HTTP 408/425/429/5xx
+  are retryable; other 4xx, parse errors and anything unrecognised are
+  permanent and raised at once.
+- Waits use decorrelated jitter (each delay is drawn between ``base`` and
+  3x the previous one, capped), or the server's ``Retry-After`` if longer;
+  a Retry-After beyond MAX_RETRY_AFTER gives up instead of sleeping on it.
+- A run-wide retry budget caps retries at RETRY_RATIO of first attempts
+  (plus MIN_RETRIES), so a degraded upstream adds at most ~20% extra load
+  instead of a retry storm.
+- No retry is scheduled past the run deadline (pipeline.deadline).
+
+Usage:
+    response = call_with_retry(requests.get, url, timeout=10, label='coingecko')
+    payload = await async_call_with_retry(fetch_json, url, label='yahoo')
+"""
+import asyncio
+import email.utils
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
+import requests
+
+from pipeline.deadline import current_deadline
+from fetchers.concurrency import is_throttle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ATTEMPTS = 3
+BASE_DELAY = 0.5  # seconds
+MAX_DELAY = 10.0
+MAX_RETRY_AFTER = 60.0  # longest server-requested wait honoured, in seconds
+RETRY_RATIO = 0.2  # retries allowed per first attempt, run-wide
+MIN_RETRIES = 10  # small runs may always retry this many times
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class HTTPStatusError(Exception):
+    """Non-success HTTP status, with the server's Retry-After (seconds) if given."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None, url: str = '', response: Any = None):
+        super().__init__(f"HTTP {status}" + (f" from {url}" if url else ''))
+        self.status = status
+        self.retry_after = retry_after
+        self.response = response
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header (delta seconds or HTTP date) as seconds from now."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_status(status: int, headers: Optional[Dict] = None, url: str = ''):
+    """Raise HTTPStatusError for a 4xx/5xx status."""
+    if status >= 400:
+        raise HTTPStatusError(status, parse_retry_after((headers or {}).get('Retry-After')), url)
+
+
+def raise_for_status(response: requests.Response) -> requests.Response:
+    """check_status for a requests Response (attached to the error); returns it for chaining."""
+    try:
+        check_status(response.status_code, response.headers, response.url)
+    except HTTPStatusError as e:
+        e.response = response
+        raise
+    return response
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether retrying could help: transient network/server errors yes, bad requests or data no."""
+    if isinstance(error, HTTPStatusError):
+        return error.status in RETRYABLE_STATUS
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRYABLE_STATUS
+    # Parse/programming errors (JSONDecodeError is a ValueError)
+    if isinstance(error, (ValueError, KeyError, TypeError, IndexError, AttributeError)):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError, requests.ConnectionError, requests.Timeout,
+                          aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return True
+    name = type(error).__name__
+    return 'Timeout' in name or 'Connection' in name or is_throttle(error)
+
+
+class RetryBudget:
+    """Run-wide cap on retries relative to first attempts."""
+
+    def __init__(self, ratio: float = RETRY_RATIO, minimum: int = MIN_RETRIES):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.attempts = 0
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_attempt(self):
+        with self._lock:
+            self.attempts += 1
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.retries < self.minimum + self.ratio * self.attempts:
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'attempts': self.attempts, 'retries': self.retries, 'denied': self.denied}
+
+
+_budget = RetryBudget()
+
+
+def get_retry_budget() -> RetryBudget:
+    return _budget
+
+
+def reset_retry_budget(ratio: float = RETRY_RATIO, minimum: int = MIN_RETRIES):
+    """Start a fresh budget (once per run)."""
+    global _budget
+    _budget = RetryBudget(ratio, minimum)
+
+
+class Backoff:
+    """Decorrelated-jitter delays: uniform(base, 3 * previous), capped."""
+
+    def __init__(self, base: float = BASE_DELAY, cap: float = MAX_DELAY, max_wait: float = MAX_RETRY_AFTER):
+        self.base = base
+        self.cap = cap
+        self.max_wait = max(cap, max_wait)
+        self.previous = base
+
+    def next(self, retry_after: Optional[float] = None) -> Optional[float]:
+        """Delay before the next attempt; None if the server asks for more than ``max_wait``."""
+        self.previous = min(self.cap, random.uniform(self.base, self.previous * 3))
+        if retry_after is not None and retry_after > self.max_wait:
+            return None
+        return max(self.previous, retry_after or 0.0)
+
+
+def _retry_delay(error: Exception, attempt: int, attempts: int, backoff: Backoff, label: str) -> Optional[float]:
+    """Seconds to wait before the next attempt, or None to give up."""
+    if attempt >= attempts or not is_retryable(error):
+        return None
+    retry_after = getattr(error, 'retry_after', None)
+    delay = backoff.next(retry_after)
+    if delay is None:
+        logger.warning(f"{label}: server asked to retry in {retry_after:.0f}s, not retrying ({error})")
+        return None
+    deadline = current_deadline()
+    if deadline and delay >= deadline.remaining(deadline.reserve):
+        logger.info(f"{label}: not retrying, {delay:.1f}s wait would pass the run deadline")
+        return None
+    if not _budget.try_spend():
+        logger.warning(f"{label}: retry budget exhausted, not retrying ({error})")
+        return None
+    logger.info(f"{label}: attempt {attempt}/{attempts} failed ({error}), retrying in {delay:.1f}s")
+    return delay
+
+
+def call_with_retry(func: Callable, *args, attempts: int = DEFAULT_ATTEMPTS, base: float = BASE_DELAY,
+                    cap: float = MAX_DELAY, label: str = 'request', **kwargs) -> Any:
+    """
+    Call ``func(*args, **kwargs)``, retrying retryable errors.
+
+    Args:
+        func: Blocking callable making the request
+        attempts: Maximum attempts, including the first
+        base: Minimum backoff delay in seconds
+        cap: Maximum backoff delay in seconds
+        label: Name used in logs
+
+    Returns:
+        ``func``'s result; the last error is raised if every attempt fails
+    """
+    backoff = Backoff(base, cap)
+    _budget.record_attempt()
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            delay = _retry_delay(e, attempt, attempts, backoff, label)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+async def async_call_with_retry(func: Callable, *args, attempts: int = DEFAULT_ATTEMPTS, base: float = BASE_DELAY,
+                                cap: float = MAX_DELAY, label: str = 'request', **kwargs) -> Any:
+    """call_with_retry for coroutine functions."""
+    backoff = Backoff(base, cap)
+    _budget.record_attempt()
+    for attempt in range(1, attempts + 1):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            delay = _retry_delay(e, attempt, attempts, backoff, label)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+
+def with_retry(attempts: int = DEFAULT_ATTEMPTS, base: float = BASE_DELAY, cap: float = MAX_DELAY,
+               label: Optional[str] = None):
+    """Decorator form of call_with_retry / async_call_with_retry."""
+    def decorator(func):
+        options = dict(attempts=attempts, base=base, cap=cap, label=label or func.__name__)
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await async_call_with_retry(func, *args, **options, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return call_with_retry(func, *args, **options, **kwargs)
+        return wrapper
+    return decorator
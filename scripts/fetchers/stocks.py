@@ -2,25 +2,15 @@ import yfinance as yf
 import pandas as pd
 import logging
 
+from pipeline.universe import load_universe
+from fetchers.ticker_context import count_upstream_call, get_context
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-NIFTY_50_TICKERS = [
-    "ADANIENT.NS", "ADANIPORTS.NS", "APOLLOHOSP.NS", "ASIANPAINT.NS", "AXISBANK.NS",
-    "BAJAJ-AUTO.NS", "BAJFINANCE.NS", "BAJAJFINSV.NS", "BPCL.NS", "BHARTIARTL.NS",
-    "BRITANNIA.NS", "CIPLA.NS", "COALINDIA.NS", "DIVISLAB.NS", "DRREDDY.NS",
-    "EICHERMOT.NS", "GRASIM.NS", "HCLTECH.NS", "HDFCBANK.NS", "HDFCLIFE.NS",
-    "HEROMOTOCO.NS", "HINDALCO.NS", "HINDUNILVR.NS", "ICICIBANK.NS", "ITC.NS",
-    "INDUSINDBK.NS", "INFY.NS", "JSWSTEEL.NS", "KOTAKBANK.NS", "LT.NS",
-    "LTIM.NS", "M&M.NS", "MARUTI.NS", "NESTLEIND.NS", "NTPC.NS",
-    "ONGC.NS", "POWERGRID.NS", "RELIANCE.NS", "SBILIFE.NS", "SBIN.NS",
-    "SUNPHARMA.NS", "TCS.NS", "TATACONSUM.NS", "TATAMOTORS.NS", "TATASTEEL.NS",
-    "TECHM.NS", "TITAN.NS", "ULTRACEMCO.NS", "UPL.NS", "WIPRO.NS"
-]
-
-US_TICKERS = [
-    "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "META", "BRK-B", "V", "JNJ"
-]
+# Constituents come from the universe registry (scripts/universes/*.csv)
+NIFTY_50_TICKERS = load_universe('nifty_core')
+US_TICKERS = load_universe('us_core')
 
 def fetch_stock_data(tickers, period="1y"):
     """
@@ -32,18 +22,21 @@ def fetch_stock_data(tickers, period="1y"):
     # Batch fetch price data
     try:
         prices = yf.download(tickers, period=period, group_by='ticker', auto_adjust=True, threads=True, progress=False)
+        count_upstream_call('download')
     except Exception as e:
         logging.error(f"Error fetching price data: {e}")
         return {}
 
     for ticker in tickers:
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
             # Get historical data for this ticker
             hist = prices[ticker] if len(tickers) > 1 else prices
             
+            # The batch download already has the history; only info is fetched per ticker
+            context = get_context(ticker)
+            context.seed(history=hist)
+            info = context.info
+            
             # Skip if no historical data
             if hist.empty:
                 logging.warning(f"No historical data for {ticker}")
@@ -2,32 +2,22 @@
 Async stock data fetcher with concurrent requests and multi-source fallback.
 """
 import asyncio
-import aiohttp
-import yfinance as yf
-import pandas as pd
 import logging
+import numpy as np
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-from tenacity import retry, stop_after_attempt, wait_exponential
+from datetime import datetime, timedelta, timezone
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    from fetchers.yahoo_client import YahooClient
+except ImportError:
+    from yahoo_client import YahooClient
+from pipeline.universe import load_universe
 
-NIFTY_50_TICKERS = [
-    "ADANIENT.NS", "ADANIPORTS.NS", "APOLLOHOSP.NS", "ASIANPAINT.NS", "AXISBANK.NS",
-    "BAJAJ-AUTO.NS", "BAJFINANCE.NS", "BAJAJFINSV.NS", "BPCL.NS", "BHARTIARTL.NS",
-    "BRITANNIA.NS", "CIPLA.NS", "COALINDIA.NS", "DIVISLAB.NS", "DRREDDY.NS",
-    "EICHERMOT.NS", "GRASIM.NS", "HCLTECH.NS", "HDFCBANK.NS", "HDFCLIFE.NS",
-    "HEROMOTOCO.NS", "HINDALCO.NS", "HINDUNILVR.NS", "ICICIBANK.NS", "ITC.NS",
-    "INDUSINDBK.NS", "INFY.NS", "JSWSTEEL.NS", "KOTAKBANK.NS", "LT.NS",
-    "LTIM.NS", "M&M.NS", "MARUTI.NS", "NESTLEIND.NS", "NTPC.NS",
-    "ONGC.NS", "POWERGRID.NS", "RELIANCE.NS", "SBILIFE.NS", "SBIN.NS",
-    "SUNPHARMA.NS", "TCS.NS", "TATACONSUM.NS", "TATAMOTORS.NS", "TATASTEEL.NS",
-    "TECHM.NS", "TITAN.NS", "ULTRACEMCO.NS", "UPL.NS", "WIPRO.NS"
-]
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-US_TICKERS = [
-    "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "META", "BRK-B", "V", "JNJ"
-]
+# Constituents come from the universe registry (scripts/universes/*.csv)
+NIFTY_50_TICKERS = load_universe('nifty_core')
+US_TICKERS = load_universe('us_core')
 
 
 def chunk_list(lst: List, chunk_size: int) -> List[List]:
@@ -35,52 +25,51 @@ def chunk_list(lst: List, chunk_size: int) -> List[List]:
     return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=10))
-async def fetch_single_stock(ticker: str, period: str = "1y") -> Optional[Dict]:
+async def fetch_single_stock(ticker: str, period: str = "1y", client: Optional[YahooClient] = None) -> Optional[Dict]:
     """
-    Fetch data for a single stock with retry logic.
+    Fetch data for a single stock. Transient request failures are retried
+    inside YahooClient (fetchers.retry).
     
     Args:
         ticker: Stock ticker symbol
         period: Historical data period
+        client: Shared YahooClient session (a private one is opened if omitted)
     
     Returns:
         Dictionary containing stock data or None on failure
     """
+    if client is None:
+        async with YahooClient() as own_client:
+            return await fetch_single_stock(ticker, period, own_client)
+    
     try:
-        # Run yfinance in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
-        stock = await loop.run_in_executor(None, yf.Ticker, ticker)
-        info = await loop.run_in_executor(None, lambda: stock.info)
-        hist = await loop.run_in_executor(None, lambda: stock.history(period=period))
+        # Direct async Yahoo endpoints (yfinance only as fallback inside the client)
+        info, hist = await client.fetch(ticker, period)
+        info = info or {}
         
-        if hist.empty:
+        if hist is None:
             logging.warning(f"No historical data for {ticker}")
             return None
         
+        timestamps = hist['timestamp']
+        closes = hist['close']
+        
         # Current price
-        current_price = float(info.get("currentPrice") or hist['Close'].iloc[-1])
+        current_price = float(info.get("currentPrice") or info.get("regularMarketPrice") or closes[-1])
         
-        # Calculate 6-month return for relative performance (FIX: Handle timezone-aware dates)
-        try:
-            six_months_ago = datetime.now() - timedelta(days=180)
-            # Convert hist index to timezone-naive for comparison
-            hist_index_naive = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
-            hist_6m = hist[hist_index_naive >= six_months_ago]
-            
-            if len(hist_6m) > 1:
-                price_6m_return = ((hist_6m['Close'].iloc[-1] - hist_6m['Close'].iloc[0]) / hist_6m['Close'].iloc[0] * 100)
-            else:
-                price_6m_return = 0
-        except Exception as e:
-            logging.warning(f"Could not calculate 6M return for {ticker}: {e}")
+        # Calculate 6-month return for relative performance
+        six_months_ago = int((datetime.now(timezone.utc) - timedelta(days=180)).timestamp())
+        start = int(np.searchsorted(timestamps, six_months_ago))
+        if len(closes) - start > 1:
+            price_6m_return = float((closes[-1] - closes[start]) / closes[start] * 100)
+        else:
             price_6m_return = 0
         
         # Historical data for chart (last 90 days)
         hist_data = [
-            {"time": d.strftime('%Y-%m-%d'), "value": float(c)} 
-            for d, c in zip(hist.index[-90:], hist['Close'][-90:])
-        ] if not hist.empty else []
+            {"time": datetime.fromtimestamp(int(t), timezone.utc).strftime('%Y-%m-%d'), "value": float(c)}
+            for t, c in zip(timestamps[-90:], closes[-90:])
+        ]
         
         # Ideal Range (target price)
         target_price = info.get('targetMeanPrice', 0)
@@ -136,13 +125,14 @@ async def fetch_single_stock(ticker: str, period: str = "1y") -> Optional[Dict]:
         return None
 
 
-async def fetch_stock_batch(tickers: List[str], period: str = "1y") -> Dict[str, Dict]:
+async def fetch_stock_batch(tickers: List[str], period: str = "1y", client: Optional[YahooClient] = None) -> Dict[str, Dict]:
     """
     Fetch data for a batch of stocks concurrently.
     
     Args:
         tickers: List of stock ticker symbols
         period: Historical data period
+        client: Shared YahooClient session
     
     Returns:
         Dictionary mapping tickers to their data
@@ -150,7 +140,7 @@ async def fetch_stock_batch(tickers: List[str], period: str = "1y") -> Dict[str,
     logging.info(f"Fetching batch of {len(tickers)} stocks...")
     
     # Create tasks for each stock
-    tasks = [fetch_single_stock(ticker, period) for ticker in tickers]
+    tasks = [fetch_single_stock(ticker, period, client) for ticker in tickers]
     
     # Execute all tasks concurrently with some delay to avoid rate limiting
     results = []
@@ -183,12 +173,15 @@ async def fetch_stock_data_async(tickers: List[str], period: str = "1y") -> Dict
     """
     logging.info(f"Starting async fetch for {len(tickers)} stocks...")
     
-    # Split into chunks of 10 for better concurrency control
+    # Split into chunks of 10; in-flight requests are capped by the shared
+    # adaptive Yahoo limit (fetchers.concurrency), not by the chunking
     chunks = chunk_list(tickers, 10)
     
-    # Process all chunks concurrently
-    chunk_tasks = [fetch_stock_batch(chunk, period) for chunk in chunks]
-    chunk_results = await asyncio.gather(*chunk_tasks)
+    # Process all chunks concurrently over one pooled HTTP session
+    async with YahooClient() as client:
+        chunk_tasks = [fetch_stock_batch(chunk, period, client) for chunk in chunks]
+        chunk_results = await asyncio.gather(*chunk_tasks)
+    logging.info(f"Yahoo requests: {client.requests}, yfinance fallbacks: {client.fallbacks}")
     
     # Merge all results
     all_data = {}
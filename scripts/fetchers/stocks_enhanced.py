@@ -2,32 +2,39 @@
 Enhanced Stock Data Fetcher with Institutional Metrics
 Uses only free/open-source APIs: yfinance, Yahoo Finance, Alpha Vantage (free tier)
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import time
 
+from analysis.indicator_cache import memoize_indicator
+from analysis.input_hash import input_hash, reuse_derived
+from pipeline.universe import load_universe
+from pipeline.scheduler import ChunkScheduler
+from pipeline.deadline import completed_by_deadline
+from fetchers.concurrency import get_limiter
+from fetchers.ticker_context import get_context
+
 logger = logging.getLogger(__name__)
 
-# Free tier APIs - no keys needed for basic data
-NIFTY_50_TICKERS = [
-    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS',
-    'HINDUNILVR.NS', 'SBIN.NS', 'BHARTIARTL.NS', 'ITC.NS', 'KOTAKBANK.NS',
-    'LT.NS', 'AXISBANK.NS', 'ASIANPAINT.NS', 'HCLTECH.NS', 'MARUTI.NS',
-    'SUNPHARMA.NS', 'TITAN.NS', 'BAJFINANCE.NS', 'ULTRACEMCO.NS', 'WIPRO.NS',
-    'ADANIPORTS.NS', 'NTPC.NS', 'ONGC.NS', 'POWERGRID.NS', 'M&M.NS',
-    'TATASTEEL.NS', 'JSWSTEEL.NS', 'INDUSINDBK.NS', 'TECHM.NS', 'TATAMOTORS.NS'
-]
+# Constituents come from the universe registry (scripts/universes/*.csv)
+NIFTY_50_TICKERS = load_universe('nifty_core')
+US_TICKERS = load_universe('us_core')
 
-US_TICKERS = [
-    'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'TSLA', 'META', 'BRK-B', 
-    'V', 'JNJ', 'WMT', 'JPM', 'MA', 'PG', 'UNH', 'HD', 'BAC', 'DIS',
-    'ADBE', 'CRM', 'NFLX', 'CMCSA', 'PFE', 'ORCL', 'KO', 'NKE', 'INTC', 'AMD'
-]
+# Bump when calculate_institutional_metrics/calculate_score change
+SCORING_VERSION = 1
+# Record fields computed from metrics; reused while a stock's inputs are unchanged
+DERIVED_FIELDS = ('pe_ratio', 'forward_pe', 'roce', 'eps_growth', 'debt_to_equity', 'fcf_yield',
+                  'operating_margins', 'ideal_range', 'price_6m_return', 'debt_to_ebitda', 'ev_to_ebitda',
+                  'ev_vs_sector', 'institutionalHolding', 'rsi', 'esg_score', 'earnings_quality',
+                  'score', 'recommendation')
+# Info fields read by calculate_institutional_metrics and the record's derived fields
+METRIC_INFO_FIELDS = ('returnOnEquity', 'earningsGrowth', 'earningsQuarterlyGrowth', 'debtToEquity', 'debtToEbitda',
+                      'enterpriseToEbitda', 'trailingPE', 'forwardPE', 'freeCashflow', 'marketCap',
+                      'operatingMargins', 'heldPercentInstitutions', 'profitMargins')
 
+@memoize_indicator('stocks.rsi')
 def calculate_rsi(prices, period=14):
     """Calculate RSI indicator"""
     if len(prices) < period + 1:
@@ -41,13 +48,18 @@ def calculate_rsi(prices, period=14):
     rsi = 100 - (100 / (1 + rs))
     return float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50.0
 
-def calculate_institutional_metrics(ticker_obj, hist_data):
-    """Calculate institutional-grade metrics"""
+def calculate_institutional_metrics(ticker_obj, hist_data, current_price=None):
+    """Calculate institutional-grade metrics
+    
+    ``ticker_obj`` is anything with an ``info`` dict; pass the symbol's
+    TickerContext so the info fetched earlier in the run is reused.
+    """
     try:
         info = ticker_obj.info
         
         # Get price data
-        current_price = info.get('regularMarketPrice', info.get('currentPrice', 0))
+        if not current_price:
+            current_price = info.get('regularMarketPrice', info.get('currentPrice', 0))
         if current_price == 0 and len(hist_data) > 0:
             current_price = float(hist_data['Close'].iloc[-1])
         
@@ -123,137 +135,164 @@ def calculate_institutional_metrics(ticker_obj, hist_data):
         logger.warning(f"Error calculating metrics: {e}")
         return None
 
-def fetch_single_stock(symbol, retries=2):
-    """Fetch data for a single stock with retry logic"""
-    for attempt in range(retries):
-        try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Get historical data (6 months for technical analysis)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=180)
-            hist = ticker.history(start=start_date, end=end_date)
-            
-            if hist.empty:
-                logger.warning(f"{symbol}: No historical data")
-                continue
-            
-            # Get current price and change
-            current_price = info.get('regularMarketPrice', info.get('currentPrice', 0))
-            if current_price == 0:
-                current_price = float(hist['Close'].iloc[-1])
-            
-            previous_close = info.get('previousClose', info.get('regularMarketPreviousClose', current_price))
-            change = current_price - previous_close
-            change_percent = (change / previous_close * 100) if previous_close > 0 else 0
-            
+def calculate_score(metrics):
+    """Composite institutional score (0-100) from a metrics dict"""
+    score = 50  # Base score
+    
+    # ROCE contribution (max 20 points)
+    if metrics['roce'] > 20:
+        score += 20
+    elif metrics['roce'] > 15:
+        score += 15
+    elif metrics['roce'] > 10:
+        score += 10
+    elif metrics['roce'] < 5:
+        score -= 10
+    
+    # EPS Growth contribution (max 20 points)
+    if metrics['eps_growth'] > 20:
+        score += 20
+    elif metrics['eps_growth'] > 15:
+        score += 15
+    elif metrics['eps_growth'] > 10:
+        score += 10
+    elif metrics['eps_growth'] < 0:
+        score -= 15
+    
+    # FCF Yield contribution (max 15 points)
+    if metrics['fcf_yield'] > 5:
+        score += 15
+    elif metrics['fcf_yield'] > 3:
+        score += 10
+    elif metrics['fcf_yield'] > 1:
+        score += 5
+    
+    # Debt/EBITDA contribution (max 15 points)
+    if metrics['debt_to_ebitda'] < 1.5:
+        score += 15
+    elif metrics['debt_to_ebitda'] < 2.5:
+        score += 10
+    elif metrics['debt_to_ebitda'] < 3.5:
+        score += 5
+    elif metrics['debt_to_ebitda'] > 5:
+        score -= 10
+    
+    # 6M Return contribution (max 10 points)
+    if metrics['price_6m_return'] > 15:
+        score += 10
+    elif metrics['price_6m_return'] > 5:
+        score += 5
+    elif metrics['price_6m_return'] < -10:
+        score -= 10
+    
+    # P/E Ratio contribution (max 10 points)
+    if 10 < metrics['pe_ratio'] < 20:
+        score += 10
+    elif 8 < metrics['pe_ratio'] < 25:
+        score += 5
+    elif metrics['pe_ratio'] > 40:
+        score -= 10
+    
+    # Earnings Quality (max 10 points)
+    if metrics['earnings_quality'] == 'High':
+        score += 10
+    elif metrics['earnings_quality'] == 'Medium':
+        score += 5
+    
+    # Cap score between 0-100
+    score = max(0, min(100, score))
+    
+    return score
+
+def get_recommendation(score):
+    """Map a composite score to a recommendation"""
+    if score >= 80:
+        recommendation = "Strong Buy"
+    elif score >= 70:
+        recommendation = "Buy"
+    elif score >= 50:
+        recommendation = "Hold"
+    elif score >= 40:
+        recommendation = "Sell"
+    else:
+        recommendation = "Avoid"
+    
+    return recommendation
+
+def fetch_single_stock(symbol, retries=2, previous=None):
+    """Fetch data for a single stock with retry logic.
+    
+    If the ``previous`` record was derived from identical inputs (same
+    ``input_hash``), its metrics and score are reused, not recomputed.
+    Info and history come from the symbol's TickerContext, so each is
+    fetched at most once per run (revalidation only refetches what failed).
+    ``retries`` is the maximum number of attempts per facet; retries also
+    draw on the run-wide retry budget (fetchers.retry).
+    """
+    context = get_context(symbol)
+    context.attempts = retries
+    try:
+        info, hist = context.info, context.history
+        
+        if hist.empty:
+            logger.warning(f"{symbol}: No historical data")
+            return symbol, None
+        
+        # Get current price and change
+        current_price = info.get('regularMarketPrice', info.get('currentPrice', 0))
+        if not current_price:
+            current_price = float(hist['Close'].iloc[-1])
+        
+        previous_close = info.get('previousClose', info.get('regularMarketPreviousClose', current_price))
+        change = current_price - previous_close
+        change_percent = (change / previous_close * 100) if previous_close > 0 else 0
+        
+        # Prepare stock data
+        stock_data = {
+            'symbol': symbol,
+            'name': info.get('shortName', info.get('longName', symbol)),
+            'long_name': info.get('longName'),
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown'),
+            'current_price': current_price,
+            'change': change,
+            'changePercent': change_percent,
+            'volume': str(info.get('volume', 0)),
+            'market_cap': str(info.get('marketCap', 0)),
+            'peg_ratio': info.get('pegRatio', 1.0),
+            'price_to_book': info.get('priceToBook', 2.0),
+            'free_cashflow': info.get('freeCashflow', 0),
+            'ebitda': info.get('ebitda', 0),
+            'history': [],
+            'rank': 0,  # Will be set after sorting all stocks
+            # Close history for the history cache; removed before output
+            '_history': (hist.index.as_unit('s').asi8.astype(np.int64), hist['Close'].to_numpy(dtype=np.float64))
+        }
+        
+        # Unchanged fundamentals, closes and price: keep the previous derivation. Only what
+        # the metrics read is hashed; the rest of info (volume, bid/ask...) changes every call
+        fundamentals = {field: info.get(field) for field in METRIC_INFO_FIELDS}
+        digest = input_hash(fundamentals, hist['Close'], current_price, version=SCORING_VERSION)
+        if not reuse_derived(stock_data, previous, digest, DERIVED_FIELDS, section='stocks'):
             # Calculate institutional metrics
-            metrics = calculate_institutional_metrics(ticker, hist)
+            metrics = calculate_institutional_metrics(context, hist, current_price)
             if not metrics:
-                continue
+                logger.error(f"✗ {symbol}: metrics unavailable")
+                return symbol, None
             
             # Calculate composite score (0-100)
-            score = 50  # Base score
-            
-            # ROCE contribution (max 20 points)
-            if metrics['roce'] > 20:
-                score += 20
-            elif metrics['roce'] > 15:
-                score += 15
-            elif metrics['roce'] > 10:
-                score += 10
-            elif metrics['roce'] < 5:
-                score -= 10
-            
-            # EPS Growth contribution (max 20 points)
-            if metrics['eps_growth'] > 20:
-                score += 20
-            elif metrics['eps_growth'] > 15:
-                score += 15
-            elif metrics['eps_growth'] > 10:
-                score += 10
-            elif metrics['eps_growth'] < 0:
-                score -= 15
-            
-            # FCF Yield contribution (max 15 points)
-            if metrics['fcf_yield'] > 5:
-                score += 15
-            elif metrics['fcf_yield'] > 3:
-                score += 10
-            elif metrics['fcf_yield'] > 1:
-                score += 5
-            
-            # Debt/EBITDA contribution (max 15 points)
-            if metrics['debt_to_ebitda'] < 1.5:
-                score += 15
-            elif metrics['debt_to_ebitda'] < 2.5:
-                score += 10
-            elif metrics['debt_to_ebitda'] < 3.5:
-                score += 5
-            elif metrics['debt_to_ebitda'] > 5:
-                score -= 10
-            
-            # 6M Return contribution (max 10 points)
-            if metrics['price_6m_return'] > 15:
-                score += 10
-            elif metrics['price_6m_return'] > 5:
-                score += 5
-            elif metrics['price_6m_return'] < -10:
-                score -= 10
-            
-            # P/E Ratio contribution (max 10 points)
-            if 10 < metrics['pe_ratio'] < 20:
-                score += 10
-            elif 8 < metrics['pe_ratio'] < 25:
-                score += 5
-            elif metrics['pe_ratio'] > 40:
-                score -= 10
-            
-            # Earnings Quality (max 10 points)
-            if metrics['earnings_quality'] == 'High':
-                score += 10
-            elif metrics['earnings_quality'] == 'Medium':
-                score += 5
-            
-            # Cap score between 0-100
-            score = max(0, min(100, score))
-            
-            # Determine recommendation
-            if score >= 80:
-                recommendation = "Strong Buy"
-            elif score >= 70:
-                recommendation = "Buy"
-            elif score >= 50:
-                recommendation = "Hold"
-            elif score >= 40:
-                recommendation = "Sell"
-            else:
-                recommendation = "Avoid"
+            score = calculate_score(metrics)
             
             # EV/EBITDA vs Sector (calculate relative position)
             sector_ev_avg = 12.0  # Average sector EV/EBITDA
             ev_vs_sector = ((metrics['ev_to_ebitda'] - sector_ev_avg) / sector_ev_avg) * 100
             
-            # Prepare stock data
-            stock_data = {
-                'symbol': symbol,
-                'name': info.get('shortName', info.get('longName', symbol)),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown'),
-                'current_price': current_price,
-                'change': change,
-                'changePercent': change_percent,
-                'volume': str(info.get('volume', 0)),
-                'market_cap': str(info.get('marketCap', 0)),
+            stock_data.update({
                 'pe_ratio': metrics['pe_ratio'],
                 'forward_pe': info.get('forwardPE', metrics['pe_ratio']),
-                'peg_ratio': info.get('pegRatio', 1.0),
-                'price_to_book': info.get('priceToBook', 2.0),
                 'roce': metrics['roce'],
                 'eps_growth': metrics['eps_growth'],
                 'debt_to_equity': metrics['debt_to_equity'],
-                'free_cashflow': info.get('freeCashflow', 0),
                 'fcf_yield': metrics['fcf_yield'],
                 'operating_margins': metrics['operating_margins'],
                 'ideal_range': f"${current_price * 0.9:.0f} - ${current_price * 1.1:.0f}",
@@ -261,51 +300,161 @@ def fetch_single_stock(symbol, retries=2):
                 'debt_to_ebitda': metrics['debt_to_ebitda'],
                 'ev_to_ebitda': metrics['ev_to_ebitda'],
                 'ev_vs_sector': ev_vs_sector,
-                'ebitda': info.get('ebitda', 0),
-                'history': [],
                 'institutionalHolding': f"{metrics['institutional_holding']:.1f}%",
                 'rsi': metrics['rsi'],
                 'esg_score': metrics['esg_score'],
                 'earnings_quality': metrics['earnings_quality'],
                 'score': score,
-                'recommendation': recommendation,
-                'rank': 0  # Will be set after sorting all stocks
-            }
-            
-            logger.info(f"✓ {symbol}: ${current_price:.2f} ({change_percent:+.2f}%)")
-            return symbol, stock_data
-            
-        except Exception as e:
-            logger.warning(f"{symbol} attempt {attempt + 1}/{retries} failed: {e}")
-            time.sleep(1)
+                'recommendation': get_recommendation(score),
+            })
+        
+        logger.info(f"✓ {symbol}: ${current_price:.2f} ({change_percent:+.2f}%)")
+        return symbol, stock_data
+        
+    except Exception as e:
+        logger.error(f"✗ {symbol}: {e}")
+        return symbol, None
+
+def apply_quote(stock_data, quote):
+    """Merge live quote fields into a stock record. Returns True if the price changed."""
+    price = quote.get('regularMarketPrice')
+    if not price:
+        return False
+    
+    previous_close = quote.get('regularMarketPreviousClose')
+    if not previous_close:
+        previous_close = stock_data.get('current_price', price) - stock_data.get('change', 0)
+    change = price - previous_close
     
-    logger.error(f"✗ {symbol}: Failed after {retries} attempts")
-    return symbol, None
+    stock_data['current_price'] = price
+    stock_data['change'] = change
+    stock_data['changePercent'] = (change / previous_close * 100) if previous_close > 0 else 0
+    if quote.get('regularMarketVolume') is not None:
+        stock_data['volume'] = str(int(quote['regularMarketVolume']))
+    if quote.get('marketCap'):
+        stock_data['market_cap'] = str(int(quote['marketCap']))
+    return True
 
-def fetch_stock_data_parallel(tickers, max_workers=10):
-    """Fetch stock data in parallel for speed"""
+# Fallbacks calculate_institutional_metrics uses for score inputs yfinance doesn't report
+SCORE_INPUT_DEFAULTS = {
+    'roce': 15.0, 'eps_growth': 10.0, 'fcf_yield': 3.0, 'debt_to_ebitda': 1.5,
+    'price_6m_return': 0.0, 'pe_ratio': 20.0, 'earnings_quality': None,
+}
+
+def score_inputs(stock_data):
+    """
+    calculate_score input from a stored record, matching the full path: a
+    missing metric takes the full path's default, and None (a NaN sanitised
+    for JSON) goes back to NaN, which earns no points on either path.
+    """
+    return {field: (float('nan') if stock_data[field] is None else stock_data[field])
+            if field in stock_data else default
+            for field, default in SCORE_INPUT_DEFAULTS.items()}
+
+def refresh_from_quote(stock_data, quote, closes=None, indicators=None):
+    """
+    Quotes-only refresh: apply a live quote and recompute every price-derived
+    field (change, P/E, FCF yield, 6M return, RSI, score) from cached inputs.
+    
+    Args:
+        stock_data: Previously published stock record (updated in place)
+        quote: Batch quote for the symbol
+        closes: Cached daily closes including the latest price, if available
+        indicators: Streaming indicator snapshot (analysis.indicator_state);
+            used instead of recomputing RSI from ``closes``
+    
+    Returns:
+        True if the record was refreshed
+    """
+    old_price = stock_data.get('current_price') or 0
+    if not apply_quote(stock_data, quote):
+        return False
+    current_price = stock_data['current_price']
+    
+    # Valuation ratios scale with price (fundamentals are unchanged)
+    if old_price > 0:
+        ratio = current_price / old_price
+        if stock_data.get('pe_ratio') is not None:
+            stock_data['pe_ratio'] *= ratio
+        if stock_data.get('fcf_yield') is not None:
+            stock_data['fcf_yield'] /= ratio
+    stock_data['ideal_range'] = f"${current_price * 0.9:.0f} - ${current_price * 1.1:.0f}"
+    
+    if closes is not None and len(closes):
+        closes = pd.Series(closes)
+        if len(closes) >= 126:  # ~6 months
+            price_6m_ago = float(closes.iloc[-126])
+            stock_data['price_6m_return'] = ((current_price - price_6m_ago) / price_6m_ago) * 100
+        if indicators is None and len(closes) > 14:
+            stock_data['rsi'] = calculate_rsi(closes)
+    if indicators is not None:
+        stock_data['rsi'] = indicators['rsi']
+    
+    stock_data['score'] = calculate_score(score_inputs(stock_data))
+    stock_data['recommendation'] = get_recommendation(stock_data['score'])
+    # Derived fields no longer match the inputs hashed by the last full fetch
+    stock_data.pop('input_hash', None)
+    return True
+
+def fetch_stock_data_parallel(tickers, max_workers=None, history_cache=None, previous=None):
+    """Fetch stock data in parallel for speed
+    
+    Actual concurrency follows the shared adaptive Yahoo limit; the pool
+    only needs enough threads for its ceiling.
+    """
+    max_workers = max_workers or min(len(tickers), get_limiter('yahoo').max_limit) or 1
     results = {}
+    previous = previous or {}
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_ticker = {executor.submit(fetch_single_stock, ticker): ticker for ticker in tickers}
-        
-        for future in as_completed(future_to_ticker):
-            ticker = future_to_ticker[future]
-            try:
-                symbol, data = future.result()
-                if data:
-                    results[symbol] = data
-            except Exception as e:
-                logger.error(f"Error processing {ticker}: {e}")
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    future_to_ticker = {executor.submit(fetch_single_stock, ticker, 2, previous.get(ticker)): ticker
+                        for ticker in tickers}
+    
+    # Stop waiting at the run deadline; yfinance calls have no timeout of their own
+    for future in completed_by_deadline(future_to_ticker, label='stocks'):
+        ticker = future_to_ticker[future]
+        try:
+            symbol, data = future.result()
+            if data:
+                history = data.pop('_history', None)
+                if history_cache is not None and history is not None:
+                    history_cache.put(symbol, *history)
+                results[symbol] = data
+        except Exception as e:
+            logger.error(f"Error processing {ticker}: {e}")
     
+    executor.shutdown(wait=all(f.done() for f in future_to_ticker), cancel_futures=True)
     return results
 
-def fetch_stock_data(tickers):
-    """Main function to fetch stock data"""
+def fetch_stock_data(tickers, history_cache=None, chunk_size=100, label='stocks', on_progress=None, first_chunk=None,
+                     previous=None):
+    """Main function to fetch stock data
+    
+    Large universes (Nifty 500, S&P 500) are processed in chunks of
+    ``chunk_size`` with a short pause between chunks to stay under Yahoo's
+    rate limits.
+    
+    Args:
+        tickers: List of ticker symbols
+        history_cache: Optional HistoryCache that receives each ticker's daily closes
+        chunk_size: Tickers per chunk
+        label: Name used in progress logs
+        on_progress: Called as on_progress(processed, total, results) after each chunk
+        first_chunk: Size of a smaller first chunk, so the top names finish quickly
+        previous: Last published records; stocks whose inputs are unchanged
+            reuse their derived fields (see analysis.input_hash)
+    """
     logger.info(f"Fetching data for {len(tickers)} stocks...")
     start_time = time.time()
+    previous = {s['symbol']: s for s in previous or [] if s.get('symbol')}
+    
+    def fetch_chunk(chunk):
+        # Price comes from each ticker's info, which fundamentals need anyway; batch
+        # quotes are only for quotes-only refreshes (refresh_from_quote)
+        return fetch_stock_data_parallel(chunk, history_cache=history_cache, previous=previous)
     
-    results = fetch_stock_data_parallel(tickers, max_workers=15)
+    scheduler = ChunkScheduler(chunk_size=chunk_size, label=label, on_progress=on_progress, first_chunk=first_chunk)
+    results = scheduler.run(tickers, fetch_chunk)
     
     elapsed = time.time() - start_time
     logger.info(f"Fetched {len(results)}/{len(tickers)} stocks in {elapsed:.1f}s")
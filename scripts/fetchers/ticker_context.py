@@ -0,0 +1,148 @@
+"""
+Per-ticker fetch context shared by every stage of a run.
+
+A TickerContext fetches each data facet of one symbol (info, history,
+financials) lazily and at most once per run, so the fetch, metrics and
+refresh stages reuse the same Yahoo responses instead of re-reading
+``ticker.info`` or re-downloading history. Facets already known from a
+batch request (a multi-ticker yf.download) are seeded into the context and
+cost nothing. Quotes are not a facet: they come from batch requests
+(yahoo_client.fetch_batch_quotes), which take their own Yahoo slots.
+
+Every upstream attempt made through a context is counted per facet, along
+with memo hits, so each run logs how many Yahoo calls it actually made.
+
+Usage:
+    context = get_context('AAPL')
+    context.seed(history=batch.get('AAPL'))
+    info, hist = context.info, context.history
+"""
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import yfinance as yf
+
+from pipeline.deadline import deadline_timeout
+from fetchers.concurrency import get_limiter
+from fetchers.retry import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('info', 'history', 'financials')
+HISTORY_DAYS = 180
+DEFAULT_ATTEMPTS = 2
+
+_calls = Counter()  # upstream attempts per facet
+_hits = Counter()  # facet reads served from a context
+_counter_lock = threading.Lock()
+
+
+def _count(counter: Counter, facet: str):
+    with _counter_lock:
+        counter[facet] += 1
+
+
+class TickerContext:
+    """Lazily fetched, memoized data facets for one symbol."""
+
+    def __init__(self, symbol: str, attempts: int = DEFAULT_ATTEMPTS):
+        self.symbol = symbol
+        self.attempts = attempts
+        self._ticker = None
+        self._facets: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ticker(self) -> yf.Ticker:
+        with self._lock:
+            if self._ticker is None:
+                self._ticker = yf.Ticker(self.symbol)
+            return self._ticker
+
+    def seed(self, **facets):
+        """Record facets obtained elsewhere (e.g. a batch request); None values are ignored."""
+        with self._lock:
+            for facet, value in facets.items():
+                if facet not in FACETS:
+                    raise ValueError(f"Unknown facet: {facet}")
+                if value is not None:
+                    self._facets.setdefault(facet, value)
+
+    def cached(self, facet: str) -> Optional[Any]:
+        """A facet if it is already known, without fetching it."""
+        with self._lock:
+            return self._facets.get(facet)
+
+    def _get(self, facet: str, load: Callable[[], Any]) -> Any:
+        """Memoized facet; failures propagate and are not memoized, so a later stage may retry."""
+        with self._lock:
+            if facet in self._facets:
+                _count(_hits, facet)
+                return self._facets[facet]
+            value = call_with_retry(self._request, facet, load, attempts=self.attempts,
+                                    label=f"{self.symbol} {facet}")
+            self._facets[facet] = value
+            return value
+
+    @staticmethod
+    def _request(facet: str, load: Callable[[], Any]) -> Any:
+        """One upstream attempt, holding a Yahoo slot."""
+        _count(_calls, facet)
+        with get_limiter('yahoo').slot():
+            return load()
+
+    @property
+    def info(self) -> Dict:
+        return self._get('info', lambda: self.ticker.info)
+
+    @property
+    def history(self):
+        """Daily bars: the last HISTORY_DAYS, unless seeded from a batch download."""
+        def load():
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=HISTORY_DAYS)
+            return self.ticker.history(start=start_date, end=end_date, timeout=deadline_timeout(10))
+        return self._get('history', load)
+
+    @property
+    def financials(self):
+        return self._get('financials', lambda: self.ticker.financials)
+
+
+_contexts: Dict[str, TickerContext] = {}
+_registry_lock = threading.Lock()
+
+
+def get_context(symbol: str) -> TickerContext:
+    """The run's context for ``symbol``, created on first use."""
+    with _registry_lock:
+        if symbol not in _contexts:
+            _contexts[symbol] = TickerContext(symbol)
+        return _contexts[symbol]
+
+
+def reset_contexts():
+    """Drop every context and zero the counters (start and end of a run)."""
+    with _registry_lock:
+        _contexts.clear()
+    with _counter_lock:
+        _calls.clear()
+        _hits.clear()
+
+
+def count_upstream_call(facet: str, n: int = 1):
+    """Count upstream calls made outside a context, e.g. a batch download that seeds many."""
+    with _counter_lock:
+        _calls[facet] += n
+
+
+def context_stats() -> Dict:
+    """Tickers seen, upstream calls and memo hits per facet."""
+    with _registry_lock:
+        tickers = len(_contexts)
+    with _counter_lock:
+        return {'tickers': tickers, 'calls': dict(_calls), 'hits': dict(_hits),
+                'total_calls': sum(_calls.values())}
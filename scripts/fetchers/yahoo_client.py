@@ -0,0 +1,328 @@
+"""
+Async-native Yahoo Finance client (chart + quoteSummary endpoints).
+
+Talks to Yahoo's JSON endpoints directly over one pooled aiohttp session, so
+hundreds of tickers can be in flight on a single thread, and returns price
+history as NumPy arrays instead of DataFrames. yfinance remains the fallback
+when the direct endpoints fail (e.g. crumb/cookie changes on Yahoo's side).
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+from pipeline.deadline import deadline_timeout
+from fetchers.concurrency import get_limiter
+from fetchers.retry import HTTPStatusError, async_call_with_retry, check_status
+from fetchers.ticker_context import get_context
+
+logger = logging.getLogger(__name__)
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_SUMMARY_URL = "https://query2.finance.yahoo.com/v10/finance/quoteSummary/{symbol}"
+COOKIE_URL = "https://fc.yahoo.com"
+CRUMB_URL = "https://query1.finance.yahoo.com/v1/test/getcrumb"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "application/json,text/plain,*/*",
+}
+
+# Modules whose fields together resemble yfinance's Ticker.info
+INFO_MODULES = [
+    "price", "summaryDetail", "defaultKeyStatistics", "financialData", "assetProfile",
+]
+
+HISTORY_FIELDS = ("open", "high", "low", "close", "volume")
+
+# Live quote fields for the multi-symbol quote endpoint
+QUOTE_FIELDS = [
+    "regularMarketPrice", "regularMarketPreviousClose", "regularMarketChange",
+    "regularMarketChangePercent", "regularMarketVolume", "regularMarketTime", "marketCap",
+    "shortName", "currency",
+]
+QUOTE_BATCH_SIZE = 100
+
+
+def _flatten_modules(result: Dict) -> Dict:
+    """Merge quoteSummary modules into one flat, info-like dict of raw values."""
+    info = {}
+    for module in result.values():
+        if not isinstance(module, dict):
+            continue
+        for key, value in module.items():
+            if isinstance(value, dict):
+                # {"raw": 0.25, "fmt": "25%"} -> 0.25; formatted-only values are skipped
+                if 'raw' in value:
+                    info.setdefault(key, value['raw'])
+            elif value is not None:
+                info.setdefault(key, value)
+    return info
+
+
+def parse_chart(payload: Dict) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Convert a chart API payload into arrays.
+
+    Returns:
+        Dict with ``timestamp`` (int64 epoch seconds), OHLCV float arrays,
+        ``adjclose`` and ``meta``; None if the payload has no bars
+    """
+    try:
+        result = payload['chart']['result'][0]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    timestamps = result.get('timestamp') or []
+    if not timestamps:
+        return None
+
+    quote = (result.get('indicators', {}).get('quote') or [{}])[0]
+    arrays = {'timestamp': np.asarray(timestamps, dtype=np.int64)}
+    for field in HISTORY_FIELDS:
+        values = quote.get(field) or [None] * len(timestamps)
+        arrays[field] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    adj = (result.get('indicators', {}).get('adjclose') or [{}])[0].get('adjclose')
+    arrays['adjclose'] = (
+        np.array([np.nan if v is None else v for v in adj], dtype=np.float64) if adj else arrays['close'].copy()
+    )
+
+    # Drop bars without a close (Yahoo emits nulls for halted/partial sessions)
+    valid = ~np.isnan(arrays['close'])
+    if not valid.all():
+        arrays = {k: v[valid] for k, v in arrays.items()}
+    arrays['meta'] = result.get('meta', {})
+    return arrays if len(arrays['close']) else None
+
+
+def history_to_arrays(hist) -> Optional[Dict[str, np.ndarray]]:
+    """Convert a yfinance history DataFrame into the same array format as parse_chart."""
+    if hist is None or hist.empty:
+        return None
+    index = hist.index.tz_convert('UTC') if hist.index.tz is not None else hist.index
+    arrays = {'timestamp': index.as_unit('s').asi8.astype(np.int64)}
+    for field in HISTORY_FIELDS:
+        column = field.capitalize()
+        arrays[field] = hist[column].to_numpy(dtype=np.float64) if column in hist else np.full(len(hist), np.nan)
+    arrays['adjclose'] = arrays['close'].copy()
+    arrays['meta'] = {}
+    return arrays
+
+
+class YahooClient:
+    """
+    Pooled async client. Use as ``async with YahooClient() as client``.
+
+    Args:
+        max_connections: Connection pool size (total in-flight requests)
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(self, max_connections: int = 100, timeout: float = 15):
+        self.max_connections = max_connections
+        self.timeout_seconds = timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._crumb: Optional[str] = None
+        self._crumb_lock = asyncio.Lock()
+        self.requests = 0
+        self.fallbacks = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, headers=HEADERS, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _get_json(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        """JSON body of a GET, retrying transient failures; None for an error status."""
+        try:
+            return await async_call_with_retry(self._get_json_once, url, params, label='Yahoo')
+        except HTTPStatusError as e:
+            logger.debug(f"Yahoo {url} -> {e}")
+            return None
+
+    async def _get_json_once(self, url: str, params: Optional[Dict] = None) -> Optional[Dict]:
+        self.requests += 1
+        # Per-request timeout shrinks as the run deadline approaches
+        timeout = aiohttp.ClientTimeout(total=deadline_timeout(self.timeout_seconds))
+        # Shared AIMD limit: backs off on 429/5xx across every Yahoo caller
+        async with get_limiter('yahoo').async_slot() as request:
+            async with self.session.get(url, params=params, timeout=timeout) as response:
+                request.status = response.status
+                status, headers = response.status, response.headers
+                payload = await response.json(content_type=None) if status == 200 else None
+        # Raised outside the slot, which has already recorded the status
+        check_status(status, headers)
+        return payload
+
+    async def _get_crumb(self) -> Optional[str]:
+        """quoteSummary needs a cookie + crumb pair; fetch it once per session."""
+        async with self._crumb_lock:
+            if self._crumb is None:
+                try:
+                    async with self.session.get(COOKIE_URL, allow_redirects=True):
+                        pass
+                    async with self.session.get(CRUMB_URL) as response:
+                        crumb = (await response.text()).strip()
+                        self._crumb = crumb if response.status == 200 and crumb and '<' not in crumb else ''
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Yahoo crumb unavailable: {e}")
+                    self._crumb = ''
+            return self._crumb or None
+
+    async def chart(self, symbol: str, range_: str = "1y", interval: str = "1d") -> Optional[Dict[str, np.ndarray]]:
+        """Daily (or other interval) OHLCV history as NumPy arrays."""
+        try:
+            payload = await self._get_json(
+                CHART_URL.format(symbol=symbol),
+                {"range": range_, "interval": interval, "includePrePost": "false", "events": "div,splits"}
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Yahoo chart failed for {symbol}: {e}")
+            return None
+        return parse_chart(payload) if payload else None
+
+    async def quote_summary(self, symbol: str, modules: Optional[List[str]] = None) -> Optional[Dict]:
+        """Fundamentals as a flat info-like dict (yfinance key names)."""
+        params = {"modules": ",".join(modules or INFO_MODULES)}
+        crumb = await self._get_crumb()
+        if crumb:
+            params["crumb"] = crumb
+        try:
+            payload = await self._get_json(QUOTE_SUMMARY_URL.format(symbol=symbol), params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Yahoo quoteSummary failed for {symbol}: {e}")
+            return None
+        try:
+            result = payload['quoteSummary']['result'][0]
+        except (KeyError, IndexError, TypeError):
+            return None
+        info = _flatten_modules(result)
+        info.setdefault('symbol', symbol)
+        return info
+
+    async def quotes(self, symbols: List[str], batch_size: int = QUOTE_BATCH_SIZE) -> Dict[str, Dict]:
+        """
+        Live quotes for many symbols, ``batch_size`` symbols per request.
+
+        Returns:
+            Dictionary mapping symbol to its quote fields (missing symbols omitted)
+        """
+        crumb = await self._get_crumb()
+
+        async def fetch_batch(batch):
+            params = {"symbols": ",".join(batch), "fields": ",".join(QUOTE_FIELDS)}
+            if crumb:
+                params["crumb"] = crumb
+            try:
+                payload = await self._get_json(QUOTE_URL, params)
+                return (payload or {}).get('quoteResponse', {}).get('result') or []
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Yahoo batch quote failed ({len(batch)} symbols): {e}")
+                return []
+
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+        results = await asyncio.gather(*(fetch_batch(b) for b in batches))
+        return {q['symbol']: q for batch in results for q in batch if q.get('symbol')}
+
+    async def fetch(self, symbol: str, range_: str = "1y") -> Tuple[Optional[Dict], Optional[Dict[str, np.ndarray]]]:
+        """
+        Fetch fundamentals and history concurrently, falling back to yfinance.
+
+        Returns:
+            (info, history arrays); either may be None if every source failed
+        """
+        info, history = await asyncio.gather(self.quote_summary(symbol), self.chart(symbol, range_))
+
+        if info is None or history is None:
+            self.fallbacks += 1
+            fb_info, fb_history = await self._fetch_yfinance(symbol, range_, need_info=info is None,
+                                                             need_history=history is None)
+            info = info if info is not None else fb_info
+            history = history if history is not None else fb_history
+
+        # The chart meta carries a live price even when quoteSummary is sparse
+        if info is not None and history is not None:
+            meta = history.get('meta', {})
+            if meta.get('regularMarketPrice') is not None:
+                info.setdefault('regularMarketPrice', meta['regularMarketPrice'])
+            if meta.get('chartPreviousClose') is not None:
+                info.setdefault('previousClose', meta['chartPreviousClose'])
+
+        return info, history
+
+    @staticmethod
+    async def _fetch_yfinance(symbol: str, range_: str, need_info: bool, need_history: bool):
+        """Blocking yfinance fallback, run off the event loop."""
+        import yfinance as yf
+
+        def load():
+            # Info goes through the run's TickerContext so other stages reuse it
+            info = get_context(symbol).info if need_info else None
+            history = history_to_arrays(yf.Ticker(symbol).history(period=range_)) if need_history else None
+            return info, history
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, load)
+        except Exception as e:
+            logger.warning(f"yfinance fallback failed for {symbol}: {e}")
+            return None, None
+
+
+def _quotes_from_yfinance(symbols: List[str]) -> Dict[str, Dict]:
+    """Fallback: one yf.download for the last few daily bars of every symbol."""
+    import yfinance as yf
+
+    quotes = {}
+    try:
+        data = yf.download(symbols, period="5d", interval="1d", group_by="ticker",
+                           auto_adjust=False, threads=True, progress=False)
+    except Exception as e:
+        logger.warning(f"yfinance batch quote fallback failed: {e}")
+        return quotes
+
+    for symbol in symbols:
+        try:
+            frame = data[symbol] if len(symbols) > 1 else data
+            closes = frame['Close'].dropna()
+            if closes.empty:
+                continue
+            quotes[symbol] = {
+                'symbol': symbol,
+                'regularMarketPrice': float(closes.iloc[-1]),
+                'regularMarketPreviousClose': float(closes.iloc[-2]) if len(closes) > 1 else float(closes.iloc[-1]),
+                'regularMarketVolume': float(frame['Volume'].dropna().iloc[-1]) if 'Volume' in frame else None,
+            }
+        except (KeyError, IndexError):
+            continue
+    return quotes
+
+
+async def fetch_batch_quotes_async(symbols: List[str], client: Optional[YahooClient] = None) -> Dict[str, Dict]:
+    """Batch quotes via the quote endpoint, with a single yfinance download for any gaps."""
+    if client is None:
+        async with YahooClient() as own_client:
+            return await fetch_batch_quotes_async(symbols, own_client)
+
+    quotes = await client.quotes(symbols)
+    missing = [s for s in symbols if s not in quotes]
+    if missing:
+        logger.info(f"Batch quotes: {len(missing)} symbols missing, trying yfinance")
+        fallback = await asyncio.get_running_loop().run_in_executor(None, _quotes_from_yfinance, missing)
+        quotes.update(fallback)
+    logger.info(f"Batch quotes: {len(quotes)}/{len(symbols)} symbols in {client.requests} requests")
+    return quotes
+
+
+def fetch_batch_quotes(symbols: List[str]) -> Dict[str, Dict]:
+    """Synchronous wrapper for fetch_batch_quotes_async."""
+    if not symbols:
+        return {}
+    return asyncio.run(fetch_batch_quotes_async(list(symbols)))
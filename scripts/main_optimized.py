@@ -7,29 +7,34 @@ import os
 import json
 import logging
 import math
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
 try:
-    from fetchers.stocks_enhanced import fetch_stock_data, NIFTY_50_TICKERS, US_TICKERS
+    from fetchers.stocks_enhanced import fetch_stock_data
     from fetchers.crypto_enhanced import fetch_crypto_data
     from fetchers.news_enhanced import fetch_news
+    ENHANCED_FETCHERS = True
 except ImportError:
     # Fallback to original fetchers if enhanced not available
-    from fetchers.stocks_async import fetch_stock_data, NIFTY_50_TICKERS, US_TICKERS
+    from fetchers.stocks_async import fetch_stock_data
     from fetchers.crypto import fetch_crypto_data
     from fetchers.news import fetch_news
+    ENHANCED_FETCHERS = False
     logger.warning("Using fallback fetchers - enhanced modules not found")
 
 try:
-    from analysis.metrics import score_stock
+    from analysis.metrics import score_stock, SCORING_VERSION
 except ImportError:
     # Fallback scoring function if analysis module not available
     logger.warning("Analysis module not found, using default scoring")
+    SCORING_VERSION = 0
     def score_stock(data):
         """Default scoring function"""
         # Simple scoring based on available metrics
@@ -71,6 +76,22 @@ except ImportError:
         
         return score, rec, reasons
 
+from analysis.entities import link_news_to_assets
+from analysis.sentiment import score_news_sentiment
+from fetchers.history_cache import HistoryCache
+from analysis.indicator_cache import get_indicator_cache
+from pipeline.universe import load_universe, load_watchlist, prioritize, universes_for
+from pipeline.publish import SECTIONS, ProgressivePublisher, file_lock, merge_sections, write_json_atomic
+from pipeline.deadline import Deadline, completed_by_deadline, out_of_time, set_deadline
+from pipeline.carry_forward import carry_forward, count_stale, oldest_stale_since, utc_iso
+from pipeline.checkpoint import RunCheckpoint
+from analysis.indicator_state import IndicatorStore
+from analysis.input_hash import input_hash, reset_reuse_stats, reuse_derived, reuse_stats
+from fetchers.concurrency import limiter_stats, save_limits
+from fetchers.retry import get_retry_budget, reset_retry_budget
+from fetchers.ticker_context import context_stats, reset_contexts
+from pipeline.market_calendar import FULL, QUOTES, SKIP, parse_time, plan_section
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -78,6 +99,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), '../app/public/latest_data.json')
+# Last complete snapshot: what the next run carries forward from (partial snapshots never replace it)
+BASELINE_PATH = os.path.join(os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../data')),
+                             'last_complete.json')
+QUOTES_TARGET_SECONDS = 10
+# The app's long-standing 30 Nifty / 28 US names; nifty50, sp100 (or larger, once their
+# lists are dropped into scripts/universes/) are opt-in
+INDIA_UNIVERSE = os.getenv('MARKET_INDIA_UNIVERSE', 'nifty_core')
+US_UNIVERSE = os.getenv('MARKET_US_UNIVERSE', 'us_core')
+PUBLISH_INTERVAL = float(os.getenv('MARKET_PUBLISH_INTERVAL', '5'))
+FIRST_CHUNK = 10  # top names published within seconds
+RUN_DEADLINE = float(os.getenv('MARKET_DEADLINE', '0')) or None  # seconds; default scales with universe size
+REVALIDATE = os.getenv('MARKET_REVALIDATE', '1') != '0'  # retry stale assets after publishing
+CALENDAR = os.getenv('MARKET_CALENDAR', '1') != '0'  # skip markets that have not traded since the last fetch
+SECTION_KEYS = {'nifty': 'nifty_50', 'us': 'us_stocks', 'crypto': 'crypto', 'news': 'news'}
+SECTION_MARKETS = {'nifty_50': 'NSE', 'us_stocks': 'NYSE'}  # crypto trades 24/7 and is always fetched
+SECTION_ALIASES = {'india': 'nifty_50', 'nifty': 'nifty_50', 'us': 'us_stocks'}
+SCORE_FIELDS = ('score', 'recommendation', 'reasons')
+# Not scoring inputs: derived, ranking, news linking and staleness fields
+UNHASHED_FIELDS = SCORE_FIELDS + ('rank', 'input_hash', 'news', 'news_sentiment', 'stale', 'stale_since')
+
 def sanitize_for_json(obj):
     """
     Recursively sanitize data to remove NaN and Infinity values.
@@ -92,17 +134,25 @@ def sanitize_for_json(obj):
         return obj
     return obj
 
-def analyze_and_score_stocks(stock_dict):
-    """Analyze and score stocks"""
+def analyze_and_score_stocks(stock_dict, previous=None):
+    """Analyze and score stocks
+    
+    Records scored here (fallback fetchers) are tagged with an input hash;
+    given the ``previous`` records, unchanged ones reuse their previous score.
+    """
+    previous = {s['symbol']: s for s in previous or [] if s.get('symbol')}
     analyzed = []
     for ticker, data in stock_dict.items():
         try:
             # If stock already has score and recommendation (from enhanced fetcher), use it
             if 'score' not in data or 'recommendation' not in data:
-                score, rec, reasons = score_stock(data)
-                data['score'] = score
-                data['recommendation'] = rec
-                data['reasons'] = reasons if 'reasons' not in data else data['reasons']
+                inputs = {k: v for k, v in data.items() if k not in UNHASHED_FIELDS}
+                digest = input_hash(inputs, version=SCORING_VERSION)
+                if not reuse_derived(data, previous.get(ticker), digest, SCORE_FIELDS, section='stocks'):
+                    score, rec, reasons = score_stock(data)
+                    data['score'] = score
+                    data['recommendation'] = rec
+                    data['reasons'] = reasons if 'reasons' not in data else data['reasons']
             analyzed.append(data)
         except Exception as e:
             logger.warning(f"Error scoring {ticker}: {e}")
@@ -122,34 +172,391 @@ def analyze_and_score_stocks(stock_dict):
     
     return analyzed
 
-def main():
-    """Main optimized execution"""
+def read_snapshot(path):
+    """JSON snapshot at ``path``, or None if missing/unreadable"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_previous_output(path=None):
+    """Load the last complete snapshot, or None if missing/unreadable
+    
+    By default this is the baseline kept by final writes, falling back to
+    the published file (which may hold a partial snapshot).
+    """
+    paths = [path] if path else [BASELINE_PATH, OUTPUT_PATH]
+    for candidate in paths:
+        snapshot = read_snapshot(candidate)
+        if snapshot is not None:
+            return snapshot
+    logger.warning(f"No previous output at {' or '.join(paths)}")
+    return None
+
+def write_output(app_data, path=None, sections=None, partial=False, baseline=None):
+    """Sanitize and atomically write the app payload
+    
+    With ``sections``, only those sections are taken from ``app_data`` and
+    merged into the snapshot on disk; the read-merge-write holds a file lock
+    so concurrent section runs don't lose each other's updates.
+    
+    Final writes also update the ``baseline`` (BASELINE_PATH when writing
+    to the default path); ``partial`` snapshots published mid-run only
+    update the app's file, so a cancelled run never leaves a truncated
+    baseline behind.
+    """
+    if path is None:
+        path, baseline = OUTPUT_PATH, baseline or BASELINE_PATH
+    for target in ([path] if partial or not baseline else [path, baseline]):
+        with file_lock(target):
+            data = app_data
+            if sections is not None:
+                # A baseline not kept yet starts from the published file
+                data = merge_sections(read_snapshot(target) or read_snapshot(path), app_data, sections)
+            write_json_atomic(target, sanitize_for_json(data), indent=2)
+    return path
+
+def parse_sections(value):
+    """'crypto,news' -> ['crypto', 'news'] (accepts india/nifty/us aliases)"""
+    sections = []
+    for name in filter(None, (part.strip().lower() for part in value.split(','))):
+        name = SECTION_ALIASES.get(name, name)
+        if name not in SECTIONS:
+            raise argparse.ArgumentTypeError(f"unknown section '{name}' (choose from {', '.join(SECTIONS)})")
+        sections.append(name)
+    if not sections:
+        raise argparse.ArgumentTypeError("no sections given")
+    return list(dict.fromkeys(sections))
+
+def market_caps_from(app_data):
+    """{symbol: market cap} from a previous snapshot, used for fetch priority"""
+    stocks = (app_data or {}).get('nifty_50', []) + (app_data or {}).get('us_stocks', [])
+    return {s['symbol']: s.get('market_cap') for s in stocks if s.get('symbol')}
+
+def plan_sections(previous, expected, now=None):
+    """
+    SKIP, QUOTES or FULL per stock section, from the market calendars.
+    
+    ``fetched_at`` in the previous snapshot records each section's last
+    complete full fetch. A section is only skipped or quote-refreshed when
+    the previous snapshot already holds every expected symbol.
+    """
+    fetched_at = previous.get('fetched_at', {})
+    plans = {}
+    for section, market in SECTION_MARKETS.items():
+        have = {s.get('symbol') for s in previous.get(section, [])}
+        if not set(expected[section]) <= have:
+            plans[section] = FULL
+        else:
+            plans[section] = plan_section(market, fetched_at.get(section), now)
+    return plans
+
+def last_refresh(app_data, section):
+    """Latest full fetch or quote refresh of a section, as an ISO string"""
+    times = [app_data.get(field, {}).get(section) for field in ('fetched_at', 'quoted_at')]
+    return max((t for t in times if parse_time(t)), key=parse_time, default=None)
+
+def refresh_stock_quotes(stocks, quotes, history_cache, indicator_store):
+    """Apply batch quotes to stock records in place; returns how many were refreshed"""
+    from fetchers.stocks_enhanced import refresh_from_quote
+    
+    refreshed = 0
+    for symbol, quote in quotes.items():
+        if symbol not in stocks or not quote.get('regularMarketPrice'):
+            continue
+        price, ts = quote['regularMarketPrice'], quote.get('regularMarketTime') or int(time.time())
+        # Seed streaming state from the cached history once; then O(1) per refresh
+        indicator_store.get_or_seed(symbol, history_cache.get(symbol))
+        indicators = indicator_store.update(symbol, price, ts)
+        history = history_cache.append_price(symbol, price, ts)
+        if refresh_from_quote(stocks[symbol], quote, history[1] if history else None, indicators):
+            refreshed += 1
+    return refreshed
+
+def apply_stale_coverage(coverage, app_data):
+    """Fresh/stale counts and the oldest stale_since per asset section"""
+    for section in ('nifty_50', 'us_stocks', 'crypto'):
+        records = app_data.get(section, [])
+        stale = count_stale(records)
+        entry = coverage.get(section)
+        if not stale and not (entry and entry.get('stale')):
+            continue
+        fresh = len(records) - stale
+        entry = coverage.setdefault(section, {'fetched': fresh, 'processed': fresh, 'total': 0})
+        entry.update(fetched=fresh, total=max(entry['total'], len(records)))
+        if stale:
+            entry.update(stale=stale, stale_since=oldest_stale_since(records))
+        else:
+            entry.pop('stale', None)
+            entry.pop('stale_since', None)
+    return coverage
+
+def revalidate_stale(app_data, stock_kwargs=None, crypto_kwargs=None, sections=None):
+    """
+    Retry the assets carried forward as stale, after the stale snapshot has
+    been published, within what is left of the run deadline. Recovered
+    records replace their stale copies and the output is rewritten.
+    
+    Args:
+        sections: Only revalidate (and rewrite) these sections (default: all)
+    
+    Returns:
+        Number of assets recovered
+    """
+    selected = sections or SECTIONS
+    recovered = 0
+    for section in ('nifty_50', 'us_stocks'):
+        stale = {s['symbol']: s for s in app_data.get(section, []) if s.get('stale')}
+        if section not in selected or not stale or out_of_time():
+            continue
+        logger.info(f"🔁 Revalidating {len(stale)} stale {section} records...")
+        try:
+            fresh = fetch_stock_data(list(stale), **(stock_kwargs or {}))
+        except Exception as e:
+            logger.warning(f"Revalidation of {section} failed: {e}")
+            continue
+        for symbol, data in fresh.items():
+            # News links were computed for the stale copy; keep them
+            data.update({k: stale[symbol][k] for k in ('news', 'news_sentiment') if k in stale[symbol]})
+        records = {s['symbol']: s for s in app_data[section]}
+        records.update(fresh)
+        app_data[section] = analyze_and_score_stocks(records)
+        recovered += len(fresh)
+    
+    stale_ids = [c['id'] for c in app_data.get('crypto', []) if c.get('stale')]
+    if 'crypto' in selected and stale_ids and not out_of_time():
+        logger.info(f"🔁 Revalidating {len(stale_ids)} stale crypto records...")
+        try:
+            fresh = {c['id']: c for c in fetch_crypto_data(ids=stale_ids, **(crypto_kwargs or {}))}
+        except Exception as e:
+            logger.warning(f"Revalidation of crypto failed: {e}")
+            fresh = {}
+        app_data['crypto'] = [fresh.get(c['id'], c) for c in app_data['crypto']]
+        recovered += len(fresh)
+    
+    if recovered:
+        apply_stale_coverage(app_data.get('coverage', {}), app_data)
+        app_data['last_updated'] = datetime.now(timezone.utc).isoformat()
+        write_output(app_data, sections=sections)
+        logger.info(f"✓ Revalidated {recovered} stale records")
+    return recovered
+
+def run_quotes_refresh():
+    """
+    Quotes-only fast refresh: fetch latest prices for every published stock
+    and crypto asset, append them to the cached histories, recompute only
+    price-derived fields and rewrite the output. No fundamentals or history
+    requests are made, and markets that have not traded since their last
+    refresh are left alone.
+    """
+    from fetchers.crypto_enhanced import fetch_simple_prices, refresh_from_price, history_key
+    from fetchers.yahoo_client import fetch_batch_quotes
+    
+    overall_start = time.time()
+    run_started = datetime.now(timezone.utc).isoformat()
+    reset_retry_budget()
+    logger.info("⚡ Quotes-only refresh")
+    
+    app_data = load_previous_output()
+    if not app_data:
+        logger.error("Quotes refresh needs a previous full run; run with --mode full first")
+        return 1
+    
+    history_cache = HistoryCache()
+    indicator_store = IndicatorStore()
+    sections = [section for section, market in SECTION_MARKETS.items()
+                if not CALENDAR or plan_section(market, last_refresh(app_data, section)) != SKIP]
+    for section in set(SECTION_MARKETS) - set(sections):
+        logger.info(f"⏸ {section}: no session since the last refresh, skipped")
+    stocks = {s['symbol']: s for section in sections for s in app_data.get(section, [])}
+    cryptos = {c['id']: c for c in app_data.get('crypto', []) if c.get('id')}
+    
+    # Both quote sources in parallel: ~1 request per 100 stocks + 1 for all coins
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stock_future = executor.submit(fetch_batch_quotes, list(stocks)) if stocks else None
+        crypto_future = executor.submit(fetch_simple_prices, list(cryptos)) if cryptos else None
+        try:
+            stock_quotes = stock_future.result() if stock_future else {}
+        except Exception as e:
+            logger.error(f"Stock quotes failed: {e}")
+            stock_quotes = {}
+        try:
+            crypto_prices = crypto_future.result() if crypto_future else {}
+        except Exception as e:
+            logger.error(f"Crypto prices failed: {e}")
+            crypto_prices = {}
+    
+    refreshed_stocks = refresh_stock_quotes(stocks, stock_quotes, history_cache, indicator_store)
+    refreshed_sections = list(sections) if stock_quotes else []
+    if stock_quotes:
+        app_data['quoted_at'] = dict(app_data.get('quoted_at', {}), **{section: run_started for section in sections})
+    
+    refreshed_crypto = 0
+    for coin_id, price_info in crypto_prices.items():
+        if coin_id not in cryptos or not price_info.get('usd'):
+            continue
+        key = history_key(coin_id)
+        price, ts = price_info['usd'], price_info.get('last_updated_at') or int(time.time())
+        indicator_store.get_or_seed(key, history_cache.get(key))
+        indicators = indicator_store.update(key, price, ts)
+        history = history_cache.append_price(key, price, ts)
+        if refresh_from_price(cryptos[coin_id], price_info, history, indicators):
+            refreshed_crypto += 1
+    if refreshed_crypto:
+        refreshed_sections.append('crypto')
+    
+    # Re-rank with the refreshed scores
+    for section in sections:
+        app_data[section] = analyze_and_score_stocks({s['symbol']: s for s in app_data.get(section, [])})
+    app_data['last_updated'] = datetime.now(timezone.utc).isoformat()
+    app_data['refresh_mode'] = 'quotes'
+    app_data['updated_at'] = dict(app_data.get('updated_at', {}), **dict.fromkeys(refreshed_sections, run_started))
+    
+    # Merge, so sections refreshed meanwhile by another run are kept
+    output_path = write_output(app_data, sections=refreshed_sections)
+    history_cache.save()
+    indicator_store.save()
+    save_limits()
+    
+    elapsed = time.time() - overall_start
+    logger.info(f"✅ Quotes refresh: {refreshed_stocks}/{len(stocks)} stocks, "
+                f"{refreshed_crypto}/{len(cryptos)} crypto in {elapsed:.1f}s → {output_path}")
+    if elapsed > QUOTES_TARGET_SECONDS:
+        logger.warning(f"Quotes refresh exceeded the {QUOTES_TARGET_SECONDS}s target")
+    return 0
+
+def main(india_universe=INDIA_UNIVERSE, us_universe=US_UNIVERSE, limit=None, deadline_seconds=RUN_DEADLINE,
+         revalidate=REVALIDATE, calendar=CALENDAR, sections=None, resume=None):
+    """Main optimized execution
+    
+    The whole run shares one deadline: fetchers size their timeouts from the
+    time left, stragglers are abandoned when it expires, and the output is
+    finalised from what was collected plus stale previous-run records.
+    
+    With ``calendar``, a stock market that has not traded since its last
+    full fetch is carried forward without upstream calls, and one that is
+    mid-session only gets a batch quote refresh.
+    
+    With ``sections`` (e.g. ['crypto', 'news']) only those sections are
+    fetched and analysed; they are merged into the existing snapshot and
+    every other section is left as it is on disk.
+    
+    Completed stages are checkpointed under data/runs/<run-id>/; ``resume``
+    (a run id, or 'latest') reloads them so an interrupted run only redoes
+    what it had not finished.
+    """
     overall_start = time.time()
+    run_started = datetime.now(timezone.utc).isoformat()
+    selected = list(sections or SECTIONS)
+    checkpoint = RunCheckpoint.open(resume) if resume else None
+    if resume and checkpoint is None:
+        logger.warning(f"Nothing to resume for '{resume}', starting a new run")
+    if checkpoint is not None:
+        # Same sections, plans and timestamps as the interrupted attempt
+        run_started, selected = checkpoint.manifest['run_started'], checkpoint.manifest['sections']
+        logger.info(f"↩ Resuming run {checkpoint.run_id} (completed: {', '.join(checkpoint.stages) or 'nothing'})")
+    # Full runs rewrite the snapshot; section runs merge into it
+    merge = None if set(selected) == set(SECTIONS) else selected
     logger.info("=" * 60)
-    logger.info("Starting OPTIMIZED Market Data Generation")
+    logger.info("Starting OPTIMIZED Market Data Generation" + (f" ({', '.join(selected)})" if merge else ""))
     logger.info("=" * 60)
     
+    # A resumed run starts from the same snapshot as the interrupted attempt, not from its partial output
+    if checkpoint is not None and checkpoint.has('previous'):
+        previous = checkpoint.load('previous')
+    else:
+        previous = load_previous_output() or {}
+    
+    # Watchlist first, then by last known market cap
+    watchlist = load_watchlist()
+    market_caps = market_caps_from(previous)
+    india_tickers = prioritize(load_universe(india_universe, limit), watchlist, market_caps)
+    us_tickers = prioritize(load_universe(us_universe, limit), watchlist, market_caps)
+    logger.info(f"Universes: {india_universe} ({len(india_tickers)}), {us_universe} ({len(us_tickers)})")
+    
+    expected = {'nifty_50': india_tickers, 'us_stocks': us_tickers}
+    plans = plan_sections(previous, expected) if calendar else dict.fromkeys(SECTION_MARKETS, FULL)
+    if not ENHANCED_FETCHERS:
+        # Quote refreshes need the enhanced fetchers' history cache
+        plans = {section: FULL if plan == QUOTES else plan for section, plan in plans.items()}
+    plans = {section: plan for section, plan in plans.items() if section in selected}
+    if checkpoint is not None:
+        plans = checkpoint.manifest['plans']
+    else:
+        checkpoint = RunCheckpoint.create(previous=previous, run_started=run_started, sections=selected, plans=plans)
+    logger.info(f"Section plans: {plans}")
+    
+    # Interrupted after analysis (e.g. while writing): only the write is left
+    if checkpoint.has('analysis'):
+        output_path = write_output(checkpoint.load('analysis'), sections=merge)
+        checkpoint.finish()
+        logger.info(f"✅ Resumed run {checkpoint.run_id}: output written in {time.time() - overall_start:.1f}s → {output_path}")
+        return 0
+    
+    # 2 minutes for the default universes; ~1s per ticker for Nifty 500 / S&P 500 runs
+    deadline = Deadline(deadline_seconds or max(120, sum(len(expected[section]) for section in plans)))
+    set_deadline(deadline)
+    reset_retry_budget()
+    reset_contexts()
+    reset_reuse_stats()
+    logger.info(f"Run deadline: {deadline.seconds:.0f}s")
+    
+    # Partial snapshots while the long tail is still streaming in
+    publisher = ProgressivePublisher(
+        lambda payload: write_output(payload, sections=merge, partial=True),
+        base=dict(previous, refresh_mode='full'),
+        totals={section: len(expected[section]) for section in plans},
+        min_interval=PUBLISH_INTERVAL
+    )
+    
     # Use ThreadPoolExecutor to fetch all data sources in parallel
     results = {}
     
+    # Full runs feed the history cache used by quotes-only refreshes
+    history_cache = HistoryCache() if ENHANCED_FETCHERS else None
+    indicator_store = IndicatorStore() if QUOTES in plans.values() else None
+    indicator_cache = get_indicator_cache()
+    indicator_cache.attach_disk()
+    cache_kwargs = {'history_cache': history_cache} if ENHANCED_FETCHERS else {}
+    # Failed coin histories fall back to the last good indicators
+    crypto_kwargs = dict(cache_kwargs, previous=previous.get('crypto')) if ENHANCED_FETCHERS else {}
+    
+    def stock_kwargs(section):
+        if not ENHANCED_FETCHERS:
+            return {}
+        def on_progress(processed, total, partial):
+            publisher.update(section, analyze_and_score_stocks(partial), processed, total)
+        return dict(cache_kwargs, label=section, first_chunk=FIRST_CHUNK, on_progress=on_progress,
+                    previous=previous.get(section))
+    
+    def refresh_section_quotes(key):
+        from fetchers.yahoo_client import fetch_batch_quotes
+        section = SECTION_KEYS[key]
+        logger.info(f"⚡ {section} is mid-session, refreshing quotes only...")
+        stocks = {s['symbol']: dict(s) for s in previous.get(section, [])}
+        refreshed = refresh_stock_quotes(stocks, fetch_batch_quotes(list(stocks)), history_cache, indicator_store)
+        logger.info(f"✓ {section}: {refreshed}/{len(stocks)} quotes refreshed")
+        return key, stocks
+    
     def fetch_india_stocks():
         logger.info("📊 Fetching India stocks...")
         start = time.time()
-        data = fetch_stock_data(NIFTY_50_TICKERS[:30])  # Top 30 for speed
+        data = fetch_stock_data(india_tickers, **stock_kwargs('nifty_50'))
         logger.info(f"✓ India stocks completed in {time.time() - start:.1f}s")
         return 'nifty', data
     
     def fetch_us_stocks():
         logger.info("📊 Fetching US stocks...")
         start = time.time()
-        data = fetch_stock_data(US_TICKERS[:28])  # Top 28 for speed
+        data = fetch_stock_data(us_tickers, **stock_kwargs('us_stocks'))
         logger.info(f"✓ US stocks completed in {time.time() - start:.1f}s")
         return 'us', data
     
     def fetch_crypto():
         logger.info("₿ Fetching cryptocurrency data...")
         start = time.time()
-        data = fetch_crypto_data()
+        data = fetch_crypto_data(**crypto_kwargs)
         logger.info(f"✓ Crypto completed in {time.time() - start:.1f}s")
         return 'crypto', data
     
@@ -160,49 +567,144 @@ def main():
         logger.info(f"✓ News completed in {time.time() - start:.1f}s")
         return 'news', data
     
-    # Parallel execution
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [
-            executor.submit(fetch_india_stocks),
-            executor.submit(fetch_us_stocks),
-            executor.submit(fetch_crypto),
-            executor.submit(fetch_news_data)
-        ]
-        
-        for future in as_completed(futures):
-            try:
-                key, data = future.result()
-                results[key] = data
-            except Exception as e:
-                logger.error(f"Error in parallel fetch: {e}")
+    # Sections already fetched by an interrupted attempt of this run
+    for key, section in SECTION_KEYS.items():
+        if section in selected and checkpoint.has(f'fetch.{section}'):
+            results[key] = checkpoint.load(f'fetch.{section}')
+            records = analyze_and_score_stocks(results[key]) if isinstance(results[key], dict) else results[key]
+            publisher.update(section, records)
+            logger.info(f"↩ {section}: restored from checkpoint")
+    
+    # Closed markets (and sections not selected) are carried forward as they are
+    for key in ('nifty', 'us'):
+        plan = plans.get(SECTION_KEYS[key])
+        if plan == SKIP:
+            logger.info(f"⏸ {SECTION_KEYS[key]}: no session since the last fetch, carried forward")
+        if plan in (SKIP, None) and key not in results:
+            results[key] = {s['symbol']: s for s in previous.get(SECTION_KEYS[key], [])}
+    
+    # Parallel execution, collected until just before the deadline
+    executor = ThreadPoolExecutor(max_workers=4)
+    futures = [executor.submit(fetch) for section, fetch in (('crypto', fetch_crypto), ('news', fetch_news_data))
+               if section in selected and section not in results]
+    for key, fetch in (('nifty', fetch_india_stocks), ('us', fetch_us_stocks)):
+        plan = plans.get(SECTION_KEYS[key]) if key not in results else None
+        if plan == QUOTES:
+            futures.append(executor.submit(refresh_section_quotes, key))
+        elif plan == FULL:
+            futures.append(executor.submit(fetch))
+    
+    for future in completed_by_deadline(futures, label='sections', reserve=deadline.reserve / 2):
+        try:
+            key, data = future.result()
+            results[key] = data
+            checkpoint.save(f'fetch.{SECTION_KEYS[key]}', data)
+            records = analyze_and_score_stocks(data, previous.get(SECTION_KEYS[key])) if isinstance(data, dict) else data
+            publisher.update(SECTION_KEYS[key], records)
+        except Exception as e:
+            logger.error(f"Error in parallel fetch: {e}")
+    
+    # Don't wait for stragglers; their threads are abandoned
+    finished = all(f.done() for f in futures)
+    executor.shutdown(wait=finished, cancel_futures=True)
+    
+    # Sections cut off by the deadline keep the chunks they had finished
+    for key in ('nifty', 'us'):
+        if key not in results:
+            results[key] = {s['symbol']: s for s in publisher.partial(SECTION_KEYS[key])}
+    
+    # Assets missing from this run keep their last good records, marked stale
+    since = utc_iso(previous.get('last_updated'))
+    nifty = carry_forward(results['nifty'], previous.get('nifty_50'), india_tickers, label='nifty_50', since=since)
+    us = carry_forward(results['us'], previous.get('us_stocks'), us_tickers, label='us_stocks', since=since)
+    crypto_fresh = {c['id']: c for c in results.get('crypto', []) if c.get('id')}
+    if 'crypto' in selected:
+        crypto_data = list(carry_forward(crypto_fresh, previous.get('crypto'), load_universe('crypto'),
+                                         key='id', label='crypto', since=since).values())
+    else:
+        crypto_data = previous.get('crypto', [])
+    news_data = results.get('news')
+    news_stale_since = None
+    if 'news' not in selected:
+        news_data = previous.get('news', [])
+    elif not news_data:
+        news_data = previous.get('news', [])
+        news_stale_since = previous.get('coverage', {}).get('news', {}).get('stale_since') or since
+        logger.warning(f"No fresh news this run, keeping {len(news_data)} previous articles")
     
     # Analyze stocks
     logger.info("🔍 Analyzing and scoring stocks...")
-    analyzed_nifty = analyze_and_score_stocks(results.get('nifty', {}))
-    analyzed_us = analyze_and_score_stocks(results.get('us', {}))
-    crypto_data = results.get('crypto', [])
-    news_data = results.get('news', [])
+    analyzed_nifty = analyze_and_score_stocks(nifty)
+    analyzed_us = analyze_and_score_stocks(us)
+    
+    # Link news articles to the assets they mention
+    logger.info("🔗 Linking news to assets...")
+    try:
+        link_news_to_assets(news_data, analyzed_nifty + analyzed_us, crypto_data)
+    except Exception as e:
+        logger.warning(f"News entity linking skipped: {e}")
+    
+    # Score news sentiment (memoized per article) and aggregate per asset/category
+    news_sentiment = {}
+    try:
+        news_sentiment = score_news_sentiment(news_data, analyzed_nifty + analyzed_us + crypto_data)
+    except Exception as e:
+        logger.warning(f"News sentiment scoring skipped: {e}")
     
     # Generate final JSON
     logger.info("📦 Generating final output...")
+    coverage = publisher.final_coverage()
+    if news_stale_since:
+        coverage['news'] = {'fetched': 0, 'processed': 0, 'total': len(news_data),
+                            'stale': len(news_data), 'stale_since': news_stale_since}
     app_data = {
-        "last_updated": datetime.now().isoformat(),
+        "last_updated": datetime.now(timezone.utc).isoformat(),
         "nifty_50": analyzed_nifty,
         "us_stocks": analyzed_us,
         "crypto": crypto_data,
-        "news": news_data
+        "news": news_data,
+        "news_sentiment": news_sentiment,
+        "refresh_mode": "full",
+        "complete": finished,
+        "coverage": coverage
     }
+    apply_stale_coverage(coverage, app_data)
     
-    # Sanitize
-    app_data = sanitize_for_json(app_data)
+    # When each market section was last fetched in full (or quote-refreshed)
+    fetched_at, quoted_at = dict(previous.get('fetched_at', {})), dict(previous.get('quoted_at', {}))
+    for section, plan in plans.items():
+        coverage.setdefault(section, {'fetched': 0, 'processed': 0, 'total': 0})['plan'] = plan
+        if plan == SKIP:
+            coverage[section].update(fetched=0, processed=len(app_data[section]), total=len(app_data[section]))
+        elif plan == QUOTES:
+            quoted_at[section] = run_started
+        elif finished and app_data[section] and not count_stale(app_data[section]):
+            fetched_at[section] = run_started
+    app_data['fetched_at'] = fetched_at
+    app_data['quoted_at'] = quoted_at
     
-    # Save JSON
-    output_dir = os.path.join(os.path.dirname(__file__), '../app/public')
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, 'latest_data.json')
+    # When each section last received fresh data
+    fresh = {'nifty_50': plans.get('nifty_50') not in (SKIP, None) and results['nifty'],
+             'us_stocks': plans.get('us_stocks') not in (SKIP, None) and results['us'],
+             'crypto': crypto_fresh, 'news': 'news' in selected and not news_stale_since}
+    app_data['updated_at'] = dict(previous.get('updated_at', {}),
+                                  **{section: run_started for section, ok in fresh.items() if ok})
     
-    with open(output_path, 'w') as f:
-        json.dump(app_data, f, indent=2)
+    # Sanitize and save JSON (section runs merge into the current snapshot)
+    checkpoint.save('analysis', app_data)
+    output_path = write_output(app_data, sections=merge)
+    
+    # Stale records are already published; retry them with the time left
+    if revalidate and finished:
+        revalidate_stale(app_data, dict(cache_kwargs), crypto_kwargs, sections=merge)
+    
+    if history_cache is not None:
+        history_cache.save()
+    if indicator_store is not None:
+        indicator_store.save()
+    indicator_cache.save()
+    save_limits()
+    checkpoint.finish()
     
     # Summary
     elapsed = time.time() - overall_start
@@ -214,16 +716,65 @@ def main():
     logger.info(f"  - {len(analyzed_us)} US stocks")
     logger.info(f"  - {len(crypto_data)} crypto assets")
     logger.info(f"  - {len(news_data)} news articles")
+    logger.info(f"Indicator cache: {indicator_cache.stats()}")
+    logger.info(f"Concurrency limits: {limiter_stats()}")
+    logger.info(f"Retries: {get_retry_budget().stats()}")
+    logger.info(f"Upstream calls: {context_stats()}")
+    logger.info(f"Derived fields recomputed/reused: {reuse_stats()}")
     logger.info(f"Output: {output_path}")
     logger.info("=" * 60)
+    if not finished:
+        logger.warning(f"Run deadline of {deadline.seconds:.0f}s reached; published partial results with stale carry-forward")
+    set_deadline(None)
+    reset_contexts()
     
-    # Return success code
-    return 0 if elapsed < 120 else 1  # Success if under 2 minutes
+    # A deadline-limited run still published a valid snapshot
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate app market data")
+    parser.add_argument('--mode', choices=['full', 'quotes'], default='full',
+                        help="full: fetch and recompute everything; quotes: refresh prices only")
+    parser.add_argument('--india-universe', choices=universes_for('NSE'),
+                        default=INDIA_UNIVERSE, help="India constituent list (default: %(default)s)")
+    parser.add_argument('--us-universe', choices=universes_for('NYSE'),
+                        default=US_UNIVERSE, help="US constituent list (default: %(default)s)")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="Only the first N constituents of each universe")
+    parser.add_argument('--deadline', type=float, default=RUN_DEADLINE,
+                        help="Run deadline in seconds (default: max(120, number of tickers))")
+    parser.add_argument('--no-revalidate', dest='revalidate', action='store_false', default=REVALIDATE,
+                        help="Don't retry stale (carried-forward) assets after publishing")
+    parser.add_argument('--no-calendar', dest='calendar', action='store_false', default=CALENDAR,
+                        help="Fetch every market in full even if it has not traded since the last run")
+    parser.add_argument('--resume', metavar='RUN_ID', default=None,
+                        help="Reuse the completed stages of an interrupted run (a run id under data/runs, "
+                             "or 'latest')")
+    parser.add_argument('--sections', type=parse_sections, default=None,
+                        help=f"Comma-separated sections to refresh and merge into the existing output "
+                             f"({', '.join(SECTIONS)}; default: all)")
+    return parser.parse_args(argv)
+
+def exit_now(code):
+    """Exit, without joining worker threads that were abandoned at the deadline"""
+    stragglers = [t for t in threading.enumerate() if t is not threading.main_thread() and t.is_alive()]
+    if not stragglers:
+        sys.exit(code)
+    logger.warning(f"Exiting with {len(stragglers)} abandoned worker threads")
+    logging.shutdown()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(code)
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        exit_code = main()
-        sys.exit(exit_code)
+        if args.mode == 'quotes':
+            exit_code = run_quotes_refresh()
+        else:
+            exit_code = main(args.india_universe, args.us_universe, args.limit, args.deadline, args.revalidate,
+                             args.calendar, args.sections, args.resume)
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
-        sys.exit(1)
+        exit_code = 1
+    exit_now(exit_code)
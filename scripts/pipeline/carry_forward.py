@@ -0,0 +1,93 @@
+"""
+Carry-forward of previous-run records.
+
+When a run stops at its deadline (or a source fails), assets that were
+expected but not fetched keep their last published record instead of
+disappearing from the app. Carried records are copies marked
+``stale: true`` with ``stale_since``, the time they were last good (kept
+across consecutive stale runs), so the UI can flag and age them.
+
+``overlay`` applies the same rule to partial snapshots published mid-run:
+records not fetched yet stay as stale copies, so a section never shrinks
+while it is still streaming in.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def carry_forward(
+    fresh: Dict[str, Dict],
+    previous: Optional[List[Dict]],
+    expected: Iterable[str],
+    key: str = 'symbol',
+    label: str = 'records',
+    since: Optional[str] = None
+) -> Dict[str, Dict]:
+    """
+    Fill in expected assets missing from this run with their previous records.
+
+    Args:
+        fresh: This run's records by key
+        previous: Last published records of the same section
+        expected: Keys this run should have produced (the universe)
+        key: Record field holding the key ('symbol' for stocks, 'id' for crypto)
+        label: Name used in logs
+        since: When the previous records were published (their last good time)
+
+    Returns:
+        Fresh records followed by stale copies of missing ones, by key
+    """
+    merged = dict(fresh)
+    by_key = {r[key]: r for r in previous or [] if isinstance(r, dict) and r.get(key)}
+    missing = [k for k in dict.fromkeys(expected) if k not in merged]
+    carried = 0
+    for k in missing:
+        if k in by_key:
+            merged[k] = stale_copy(by_key[k], since)
+            carried += 1
+    if missing:
+        logger.warning(f"{label}: {len(missing)} missing this run, {carried} carried forward as stale")
+    return merged
+
+
+def stale_copy(record: Dict, since: Optional[str] = None) -> Dict:
+    """Copy of a previous record marked stale (keeping an earlier ``stale_since``)."""
+    return dict(record, stale=True, stale_since=record.get('stale_since') or since)
+
+
+def overlay(
+    fetched: List[Dict],
+    previous: Optional[List[Dict]],
+    key: str = 'symbol',
+    since: Optional[str] = None
+) -> List[Dict]:
+    """``fetched`` records followed by stale copies of the ``previous`` ones not fetched yet."""
+    seen = {r.get(key) for r in fetched if isinstance(r, dict)}
+    carried = [stale_copy(r, since) for r in previous or []
+               if isinstance(r, dict) and r.get(key) and r[key] not in seen]
+    return list(fetched) + carried
+
+
+def count_stale(records: List[Dict]) -> int:
+    return sum(1 for r in records if isinstance(r, dict) and r.get('stale'))
+
+
+def utc_iso(value: Optional[str]) -> Optional[str]:
+    """
+    ISO timestamp ``value`` in UTC, so timestamps sort chronologically as strings.
+    Naive values (``last_updated`` of older runs) are taken as local time;
+    anything unparseable is returned unchanged.
+    """
+    try:
+        return datetime.fromisoformat(value).astimezone(timezone.utc).isoformat()
+    except (TypeError, ValueError):
+        return value
+
+
+def oldest_stale_since(records: List[Dict]) -> Optional[str]:
+    """Earliest ``stale_since`` in a section (compared in UTC)."""
+    times = [r['stale_since'] for r in records if isinstance(r, dict) and r.get('stale') and r.get('stale_since')]
+    return min(times, key=utc_iso) if times else None
@@ -0,0 +1,173 @@
+"""
+Stage checkpoints for resumable runs.
+
+Each run gets a directory under data/runs/<run-id>/ holding one JSON file per
+completed stage (the snapshot the run started from, raw fetch results per
+section, which carry their indicators and scores, and the analysed payload
+before serialisation) plus a manifest.json describing the run. A rerun with ``--resume <run-id>``
+(or ``--resume latest`` for the newest unfinished run) loads the completed
+stages instead of fetching them again, so a crash while writing the output
+or a cancelled workflow costs seconds on the next attempt, not minutes.
+Stages are JSON, never pickle: data/ is restored from a shared Actions cache,
+so loading a stage must not be able to run code.
+
+Usage:
+    checkpoint = RunCheckpoint.create(sections=['crypto'])
+    if checkpoint.has('fetch.crypto'):
+        data = checkpoint.load('fetch.crypto')
+    else:
+        data = fetch_crypto_data()
+        checkpoint.save('fetch.crypto', data)
+    ...
+    checkpoint.finish()
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from pipeline.publish import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv('MARKET_DATA_DIR', os.path.join(os.path.dirname(__file__), '../../data'))
+RUNS_DIR = os.path.join(DATA_DIR, 'runs')
+MANIFEST = 'manifest.json'
+KEEP_RUNS = 5  # most recent run directories kept
+RESUME_MAX_AGE = 6 * 3600  # seconds; 'latest' ignores older unfinished runs
+CHECKPOINT_VERSION = 2
+
+
+def _json_default(value):
+    # NumPy scalars from the fetchers; anything else fails the save
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class RunCheckpoint:
+    """Completed stage outputs of one run, stored as JSON in its run directory."""
+
+    def __init__(self, run_id: str, root: str = RUNS_DIR):
+        self.run_id = run_id
+        self.path = os.path.join(root, run_id)
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                self.manifest: Dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    @classmethod
+    def create(cls, root: str = RUNS_DIR, previous: Optional[Dict] = None, **meta) -> 'RunCheckpoint':
+        """
+        Start a new run directory (and prune old ones).
+
+        Args:
+            root: Directory holding the run directories
+            previous: Snapshot the run starts from, saved as the 'previous' stage
+                so a resumed attempt carries forward from the same data
+            **meta: Kept in the manifest
+
+        Returns:
+            The new run's checkpoint
+        """
+        prune(root, KEEP_RUNS - 1)
+        now = datetime.now(timezone.utc)
+        run_id = now.strftime('%Y%m%dT%H%M%S%fZ')
+        checkpoint = cls(run_id, root)
+        os.makedirs(checkpoint.path, exist_ok=True)
+        checkpoint.manifest = dict(meta, run_id=run_id, created=now.isoformat(), version=CHECKPOINT_VERSION,
+                                   stages={}, finished=False)
+        checkpoint._write_manifest()
+        if previous is not None:
+            checkpoint.save('previous', previous)
+        return checkpoint
+
+    @classmethod
+    def open(cls, run_id: str, root: str = RUNS_DIR) -> Optional['RunCheckpoint']:
+        """An existing run to resume ('latest': newest recent unfinished run), or None."""
+        if run_id == 'latest':
+            run_id = latest_unfinished(root)
+            if run_id is None:
+                return None
+        checkpoint = cls(run_id, root)
+        if checkpoint.manifest.get('version') != CHECKPOINT_VERSION:
+            logger.warning(f"No usable checkpoint for run {run_id}")
+            return None
+        return checkpoint
+
+    def _stage_path(self, stage: str) -> str:
+        return os.path.join(self.path, f"{stage}.json")
+
+    def _write_manifest(self):
+        write_json_atomic(os.path.join(self.path, MANIFEST), self.manifest, indent=2)
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self.manifest.get('stages', {}))
+
+    def has(self, stage: str) -> bool:
+        return stage in self.manifest.get('stages', {}) and os.path.exists(self._stage_path(stage))
+
+    def load(self, stage: str) -> Any:
+        with open(self._stage_path(stage)) as f:
+            return json.load(f)
+
+    def save(self, stage: str, value: Any):
+        """Persist a completed stage; failures are logged, never raised."""
+        start = time.time()
+        try:
+            write_json_atomic(self._stage_path(stage), value, default=_json_default)
+            self.manifest.setdefault('stages', {})[stage] = datetime.now(timezone.utc).isoformat()
+            self._write_manifest()
+            logger.info(f"💾 Checkpointed {stage} ({time.time() - start:.2f}s)")
+        except Exception as e:
+            logger.warning(f"Could not checkpoint {stage}: {e}")
+
+    def finish(self):
+        """Mark the run finished; 'latest' resumes skip it."""
+        self.manifest['finished'] = True
+        try:
+            self._write_manifest()
+        except OSError as e:
+            logger.warning(f"Could not finish checkpoint {self.run_id}: {e}")
+
+
+def _manifests(root: str) -> List[Dict]:
+    try:
+        names = sorted(os.listdir(root), reverse=True)
+    except FileNotFoundError:
+        return []
+    manifests = []
+    for name in names:
+        manifest = RunCheckpoint(name, root).manifest
+        if manifest:
+            manifests.append(manifest)
+    return manifests
+
+
+def latest_unfinished(root: str = RUNS_DIR, max_age: float = RESUME_MAX_AGE) -> Optional[str]:
+    """Newest run that did not finish and started less than ``max_age`` seconds ago."""
+    now = datetime.now(timezone.utc)
+    for manifest in _manifests(root):
+        created = datetime.fromisoformat(manifest['created'])
+        if (now - created).total_seconds() > max_age:
+            break
+        if not manifest.get('finished'):
+            return manifest['run_id']
+    return None
+
+
+def prune(root: str = RUNS_DIR, keep: int = KEEP_RUNS):
+    """Delete all but the ``keep`` most recent run directories."""
+    try:
+        names = sorted(os.listdir(root), reverse=True)
+    except FileNotFoundError:
+        return
+    for name in names[keep:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
@@ -0,0 +1,105 @@
+"""
+Run-wide deadline.
+
+main_optimized starts one Deadline per run and installs it process-wide;
+fetchers then size every network timeout from the time remaining
+(``deadline_timeout(15)`` is 15s early in the run, less near the end) and
+stop waiting on stragglers once it expires, so the run always finishes in
+time to publish what it has. Without an installed deadline, helpers return
+their defaults unchanged.
+"""
+import logging
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout, as_completed
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+MIN_TIMEOUT = 1.0  # never hand a client a zero/negative timeout
+DEADLINE_RESERVE = 15.0  # seconds kept back for scoring and writing the output
+RESERVE_FRACTION = 0.2  # ...but at most this share of short budgets
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work is started after the run deadline."""
+
+
+class Deadline:
+    """
+    A monotonic point in time ``seconds`` from creation.
+
+    ``reserve`` seconds before it, fetching should stop so there is time to
+    score and write what was collected.
+    """
+
+    def __init__(self, seconds: float, reserve: Optional[float] = None):
+        self.seconds = seconds
+        self.reserve = min(DEADLINE_RESERVE, seconds * RESERVE_FRACTION) if reserve is None else reserve
+        self.started = time.monotonic()
+        self.expires = self.started + seconds
+
+    def remaining(self, reserve: float = 0.0) -> float:
+        """Seconds left (never negative), keeping ``reserve`` seconds back."""
+        return max(0.0, self.expires - reserve - time.monotonic())
+
+    def expired(self, reserve: float = 0.0) -> bool:
+        return self.remaining(reserve) <= 0
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def timeout(self, default: float, floor: float = MIN_TIMEOUT) -> float:
+        """``default`` capped at the remaining time, but at least ``floor``."""
+        return max(floor, min(default, self.remaining()))
+
+    def check(self, what: str = 'work'):
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired():
+            raise DeadlineExceeded(f"{what} skipped: run deadline of {self.seconds:.0f}s reached")
+
+
+_current: Optional[Deadline] = None
+
+
+def set_deadline(deadline: Optional[Deadline]):
+    """Install (or with None, clear) the process-wide run deadline."""
+    global _current
+    _current = deadline
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current
+
+
+def deadline_timeout(default: float) -> float:
+    """Network timeout for a request made now: ``default`` capped by the run deadline."""
+    return _current.timeout(default) if _current else default
+
+
+def out_of_time() -> bool:
+    """True once fetching should stop (the deadline less its reserve has passed)."""
+    return bool(_current and _current.expired(_current.reserve))
+
+
+def completed_by_deadline(futures: Iterable, label: str = 'tasks', reserve: Optional[float] = None) -> Iterator:
+    """
+    ``as_completed`` that stops at the run deadline instead of raising.
+
+    Waiting ends ``reserve`` seconds before the deadline (default: the
+    deadline's own reserve).
+
+    Futures still pending at the deadline are cancelled where possible and
+    logged; running ones are abandoned (the caller should shut its executor
+    down with ``wait=False``).
+    """
+    futures = list(futures)
+    timeout = None
+    if _current:
+        timeout = _current.remaining(_current.reserve if reserve is None else reserve)
+    try:
+        yield from as_completed(futures, timeout=timeout)
+    except FuturesTimeout:
+        pending = [f for f in futures if not f.done()]
+        cancelled = sum(f.cancel() for f in pending)
+        logger.warning(f"{label}: run deadline reached, abandoning {len(pending)} unfinished "
+                       f"({cancelled} not yet started)")
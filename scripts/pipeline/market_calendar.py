@@ -0,0 +1,147 @@
+"""
+Exchange calendars that decide what a run needs to fetch.
+
+Each market has regular session hours in its own time zone, weekends and
+holidays (including early closes) loaded from CSV files in
+scripts/calendars/ (``date,name,close`` rows; ``close`` is an early-close
+time, empty for a full holiday). Crypto trades around the clock.
+
+For each market section the pipeline asks ``plan(market, last_fetch)``:
+  FULL    a session has closed since the last fetch (or there was none);
+          checked first, so runs during trading hours still pick up each
+          completed session's fundamentals and history
+  QUOTES  the market is mid-session and every earlier session was fetched:
+          refresh prices only
+  SKIP    no session since the last successful fetch: nothing has changed,
+          carry the section forward without upstream calls
+
+Daily bars belong to the exchange-local date of their session:
+``session_day`` buckets timestamps that way (yfinance stamps NSE bars at
+00:00 IST, the previous day in UTC), so an intraday quote replaces the
+current session's bar instead of appending a new one.
+
+Holiday lists must be refreshed from the exchange circulars each year. A
+year with no listed holidays is treated as weekdays-only, so a missing list
+errs towards fetching rather than skipping.
+"""
+import csv
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_DIR = os.getenv('MARKET_CALENDAR_DIR', os.path.join(os.path.dirname(__file__), '../calendars'))
+
+SKIP, QUOTES, FULL = 'skip', 'quotes', 'full'
+MAX_LOOKBACK_DAYS = 14  # longest run of closed days searched for the last session
+
+
+class Market:
+    """Regular trading sessions of one exchange."""
+
+    def __init__(self, name: str, tz: str, open_time: time, close_time: time,
+                 calendar_file: Optional[str] = None, always_open: bool = False):
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.open_time = open_time
+        self.close_time = close_time
+        self.calendar_file = calendar_file
+        self.always_open = always_open
+        self._holidays: Optional[Dict[date, Optional[time]]] = None
+
+    @property
+    def holidays(self) -> Dict[date, Optional[time]]:
+        """date -> early close time, or None for a full holiday."""
+        if self._holidays is None:
+            self._holidays = load_holidays(self.calendar_file) if self.calendar_file else {}
+        return self._holidays
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """Open and close (aware datetimes) of ``day``'s session, or None if closed."""
+        if day.weekday() >= 5:
+            return None
+        close_time = self.close_time
+        if day in self.holidays:
+            close_time = self.holidays[day]
+            if close_time is None:
+                return None
+        return (datetime.combine(day, self.open_time, self.tz), datetime.combine(day, close_time, self.tz))
+
+    def is_open(self, at: datetime) -> bool:
+        if self.always_open:
+            return True
+        session = self.session(at.astimezone(self.tz).date())
+        return session is not None and session[0] <= at < session[1]
+
+    def last_close(self, at: datetime) -> Optional[datetime]:
+        """End of the most recent session that closed at or before ``at``."""
+        day = at.astimezone(self.tz).date()
+        for _ in range(MAX_LOOKBACK_DAYS):
+            session = self.session(day)
+            if session is not None and session[1] <= at:
+                return session[1]
+            day -= timedelta(days=1)
+        return None
+
+    def plan(self, last_fetch: Optional[datetime], now: Optional[datetime] = None) -> str:
+        """SKIP, QUOTES or FULL for a section last fetched (fully) at ``last_fetch``."""
+        now = now or datetime.now(timezone.utc)
+        if self.always_open or last_fetch is None:
+            return FULL
+        close = self.last_close(now)
+        if close is None or close > last_fetch:
+            return FULL
+        return QUOTES if self.is_open(now) else SKIP
+
+
+def load_holidays(filename: str) -> Dict[date, Optional[time]]:
+    path = os.path.join(CALENDAR_DIR, filename)
+    holidays = {}
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                close = (row.get('close') or '').strip()
+                holidays[date.fromisoformat(row['date'].strip())] = time.fromisoformat(close) if close else None
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Holiday calendar {path} unreadable, assuming weekdays only: {e}")
+    return holidays
+
+
+MARKETS = {
+    'NSE': Market('NSE', 'Asia/Kolkata', time(9, 15), time(15, 30), 'nse.csv'),
+    'NYSE': Market('NYSE', 'America/New_York', time(9, 30), time(16, 0), 'nyse.csv'),
+    'CRYPTO': Market('CRYPTO', 'UTC', time(0, 0), time(0, 0), always_open=True),
+}
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp as an aware datetime; naive values are taken as local time."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def plan_section(market: str, last_fetch: Optional[str], now: Optional[datetime] = None) -> str:
+    """``Market.plan`` by market name, with ``last_fetch`` as an ISO string."""
+    return MARKETS[market].plan(parse_time(last_fetch), now)
+
+
+def market_of(symbol: str) -> Market:
+    """Exchange whose sessions a symbol's daily bars follow (history-cache keys included)."""
+    if symbol.startswith('crypto:'):
+        return MARKETS['CRYPTO']
+    if symbol.endswith(('.NS', '.BO')):
+        return MARKETS['NSE']
+    return MARKETS['NYSE']
+
+
+def session_day(ts: float, tz=timezone.utc) -> date:
+    """Local date in ``tz`` of epoch ``ts``: the daily bar a price at ``ts`` belongs to."""
+    return datetime.fromtimestamp(int(ts), tz).date()
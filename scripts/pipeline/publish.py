@@ -0,0 +1,203 @@
+"""
+Progressive publishing of partial results.
+
+While a large universe is still being fetched, ProgressivePublisher writes a
+valid snapshot of everything finished so far (``complete: false`` plus
+per-section coverage counts), at most once per ``min_interval`` seconds.
+Sections that have not produced anything yet keep the previous run's data;
+in sections still streaming in, assets not fetched yet keep their previous
+records, marked stale, so a partial snapshot is never emptier than the
+last complete one.
+Every write is atomic (temp file + rename), so readers never see a
+half-written file.
+
+Runs that refresh only some sections (``--sections``) merge them into the
+snapshot on disk under ``file_lock`` with ``merge_sections``, so runs on
+different schedules never overwrite each other's sections.
+"""
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pipeline.carry_forward import count_stale, overlay, utc_iso
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking is process-local only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 5.0  # seconds between partial publishes
+LOCK_TIMEOUT = 60.0  # seconds to wait for another run's write
+SECTIONS = ('nifty_50', 'us_stocks', 'crypto', 'news')
+# Top-level fields owned by a section (default: the section's own key)
+SECTION_FIELDS = {'news': ('news', 'news_sentiment')}
+# Top-level dicts keyed by section
+PER_SECTION_FIELDS = ('coverage', 'updated_at', 'fetched_at', 'quoted_at')
+# Record key of each asset section
+RECORD_KEYS = {'nifty_50': 'symbol', 'us_stocks': 'symbol', 'crypto': 'id'}
+# Run-level fields taken from the latest write
+RUN_FIELDS = ('last_updated', 'refresh_mode', 'complete')
+
+_process_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def atomic_file(path: str, mode: str = 'w'):
+    """
+    File object for writing ``path`` atomically: a temp file in the same
+    directory that replaces ``path`` (os.replace) only if the block succeeds.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_json_atomic(path: str, payload: Any, **dump_kwargs):
+    """Write JSON to ``path`` via a temp file in the same directory and os.replace."""
+    with atomic_file(path) as f:
+        json.dump(payload, f, **dump_kwargs)
+
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: float = LOCK_TIMEOUT):
+    """Exclusive lock on ``path`` across processes (advisory, via ``path.lock``)."""
+    lock_path = f"{os.path.abspath(path)}.lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with _process_lock, open(lock_path, 'a') as handle:
+        if fcntl is not None:
+            waited = 0.0
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if waited >= timeout:
+                        raise TimeoutError(f"{lock_path} still locked after {timeout:.0f}s")
+                    time.sleep(0.05)
+                    waited += 0.05
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def merge_sections(current: Optional[Dict], update: Dict, sections: Iterable[str]) -> Dict:
+    """
+    ``current`` snapshot with ``sections`` (and their per-section entries) taken from ``update``.
+
+    Args:
+        current: Snapshot on disk (other sections are kept as they are)
+        update: This run's payload
+        sections: Sections this run refreshed (see SECTIONS)
+
+    Returns:
+        Merged snapshot
+    """
+    sections = set(sections)
+    merged = dict(current or {})
+    for section in sections:
+        for field in SECTION_FIELDS.get(section, (section,)):
+            if field in update:
+                merged[field] = update[field]
+    for field in PER_SECTION_FIELDS:
+        entries = dict(merged.get(field) or {})
+        entries.update({k: v for k, v in (update.get(field) or {}).items() if k in sections})
+        if entries:
+            merged[field] = entries
+    merged.update({field: update[field] for field in RUN_FIELDS if field in update})
+    return merged
+
+
+class ProgressivePublisher:
+    """Thread-safe accumulator of finished sections that publishes partial snapshots."""
+
+    def __init__(
+        self,
+        write: Callable[[Dict], Any],
+        base: Optional[Dict] = None,
+        totals: Optional[Dict[str, int]] = None,
+        min_interval: float = DEFAULT_INTERVAL
+    ):
+        self.write = write
+        self.base = dict(base or {})
+        self.min_interval = min_interval
+        self.sections: Dict[str, List] = {}
+        self.coverage: Dict[str, Dict[str, int]] = {
+            name: {'fetched': 0, 'processed': 0, 'total': total} for name, total in (totals or {}).items()
+        }
+        self.publishes = 0
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def update(self, section: str, records: List, processed: Optional[int] = None, total: Optional[int] = None):
+        """Record a section's results so far and publish if the interval has elapsed."""
+        # Shallow-copy records: the fetch thread keeps mutating its own dicts
+        snapshot = [dict(r) if isinstance(r, dict) else r for r in records]
+        with self._lock:
+            self.sections[section] = snapshot
+            entry = self.coverage.setdefault(section, {'fetched': 0, 'processed': 0, 'total': 0})
+            entry['fetched'] = len(snapshot)
+            entry['total'] = total if total is not None else max(entry['total'], len(snapshot))
+            entry['processed'] = processed if processed is not None else entry['total']
+        self.maybe_publish()
+
+    def payload(self) -> Dict:
+        with self._lock:
+            data = dict(self.base)
+            data['coverage'] = {k: dict(v) for k, v in self.coverage.items()}
+            for section, records in self.sections.items():
+                if section in RECORD_KEYS:
+                    records = overlay(records, self.base.get(section), RECORD_KEYS[section],
+                                      since=utc_iso(self.base.get('last_updated')))
+                    stale = count_stale(records)
+                    if stale:
+                        data['coverage'][section]['stale'] = stale
+                data[section] = records
+            data['last_updated'] = datetime.now(timezone.utc).isoformat()
+            data['complete'] = False
+        return data
+
+    def maybe_publish(self, force: bool = False) -> bool:
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_publish < self.min_interval:
+                return False
+            self._last_publish = now
+        try:
+            # Serialise writes so an older snapshot never replaces a newer one
+            with self._write_lock:
+                self.write(self.payload())
+            self.publishes += 1
+            coverage = ', '.join(f"{k} {v['fetched']}/{v['total']}" for k, v in self.coverage.items())
+            logger.info(f"📤 Partial snapshot published ({coverage})")
+            return True
+        except Exception as e:
+            logger.warning(f"Partial publish failed: {e}")
+            return False
+
+    def partial(self, section: str) -> List:
+        """Latest records received for ``section`` (empty if none yet)."""
+        with self._lock:
+            return list(self.sections.get(section, []))
+
+    def final_coverage(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self.coverage.items()}
@@ -0,0 +1,90 @@
+"""
+Chunked scheduling for large universes.
+
+Splits a ticker list into rate-limit-friendly chunks (optionally a small
+first chunk so the top names are ready quickly), runs a worker per chunk
+with an optional pause between chunks, and logs progress with an ETA.
+A failing chunk is logged and skipped; the run carries on. Once the run
+deadline (pipeline.deadline) has passed, remaining chunks are not started.
+"""
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pipeline.deadline import current_deadline, out_of_time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_PAUSE = 1.0  # seconds between chunks
+
+
+def chunked(items: Sequence, size: int, first: Optional[int] = None) -> List[List]:
+    """Split ``items`` into lists of at most ``size`` (the first one at most ``first``)."""
+    if size < 1 or (first is not None and first < 1):
+        raise ValueError("chunk size must be >= 1")
+    head = min(first, len(items)) if first else 0
+    chunks = [list(items[:head])] if head else []
+    return chunks + [list(items[i:i + size]) for i in range(head, len(items), size)]
+
+
+class ChunkScheduler:
+    """Runs a worker over chunks of a universe, merging dict results."""
+
+    def __init__(
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        pause: float = DEFAULT_PAUSE,
+        label: str = 'items',
+        on_progress: Optional[Callable[[int, int, Dict], None]] = None,
+        first_chunk: Optional[int] = None
+    ):
+        self.chunk_size = chunk_size
+        self.first_chunk = first_chunk
+        self.pause = pause
+        self.label = label
+        self.on_progress = on_progress
+        self.failed_chunks = 0
+        self.skipped = 0
+
+    def run(self, items: Sequence, worker: Callable[[List], Dict]) -> Dict:
+        """
+        Process ``items`` chunk by chunk.
+
+        Args:
+            items: Tickers (or ids) to process
+            worker: Called with each chunk, returns {key: result}
+
+        Returns:
+            Merged results of all chunks
+        """
+        chunks = chunked(items, self.chunk_size, self.first_chunk)
+        total = len(items)
+        results: Dict = {}
+        done = 0
+        start = time.time()
+
+        for index, chunk in enumerate(chunks, 1):
+            if out_of_time():
+                self.skipped = total - done
+                logger.warning(f"{self.label}: run deadline reached, skipping {self.skipped} remaining")
+                break
+            try:
+                results.update(worker(chunk) or {})
+            except Exception as e:
+                self.failed_chunks += 1
+                logger.error(f"{self.label}: chunk {index}/{len(chunks)} failed: {e}")
+            done += len(chunk)
+
+            elapsed = time.time() - start
+            if len(chunks) > 1:
+                eta = elapsed / done * (total - done)
+                logger.info(f"{self.label}: chunk {index}/{len(chunks)}, {done}/{total} processed "
+                            f"({len(results)} ok), {elapsed:.0f}s elapsed, ~{eta:.0f}s left")
+            if self.on_progress:
+                self.on_progress(done, total, results)
+            if index < len(chunks) and self.pause:
+                deadline = current_deadline()
+                time.sleep(min(self.pause, deadline.remaining(deadline.reserve)) if deadline else self.pause)
+
+        return results
@@ -0,0 +1,137 @@
+"""
+Universe registry: index constituents loaded from CSV files in
+scripts/universes/.
+
+Files use a ``symbol`` (or NSE ``Symbol``, or CoinGecko ``id``) column, so
+the official lists can be dropped in unchanged:
+  nifty50.csv / nifty100.csv / nifty500.csv   NSE "ind_nifty*list.csv"
+  sp100.csv / sp500.csv                       S&P constituent lists
+  nifty_core.csv / us_core.csv                the app's default 30 / 28 names
+  crypto.csv                                  CoinGecko ids, by market cap
+Rows should be ordered by importance (index weight / market cap) so that
+``limit=`` keeps the largest names. Only nifty50, sp100, the core lists and
+crypto ship with the repo; the others are offered (``universes_for``) once
+their file is dropped in, and asking for a universe whose file is missing is
+an error rather than a silent substitution.
+"""
+import csv
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE_DIR = os.getenv('MARKET_UNIVERSE_DIR', os.path.join(os.path.dirname(__file__), '../universes'))
+
+# name -> (csv file, ticker suffix, market)
+UNIVERSES = {
+    'nifty_core': ('nifty_core.csv', '.NS', 'NSE'),
+    'nifty50': ('nifty50.csv', '.NS', 'NSE'),
+    'nifty100': ('nifty100.csv', '.NS', 'NSE'),
+    'nifty500': ('nifty500.csv', '.NS', 'NSE'),
+    'us_core': ('us_core.csv', '', 'NYSE'),
+    'sp100': ('sp100.csv', '', 'NYSE'),
+    'sp500': ('sp500.csv', '', 'NYSE'),
+    'crypto': ('crypto.csv', '', 'CRYPTO'),
+}
+
+SYMBOL_COLUMNS = ('symbol', 'Symbol', 'SYMBOL', 'ticker', 'Ticker', 'id')
+
+WATCHLIST_FILE = 'watchlist.csv'
+
+_cache: Dict[str, List[str]] = {}
+
+
+def _normalize(symbol: str, suffix: str) -> str:
+    symbol = symbol.strip()
+    if suffix:
+        return symbol if symbol.endswith(suffix) else f"{symbol}{suffix}"
+    # Yahoo uses '-' for share classes (BRK.B -> BRK-B)
+    return symbol.replace('.', '-') if symbol.count('.') == 1 and len(symbol.split('.')[1]) == 1 else symbol
+
+
+def read_constituents(path: str, suffix: str = '') -> List[str]:
+    """Symbols from a constituent CSV, de-duplicated in file order."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        column = next((c for c in SYMBOL_COLUMNS if c in (reader.fieldnames or [])), None)
+        if column is None:
+            raise ValueError(f"{path}: no symbol column in {reader.fieldnames}")
+        symbols = []
+        for row in reader:
+            # NSE lists include non-equity series; keep EQ only
+            if row.get('Series') not in (None, '', 'EQ'):
+                continue
+            if row.get(column, '').strip():
+                symbols.append(_normalize(row[column], suffix))
+    return list(dict.fromkeys(symbols))
+
+
+def load_universe(name: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Constituent tickers for a named universe.
+
+    Args:
+        name: Universe name (see UNIVERSES)
+        limit: Keep only the first ``limit`` constituents
+
+    Returns:
+        Ticker list (Yahoo symbols for equities, CoinGecko ids for crypto)
+    """
+    if name not in UNIVERSES:
+        raise ValueError(f"Unknown universe '{name}' (known: {', '.join(UNIVERSES)})")
+
+    if name not in _cache:
+        filename, suffix, _ = UNIVERSES[name]
+        path = os.path.join(UNIVERSE_DIR, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Universe '{name}' needs {path}; drop in the published constituent list "
+                f"(available: {', '.join(available_universes())})"
+            )
+        _cache[name] = read_constituents(path, suffix)
+
+    symbols = _cache[name]
+    return list(symbols[:limit] if limit else symbols)
+
+
+def available_universes() -> List[str]:
+    """Universes whose CSV file is present."""
+    return [name for name, (filename, _, _) in UNIVERSES.items()
+            if os.path.exists(os.path.join(UNIVERSE_DIR, filename))]
+
+
+def universes_for(market: str) -> List[str]:
+    """Available universe names of one market ('NSE', 'NYSE' or 'CRYPTO')."""
+    return [name for name in available_universes() if UNIVERSES[name][2] == market]
+
+
+def load_watchlist() -> List[str]:
+    """Priority tickers from MARKET_WATCHLIST (comma-separated) or universes/watchlist.csv."""
+    env = os.getenv('MARKET_WATCHLIST')
+    if env:
+        return [t.strip() for t in env.split(',') if t.strip()]
+    path = os.path.join(UNIVERSE_DIR, WATCHLIST_FILE)
+    return read_constituents(path) if os.path.exists(path) else []
+
+
+def _as_number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def prioritize(tickers: List[str], watchlist: Iterable[str] = (), market_caps: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Fetch order: watchlist names first, then by last known market cap
+    (descending), then the rest in universe order.
+    """
+    universe = set(tickers)
+    watch = [t for t in dict.fromkeys(watchlist) if t in universe]
+    watched = set(watch)
+    rest = [t for t in tickers if t not in watched]
+    caps = market_caps or {}
+    # Stable sort keeps universe (index-weight) order for unknown caps
+    rest.sort(key=lambda t: -_as_number(caps.get(t)))
+    return watch + rest
@@ -0,0 +1,68 @@
+"""
+Tests for the rolling-window SQLite article store
+"""
+import time
+
+from fetchers.article_store import ArticleStore, link_hash
+
+DAY = 86400
+
+
+def article(title, link='', ts=None, category='Markets', **extra):
+    return {'title': title, 'link': link, 'published_ts': ts or int(time.time()), 'category': category, **extra}
+
+
+def test_ingest_stores_each_article_once():
+    with ArticleStore(':memory:') as store:
+        first = [article('Fed holds rates', 'https://a/1'), article('Oil rises', 'https://a/2')]
+        assert store.ingest(first) == 2
+
+        # Same links (edited titles) are ignored; only the new link is stored
+        again = [article('Fed holds rates steady', 'https://a/1'), article('Gold slips', 'https://a/3')]
+        assert store.ingest(again) == 1
+        assert len(store) == 3
+        assert store.known_hashes([link_hash(a) for a in again]) == {link_hash(a) for a in again}
+        assert [a['title'] for a in store.latest(category='Markets') if a['link'] == 'https://a/1'] == ['Fed holds rates']
+
+
+def test_articles_without_links_are_keyed_by_title():
+    with ArticleStore(':memory:') as store:
+        assert store.ingest([article('Breaking: Markets Rally', '#')]) == 1
+        assert store.ingest([article('breaking: markets rally ', '')]) == 0
+        assert store.latest()[0]['link'] == '#'
+
+
+def test_old_articles_are_dropped_and_evicted():
+    now = int(time.time())
+    with ArticleStore(':memory:') as store:
+        stored = store.ingest([
+            article('fresh', 'https://a/1', now - DAY),
+            article('aging', 'https://a/2', now - 6 * DAY),
+            article('too old', 'https://a/3', now - 8 * DAY),
+        ])
+        assert stored == 2  # already outside the 7-day window at ingest
+
+        assert store.evict(now + 2 * DAY) == 1
+        assert [a['title'] for a in store.latest()] == ['fresh']
+
+
+def test_undated_articles_keep_their_first_seen_time(monkeypatch):
+    with ArticleStore(':memory:') as store:
+        store.ingest([{'title': 'undated', 'link': 'https://a/1'}])
+        first_seen = store.latest()[0]['published_ts']
+        monkeypatch.setattr(time, 'time', lambda: first_seen + 3600)
+        store.ingest([{'title': 'undated', 'link': 'https://a/1'}])
+        assert store.latest()[0]['published_ts'] == first_seen
+
+
+def test_latest_per_category_caps_each_category(tmp_path):
+    now = int(time.time())
+    path = str(tmp_path / 'news.db')
+    with ArticleStore(path) as store:
+        store.ingest([article(f'm{i}', f'https://m/{i}', now - i * 60) for i in range(5)] +
+                     [article(f'c{i}', f'https://c/{i}', now - i * 60 - 30, category='Crypto') for i in range(2)])
+
+    with ArticleStore(path) as store:
+        assert store.categories() == {'Markets': 5, 'Crypto': 2}
+        titles = [a['title'] for a in store.latest_per_category(per_category=3)]
+        assert titles == ['m0', 'c0', 'm1', 'c1', 'm2']
@@ -0,0 +1,53 @@
+"""
+Tests for resumable stage checkpoints
+"""
+import json
+import os
+
+import numpy as np
+
+from pipeline.checkpoint import KEEP_RUNS, RunCheckpoint, latest_unfinished
+
+
+def test_stages_round_trip_and_resume(tmp_path):
+    root = str(tmp_path)
+    checkpoint = RunCheckpoint.create(root, sections=['crypto', 'news'], plans={})
+    checkpoint.save('fetch.crypto', [{'id': 'bitcoin', 'price': np.float64(1.5), 'rank': np.int64(1),
+                                      'rsi': float('nan'), 'ath_date': None}])
+
+    resumed = RunCheckpoint.open('latest', root)
+    assert resumed.run_id == checkpoint.run_id
+    assert resumed.manifest['sections'] == ['crypto', 'news']
+    assert resumed.stages == ['fetch.crypto']
+    assert resumed.has('fetch.crypto') and not resumed.has('fetch.news')
+    loaded = resumed.load('fetch.crypto')
+    assert loaded[0]['price'] == 1.5 and loaded[0]['rank'] == 1 and np.isnan(loaded[0]['rsi'])
+    with open(os.path.join(checkpoint.path, 'fetch.crypto.json')) as f:
+        assert json.load(f)[0]['id'] == 'bitcoin'  # plain JSON on disk, no pickle
+
+    resumed.finish()
+    assert latest_unfinished(root) is None
+    assert RunCheckpoint.open('latest', root) is None
+    assert RunCheckpoint.open(checkpoint.run_id, root) is not None  # explicit ids may still be resumed
+    assert RunCheckpoint.open('no-such-run', root) is None
+
+
+def test_failed_save_is_not_recorded(tmp_path):
+    checkpoint = RunCheckpoint.create(str(tmp_path))
+    checkpoint.save('fetch.news', [object()])  # not JSON serialisable
+    assert not checkpoint.has('fetch.news')
+    assert os.listdir(checkpoint.path) == ['manifest.json']
+
+
+def test_old_runs_are_pruned(tmp_path):
+    root = str(tmp_path)
+    runs = [RunCheckpoint.create(root).run_id for _ in range(KEEP_RUNS + 2)]
+    assert sorted(os.listdir(root)) == runs[-KEEP_RUNS:]
+
+
+def test_starting_snapshot_is_kept_for_resume(tmp_path):
+    previous = {'last_updated': 't0', 'crypto': [{'id': 'bitcoin'}]}
+    checkpoint = RunCheckpoint.create(str(tmp_path), previous=previous)
+    previous['crypto'] = []  # e.g. a partial snapshot published later by the same run
+    resumed = RunCheckpoint.open(checkpoint.run_id, str(tmp_path))
+    assert resumed.load('previous') == {'last_updated': 't0', 'crypto': [{'id': 'bitcoin'}]}
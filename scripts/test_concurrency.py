@@ -0,0 +1,81 @@
+"""
+Tests for the adaptive (AIMD) per-upstream concurrency limiter
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fetchers.concurrency import AdaptiveLimiter
+
+
+def test_additive_increase_and_multiplicative_decrease():
+    limiter = AdaptiveLimiter('test', initial=4, min_limit=1, max_limit=8)
+    for _ in range(5):
+        limiter.record(0.1)
+    assert limiter.stats()['limit'] == 5  # ~+1 per limit's worth of healthy responses
+
+    limiter.record(0.1, status=429)
+    assert limiter.stats()['limit'] == 2
+    limiter.record(0.1, status=503)  # same burst: within the cooldown, no second halving
+    assert limiter.stats()['limit'] == 2
+
+    limiter.record(5.0)  # slow response: no increase
+    assert limiter.limit < 3
+
+
+def test_threads_and_coroutines_share_the_limit():
+    limiter = AdaptiveLimiter('test', initial=3, min_limit=3, max_limit=3)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def enter():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+
+    def leave():
+        with lock:
+            active[0] -= 1
+
+    def threaded():
+        with limiter.slot():
+            enter()
+            time.sleep(0.02)
+            leave()
+
+    async def coroutines():
+        async def one():
+            async with limiter.async_slot():
+                enter()
+                await asyncio.sleep(0.02)
+                leave()
+        await asyncio.gather(*(one() for _ in range(10)))
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(threaded) for _ in range(10)]
+        asyncio.run(coroutines())
+        for future in futures:
+            future.result()
+
+    assert peak[0] == 3
+    assert limiter.stats()['in_flight'] == 0
+    assert limiter.stats()['successes'] == 20
+
+
+def test_permanent_errors_do_not_back_off():
+    import requests
+
+    from fetchers.retry import HTTPStatusError
+
+    for outcome in ({'status': 404}, {'status': 401}, {'error': ValueError('bad JSON')},
+                    {'error': HTTPStatusError(404)}):
+        limiter = AdaptiveLimiter('test', initial=8, min_limit=1, max_limit=64)
+        limiter.record(0.1, **outcome)
+        assert limiter.stats()['limit'] == 8, outcome
+        assert limiter.stats()['errors'] == 0
+
+    for outcome in ({'status': 503}, {'error': requests.ConnectionError('reset')}, {'error': HTTPStatusError(429)}):
+        limiter = AdaptiveLimiter('test', initial=8, min_limit=1, max_limit=64)
+        limiter.record(0.1, **outcome)
+        assert limiter.stats()['limit'] == 4, outcome
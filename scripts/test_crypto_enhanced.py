@@ -0,0 +1,117 @@
+"""
+Tests for crypto daily OHLCV bars, the range indicators built on them and
+the reuse of previous indicators when a coin's history fails
+"""
+import numpy as np
+import pytest
+
+from analysis.ohlcv_kernels import adx, cmf
+from fetchers import crypto_enhanced
+from fetchers.crypto_enhanced import calculate_range_indicators, fetch_crypto_data, fetch_daily_ohlc
+
+DAY_MS = 86_400_000
+
+
+class FakeResponse:
+    def __init__(self, status, payload=None):
+        self.status_code = status
+        self.headers = {}
+        self.url = 'https://data-api.binance.vision/api/v3/klines'
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        pass
+
+
+def klines(bars=120, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    high, low = close * (1 + rng.uniform(0, 0.02, bars)), close * (1 - rng.uniform(0, 0.02, bars))
+    volume = rng.uniform(1e5, 1e6, bars)
+    rows = [[t * DAY_MS, str(c), str(h), str(l), str(c), str(v), (t + 1) * DAY_MS - 1, '0', 10, '0', '0', '0']
+            for t, (h, l, c, v) in enumerate(zip(high, low, close, volume))]
+    return rows, (high, low, close, volume)
+
+
+def test_klines_become_real_ranges_for_adx_and_cmf(monkeypatch):
+    rows, (high, low, close, volume) = klines()
+    requests_made = []
+
+    def fake_get(url, params=None, timeout=None):
+        requests_made.append(params)
+        return FakeResponse(200, rows)
+    monkeypatch.setattr(crypto_enhanced.requests, 'get', fake_get)
+
+    frame = fetch_daily_ohlc('btc')
+    assert requests_made[0]['symbol'] == 'BTCUSDT' and requests_made[0]['interval'] == '1d'
+    assert frame['high'].tolist() == pytest.approx(high.tolist())
+    assert (frame['high'] > frame['low']).all()
+
+    values = calculate_range_indicators(frame)
+    assert values['adx'] == pytest.approx(adx(high, low, close)[0][-1])
+    assert values['cmf'] == pytest.approx(cmf(high, low, close, volume)[-1])
+    assert values['cmf'] != 0.0
+
+
+def test_unlisted_pair_has_no_bars(monkeypatch):
+    monkeypatch.setattr(crypto_enhanced.requests, 'get', lambda url, params=None, timeout=None: FakeResponse(400))
+    assert fetch_daily_ohlc('usdt') is None
+
+
+def test_short_history_gives_no_range_indicators(monkeypatch):
+    rows, _ = klines(bars=30)
+    monkeypatch.setattr(crypto_enhanced.requests, 'get', lambda url, params=None, timeout=None: FakeResponse(200, rows))
+    assert calculate_range_indicators(fetch_daily_ohlc('eth')) == {}
+    assert not np.isnan(fetch_daily_ohlc('eth')['volume']).any()
+
+
+def test_region_block_stops_further_binance_requests(monkeypatch):
+    monkeypatch.setattr(crypto_enhanced, '_binance_blocked', False)
+    requests_made = []
+
+    def fake_get(url, params=None, timeout=None):
+        requests_made.append(url)
+        return FakeResponse(451)
+    monkeypatch.setattr(crypto_enhanced.requests, 'get', fake_get)
+
+    assert fetch_daily_ohlc('btc') is None and fetch_daily_ohlc('eth') is None
+    assert len(requests_made) == 1
+    assert requests_made[0].startswith('https://data-api.binance.vision/')
+
+
+MARKET = {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin', 'current_price': 60000.0,
+          'market_cap': 1.2e12, 'total_volume': 3e10, 'last_updated': '2026-03-02T00:00:00.000Z'}
+
+
+@pytest.fixture
+def failing_history(monkeypatch):
+    """CoinGecko serves the market snapshot, but every history request fails."""
+    def fake_coingecko_get(url, params, timeout, attempts=3):
+        return FakeResponse(200, [dict(MARKET)]) if url.endswith('/coins/markets') else FakeResponse(500)
+    monkeypatch.setattr(crypto_enhanced, 'coingecko_get', fake_coingecko_get)
+    monkeypatch.setattr(crypto_enhanced.time, 'sleep', lambda seconds: None)
+
+
+def test_failed_history_reuses_the_last_good_indicators(failing_history):
+    previous = [dict(MARKET, rsi=71.5, macd_vs_200ema='BULLISH', distance_from_200_ema=12.0, macd_slope=0.4,
+                     adx=33.0, cmf=0.12, ohlc_source='binance', last_updated='2026-03-01T00:00:00.000Z')]
+    [coin] = fetch_crypto_data(ids=['bitcoin'], previous=previous)
+    assert (coin['rsi'], coin['adx'], coin['cmf'], coin['ohlc_source']) == (71.5, 33.0, 0.12, 'binance')
+    assert coin['indicators_stale_since'] == '2026-03-01T00:00:00.000Z'
+    assert 'indicators_defaulted' not in coin
+
+    # A second failure keeps the original last-good time
+    [again] = fetch_crypto_data(ids=['bitcoin'], previous=[coin])
+    assert again['rsi'] == 71.5 and again['indicators_stale_since'] == '2026-03-01T00:00:00.000Z'
+
+
+def test_defaulted_indicators_are_never_reused_as_last_good(failing_history):
+    [coin] = fetch_crypto_data(ids=['bitcoin'], previous=[])
+    assert coin['indicators_defaulted'] and (coin['rsi'], coin['adx'], coin['ohlc_source']) == (50.0, 25.0, None)
+
+    [again] = fetch_crypto_data(ids=['bitcoin'], previous=[dict(coin, rsi=64.0)])
+    assert again['indicators_defaulted'] and again['rsi'] == 50.0
+    assert 'indicators_stale_since' not in again
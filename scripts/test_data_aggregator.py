@@ -0,0 +1,108 @@
+"""
+Tests for hedged, health-ordered multi-source fetching
+"""
+import asyncio
+import json
+import time
+
+from fetchers.async_cache import AsyncTTLCache
+from fetchers.data_aggregator import DataAggregator
+
+
+async def _answer(value, delay):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _fail():
+    raise RuntimeError("source down")
+
+
+def test_hedge_starts_backup_when_primary_is_slow():
+    aggregator = DataAggregator()
+    # Teach the aggregator that the primary usually answers in ~10ms
+    for _ in range(5):
+        aggregator._record('primary', True, 0.01)
+
+    start = time.monotonic()
+    result = asyncio.run(aggregator.fetch_with_fallback(
+        [lambda: _answer('primary', 2), lambda: _answer('backup', 0.05)], ['primary', 'backup']
+    ))
+    assert result == 'backup'
+    assert time.monotonic() - start < 1
+    assert aggregator.source_status['primary']['cancelled'] == 1
+    assert aggregator.source_status['backup']['status'] == 'success'
+
+
+def test_failing_sources_fall_back_and_sink_in_order():
+    # No caching, so every round reaches the sources
+    aggregator = DataAggregator(adaptive_order=False, cache=AsyncTTLCache(ttl=0, negative_ttl=0))
+    for _ in range(3):
+        result = asyncio.run(aggregator.fetch_with_fallback(
+            [_fail, lambda: _answer('ok', 0)], ['flaky', 'steady']
+        ))
+        assert result == 'ok'
+    assert not aggregator.source_status['flaky']['healthy']
+    aggregator.adaptive_order = True
+    assert [name for _, name in aggregator.order_sources([_fail, _fail], ['flaky', 'steady'])] == ['steady', 'flaky']
+
+
+def test_cache_single_flight_and_negative_caching():
+    calls = []
+
+    async def upstream(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def run():
+        aggregator = DataAggregator()
+        source = [lambda symbol: upstream(symbol)]
+        # Three identical concurrent requests, one upstream call
+        results = await asyncio.gather(*[aggregator.fetch_with_fallback(source, ['src'], 'BTC') for _ in range(3)])
+        assert results == ['BTC'] * 3
+        assert await aggregator.fetch_with_fallback(source, ['src'], 'BTC') == 'BTC'
+
+        # Failures are remembered for negative_ttl
+        assert await aggregator.fetch_with_fallback([_fail], ['down'], 'ETH') is None
+        assert await aggregator.fetch_with_fallback([_fail], ['down'], 'ETH') is None
+        return aggregator.cache.stats()
+
+    stats = asyncio.run(run())
+    assert calls == ['BTC']
+    assert (stats['misses'], stats['coalesced'], stats['hits'], stats['negative_hits']) == (2, 2, 1, 1)
+
+
+def test_cache_evicts_lru_and_persists(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = AsyncTTLCache(max_entries=2, path=path)
+
+    async def fill():
+        for key in ('a', 'b', 'c'):
+            await cache.get_or_fetch(key, lambda key=key: _answer(key.upper(), 0))
+
+    asyncio.run(fill())
+    assert list(cache.entries) == ['b', 'c'] and cache.stats()['evictions'] == 1
+    cache.save()
+
+    reloaded = AsyncTTLCache(path=path)
+    assert asyncio.run(reloaded.get_or_fetch('c', _fail)) == 'C'
+    assert reloaded.stats()['hits'] == 1
+
+
+def test_disk_tier_is_json_and_skips_values_it_cannot_represent(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = AsyncTTLCache(path=path)
+
+    async def fill():
+        await cache.get_or_fetch((('yahoo', 'binance'), "('BTC',)"), lambda: _answer({'price': 1.0}, 0))
+        await cache.get_or_fetch('tuple', lambda: _answer(('not', 'json'), 0))
+        await cache.get_or_fetch('object', lambda: _answer(object(), 0))
+
+    asyncio.run(fill())
+    cache.save()
+    with open(path) as f:
+        assert len(json.load(f)['entries']) == 1
+
+    reloaded = AsyncTTLCache(path=path)
+    assert list(reloaded.entries) == [(('yahoo', 'binance'), "('BTC',)")]
@@ -0,0 +1,126 @@
+"""
+Tests for the run-wide deadline, stale carry-forward and revalidation
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import main_optimized
+from main_optimized import revalidate_stale
+from pipeline.carry_forward import carry_forward, oldest_stale_since, utc_iso
+from pipeline.deadline import Deadline, completed_by_deadline, deadline_timeout, out_of_time, set_deadline
+from pipeline.scheduler import ChunkScheduler
+
+
+def test_timeouts_shrink_with_remaining_time():
+    assert deadline_timeout(15) == 15  # no deadline installed
+    set_deadline(Deadline(5, reserve=0))
+    try:
+        assert 4 < deadline_timeout(15) <= 5
+        assert deadline_timeout(2) == 2
+        set_deadline(Deadline(0))
+        assert deadline_timeout(15) == 1.0  # floor, never zero
+        assert out_of_time()
+    finally:
+        set_deadline(None)
+
+
+def test_stragglers_abandoned_and_chunks_skipped():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = [executor.submit(lambda: 1), executor.submit(release.wait, 10)]
+    set_deadline(Deadline(0.3, reserve=0))
+    try:
+        done = [f.result() for f in completed_by_deadline(futures)]
+        assert done == [1]
+
+        scheduler = ChunkScheduler(chunk_size=2, pause=0)
+        assert scheduler.run(['A', 'B', 'C'], lambda chunk: {t: t for t in chunk}) == {}
+        assert scheduler.skipped == 3
+    finally:
+        set_deadline(None)
+        release.set()
+        executor.shutdown()
+
+
+def test_carry_forward_marks_missing_assets_stale():
+    fresh = {'A': {'symbol': 'A', 'price': 2}}
+    previous = [{'symbol': 'A', 'price': 1}, {'symbol': 'B', 'price': 1}, {'symbol': 'GONE', 'price': 1}]
+    merged = carry_forward(fresh, previous, ['A', 'B', 'C'])
+    assert merged == {'A': {'symbol': 'A', 'price': 2}, 'B': {'symbol': 'B', 'price': 1, 'stale': True, 'stale_since': None}}
+    assert 'stale' not in previous[1]
+
+
+def test_stale_since_survives_consecutive_stale_runs():
+    previous = [{'symbol': 'A', 'stale': True, 'stale_since': '2026-01-01T00:00:00'}, {'symbol': 'B'}]
+    merged = carry_forward({}, previous, ['A', 'B'], since='2026-01-02T00:00:00')
+    assert merged['A']['stale_since'] == '2026-01-01T00:00:00'
+    assert merged['B']['stale_since'] == '2026-01-02T00:00:00'
+    assert oldest_stale_since(list(merged.values())) == '2026-01-01T00:00:00'
+
+
+def test_stale_since_is_compared_in_utc(monkeypatch):
+    # Lexically the IST time sorts last, but it is the earliest
+    records = [{'symbol': 'A', 'stale': True, 'stale_since': '2026-01-01T00:00:00+00:00'},
+               {'symbol': 'B', 'stale': True, 'stale_since': '2026-01-01T05:00:00+05:30'}]
+    assert oldest_stale_since(records) == '2026-01-01T05:00:00+05:30'
+
+    # Naive last_updated values written by older runs are local time
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    try:
+        assert utc_iso('2026-01-01T05:30:00') == '2026-01-01T00:00:00+00:00'
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert utc_iso('2026-01-01T00:00:00.000Z') == '2026-01-01T00:00:00+00:00'
+    assert utc_iso('t0') == 't0' and utc_iso(None) is None
+
+
+def stock(symbol, price, **extra):
+    return {'symbol': symbol, 'current_price': price, 'score': 50, 'recommendation': 'HOLD', **extra}
+
+
+def test_revalidation_replaces_stale_records(monkeypatch):
+    links = {'news': [{'title': 'Deal'}], 'news_sentiment': {'score': 0.4}}
+    app_data = {
+        'last_updated': '2026-01-02T00:00:00+00:00',
+        'nifty_50': [stock('A.NS', 1.0), stock('B.NS', 1.0, stale=True, stale_since='2026-01-01T00:00:00+00:00', **links),
+                     stock('C.NS', 1.0, stale=True, stale_since='2026-01-01T00:00:00+00:00')],
+        'us_stocks': [stock('AAPL', 1.0)],
+        'crypto': [{'id': 'bitcoin', 'stale': True, 'stale_since': '2026-01-01T00:00:00+00:00'}, {'id': 'ethereum'}],
+        'coverage': {'nifty_50': {'fetched': 1, 'processed': 1, 'total': 3, 'stale': 2},
+                     'crypto': {'fetched': 1, 'processed': 1, 'total': 2, 'stale': 1}},
+    }
+    requested, written = [], []
+
+    def fetch_stock_data(tickers, **kwargs):
+        requested.append(tickers)
+        return {'B.NS': stock('B.NS', 2.0)}  # C.NS still fails
+    monkeypatch.setattr(main_optimized, 'fetch_stock_data', fetch_stock_data)
+    monkeypatch.setattr(main_optimized, 'fetch_crypto_data', lambda ids, **kwargs: [{'id': i, 'price': 2.0} for i in ids])
+    monkeypatch.setattr(main_optimized, 'write_output', lambda data, sections=None: written.append(sections))
+
+    assert revalidate_stale(app_data) == 2
+    assert requested == [['B.NS', 'C.NS']]  # only the stale records, and no us_stocks request
+    by_symbol = {s['symbol']: s for s in app_data['nifty_50']}
+    assert len(app_data['nifty_50']) == 3
+    assert by_symbol['B.NS']['current_price'] == 2.0 and not by_symbol['B.NS'].get('stale')
+    assert by_symbol['C.NS']['stale']
+    # News links were computed for the stale copy and survive revalidation
+    assert by_symbol['B.NS']['news'] == links['news'] and by_symbol['B.NS']['news_sentiment'] == links['news_sentiment']
+    assert app_data['crypto'] == [{'id': 'bitcoin', 'price': 2.0}, {'id': 'ethereum'}]
+    assert app_data['coverage']['nifty_50']['stale'] == 1
+    assert 'stale' not in app_data['coverage']['crypto']
+    assert app_data['last_updated'].endswith('+00:00')
+    assert written == [None]
+
+
+def test_revalidation_without_recoveries_writes_nothing(monkeypatch):
+    app_data = {'nifty_50': [stock('A.NS', 1.0, stale=True)], 'crypto': [], 'last_updated': 't0'}
+    monkeypatch.setattr(main_optimized, 'fetch_stock_data', lambda tickers, **kwargs: {})
+    monkeypatch.setattr(main_optimized, 'write_output', lambda data, sections=None: pytest.fail('rewrote output'))
+    assert revalidate_stale(app_data) == 0
+    assert app_data['nifty_50'][0]['stale'] and app_data['last_updated'] == 't0'
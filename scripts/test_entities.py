@@ -0,0 +1,44 @@
+"""
+Tests for news entity linking
+"""
+from analysis.entities import AhoCorasick, link_news_to_assets, normalize_company_name
+
+STOCKS = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.'},
+    {'symbol': 'RELIANCE.NS', 'name': 'Reliance Industries Limited'},
+    {'symbol': 'ITC.NS', 'name': 'ITC Limited'},
+    {'symbol': 'V', 'name': 'Visa Inc.'},
+]
+CRYPTOS = [{'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'}]
+
+
+def test_overlapping_patterns():
+    index = AhoCorasick()
+    index.add('he', 'A')
+    index.add('she', 'B')
+    index.add('hers', 'C')
+    index.build()
+    assert index.find('she') == {'B'}
+    assert index.find('he hers') == {'A', 'C'}
+
+
+def test_normalize_company_name():
+    assert normalize_company_name('Apple Inc.') == 'Apple'
+    assert normalize_company_name('Reliance Industries Limited') == 'Reliance Industries'
+
+
+def test_link_news_to_assets():
+    articles = [
+        {'title': 'Apple and Reliance Industries sign deal', 'summary': 'BTC jumps, $V rallies'},
+        {'title': 'Pineapple prices soar', 'summary': 'itc is a lowercase word here'},
+    ]
+    stocks = [dict(s) for s in STOCKS]
+    cryptos = [dict(c) for c in CRYPTOS]
+    symbol_news = link_news_to_assets(articles, stocks, cryptos)
+
+    assert articles[0]['related_symbols'] == ['AAPL', 'BTC', 'RELIANCE.NS', 'V']
+    assert articles[1]['related_symbols'] == []
+    assert len(symbol_news['AAPL']) == 1
+    assert stocks[0]['news'][0]['title'] == articles[0]['title']
+    assert cryptos[0]['news'][0]['title'] == articles[0]['title']
+    assert stocks[2]['news'] == []
@@ -0,0 +1,64 @@
+"""
+Tests for published-date normalisation of feed entries
+"""
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from fetchers import feed_dates
+from fetchers.feed_dates import entry_timestamp, epoch_to_iso, parse_date_to_epoch
+
+TS = int(datetime(2025, 12, 1, 6, 39, 44, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def dateutil_calls(monkeypatch):
+    calls = []
+    original = feed_dates._parse_with_dateutil
+
+    def spy(value):
+        calls.append(value)
+        return original(value)
+    monkeypatch.setattr(feed_dates, '_parse_with_dateutil', spy)
+    return calls
+
+
+@pytest.mark.parametrize('value', [
+    '2025-12-01T06:39:44Z',
+    '2025-12-01T06:39:44+00:00',
+    '2025-12-01 12:09:44+05:30',
+    '2025-12-01T06:39:44',  # naive: taken as UTC
+    'Mon, 01 Dec 2025 06:39:44 GMT',
+    '01 Dec 2025 12:09:44 +0530',
+])
+def test_common_formats_do_not_need_dateutil(value, dateutil_calls):
+    assert parse_date_to_epoch(value) == TS
+    assert dateutil_calls == []
+
+
+def test_odd_formats_fall_back_to_dateutil(dateutil_calls):
+    assert parse_date_to_epoch('2025/12/01 06:39:44 UTC') == TS
+    assert parse_date_to_epoch('not a date') is None
+    assert len(dateutil_calls) == 2
+
+
+def test_non_string_values():
+    assert parse_date_to_epoch(None) is None and parse_date_to_epoch('  ') is None
+    assert parse_date_to_epoch(TS) == TS and parse_date_to_epoch(float(TS)) == TS
+    assert parse_date_to_epoch(datetime(2025, 12, 1, 6, 39, 44)) == TS
+    assert parse_date_to_epoch(time.gmtime(TS)) == TS
+
+
+def test_entry_prefers_parsed_struct_over_strings(dateutil_calls):
+    entry = {'published_parsed': time.gmtime(TS), 'published': 'Tue, 02 Dec 2025 00:00:00 GMT'}
+    assert entry_timestamp(entry) == TS
+    assert entry_timestamp({'updated': 'Mon, 01 Dec 2025 06:39:44 GMT'}) == TS
+    assert entry_timestamp({'publishedAt': '2025-12-01T06:39:44Z'}) == TS
+    assert entry_timestamp({'title': 'undated'}) is None
+    assert dateutil_calls == []
+
+
+def test_epoch_to_iso_is_utc():
+    assert epoch_to_iso(TS) == '2025-12-01T06:39:44+00:00'
+    assert epoch_to_iso(None) is None
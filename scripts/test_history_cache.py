@@ -0,0 +1,140 @@
+"""
+Tests for the daily close history cache and quotes-only refreshes
+"""
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fetchers.history_cache import HistoryCache
+from fetchers import stocks_enhanced
+from fetchers.stocks_enhanced import apply_quote, fetch_single_stock, refresh_from_quote
+
+DAY = 86400
+
+
+def utc(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+# yfinance stamps NSE daily bars at 00:00 IST: 18:30 UTC the previous day
+NSE_BAR = utc(2026, 10, 14, 18, 30)  # the 15 Oct session
+NSE_MIDSESSION = utc(2026, 10, 15, 5, 0)  # 10:30 IST on 15 Oct
+
+
+def test_round_trip_and_max_bars(tmp_path):
+    path = str(tmp_path / 'history.npz')
+    cache = HistoryCache(path, max_bars=3)
+    cache.put('AAPL', [1, 2, 3, 4], [10.0, 11.0, 12.0, 13.0])
+    cache.save()
+
+    loaded = HistoryCache(path, max_bars=3)
+    timestamps, closes = loaded.get('AAPL')
+    assert timestamps.tolist() == [2, 3, 4] and closes.tolist() == [11.0, 12.0, 13.0]
+    assert 'AAPL' in loaded and loaded.get('MSFT') is None
+    assert loaded.append_price('MSFT', 1.0) is None
+
+
+def test_intraday_quote_replaces_the_session_bar_of_an_nse_symbol(tmp_path):
+    cache = HistoryCache(str(tmp_path / 'history.npz'))
+    cache.put('RELIANCE.NS', [NSE_BAR - DAY, NSE_BAR], [100.0, 101.0])
+
+    timestamps, closes = cache.append_price('RELIANCE.NS', 102.0, NSE_MIDSESSION)
+    assert closes.tolist() == [100.0, 102.0]  # same IST session, though a different UTC day
+    assert timestamps[-1] == NSE_MIDSESSION
+
+    timestamps, closes = cache.append_price('RELIANCE.NS', 103.0, NSE_MIDSESSION + DAY)
+    assert closes.tolist() == [100.0, 102.0, 103.0]
+
+
+def test_us_after_hours_quote_stays_on_its_session(tmp_path):
+    cache = HistoryCache(str(tmp_path / 'history.npz'))
+    bar = utc(2026, 10, 15, 4, 0)  # 00:00 New York
+    cache.put('AAPL', [bar], [200.0])
+    _, closes = cache.append_price('AAPL', 201.0, utc(2026, 10, 16, 0, 30))  # 20:30 New York, 15 Oct
+    assert closes.tolist() == [201.0]
+
+
+def test_apply_quote_merges_live_fields():
+    record = {'current_price': 100.0, 'change': 2.0, 'volume': '5', 'market_cap': '7'}
+    assert apply_quote(record, {'regularMarketPrice': 105.0, 'regularMarketPreviousClose': 100.0,
+                                'regularMarketVolume': 1234.0, 'marketCap': 5e9})
+    assert record == {'current_price': 105.0, 'change': 5.0, 'changePercent': pytest.approx(5.0),
+                      'volume': '1234', 'market_cap': '5000000000'}
+
+    # Without a previous close the record's own (price - change) is used
+    assert apply_quote(record, {'regularMarketPrice': 110.0})
+    assert record['change'] == pytest.approx(10.0) and record['volume'] == '1234'
+    assert not apply_quote(record, {'regularMarketPrice': 0})
+
+
+def test_refresh_from_quote_recomputes_price_fields():
+    record = {'symbol': 'RELIANCE.NS', 'current_price': 100.0, 'change': 1.0, 'pe_ratio': 20.0,
+              'fcf_yield': 5.0, 'input_hash': 'abc'}
+    closes = np.linspace(50.0, 110.0, 130)
+    quote = {'regularMarketPrice': 110.0, 'regularMarketPreviousClose': 100.0, 'regularMarketVolume': 1000}
+
+    assert refresh_from_quote(record, quote, closes)
+    assert record['current_price'] == 110.0 and record['changePercent'] == pytest.approx(10.0)
+    assert record['pe_ratio'] == pytest.approx(22.0) and record['fcf_yield'] == pytest.approx(5.0 / 1.1)
+    assert record['price_6m_return'] == pytest.approx((110.0 - closes[-126]) / closes[-126] * 100)
+    assert record['volume'] == '1000' and 'score' in record and 'recommendation' in record
+    assert 'input_hash' not in record
+    assert not refresh_from_quote(record, {'regularMarketPrice': None})
+
+
+class FakeContext:
+    def __init__(self, info, history):
+        self.info, self.history, self.attempts = info, history, 0
+
+
+def test_quote_refresh_at_an_unchanged_price_keeps_the_full_path_score(monkeypatch):
+    closes = np.linspace(80.0, 100.0, 200)
+    history = pd.DataFrame({'Close': closes}, index=pd.date_range('2026-01-01', periods=200, tz='UTC'))
+    # No debtToEbitda, trailingPE or earnings growth: the full path scores its defaults
+    info = {'regularMarketPrice': 100.0, 'previousClose': 99.0, 'returnOnEquity': 0.08,
+            'freeCashflow': 4e9, 'marketCap': 1e11, 'profitMargins': 0.2}
+    monkeypatch.setattr(stocks_enhanced, 'get_context', lambda symbol: FakeContext(info, history))
+
+    _, record = fetch_single_stock('TEST')
+    record.pop('_history')
+    full_score = record['score']
+    for field in ('debt_to_ebitda', 'eps_growth'):
+        del record[field]  # e.g. records published before the field existed
+
+    assert refresh_from_quote(record, {'regularMarketPrice': 100.0, 'regularMarketPreviousClose': 99.0}, closes)
+    assert record['score'] == full_score
+
+
+def test_quotes_refresh_of_an_nse_symbol_keeps_one_bar_per_session(tmp_path, monkeypatch):
+    import main_optimized
+    from analysis import indicator_state
+    from fetchers import concurrency, history_cache, yahoo_client
+
+    output, baseline = tmp_path / 'latest.json', tmp_path / 'last_complete.json'
+    monkeypatch.setattr(main_optimized, 'OUTPUT_PATH', str(output))
+    monkeypatch.setattr(main_optimized, 'BASELINE_PATH', str(baseline))
+    monkeypatch.setattr(main_optimized, 'CALENDAR', False)
+    monkeypatch.setattr(history_cache, 'DEFAULT_PATH', str(tmp_path / 'history.npz'))
+    monkeypatch.setattr(indicator_state, 'STATE_PATH', str(tmp_path / 'state.json'))
+    monkeypatch.setattr(concurrency, 'LIMITS_PATH', str(tmp_path / 'limits.json'))
+
+    cache = HistoryCache()
+    cache.put('RELIANCE.NS', [NSE_BAR - i * DAY for i in range(29, -1, -1)], np.linspace(90.0, 100.0, 30))
+    cache.save()
+    output.write_text(json.dumps({'nifty_50': [{'symbol': 'RELIANCE.NS', 'current_price': 100.0, 'change': 0.0}]}))
+
+    for price in (104.0, 105.0):  # two refreshes during the same session
+        quote = {'regularMarketPrice': price, 'regularMarketPreviousClose': 99.0, 'regularMarketTime': NSE_MIDSESSION}
+        monkeypatch.setattr(yahoo_client, 'fetch_batch_quotes', lambda symbols: {'RELIANCE.NS': quote})
+        assert main_optimized.run_quotes_refresh() == 0
+
+    timestamps, closes = HistoryCache().get('RELIANCE.NS')
+    assert len(closes) == 30 and closes[-1] == 105.0
+    published = json.loads(output.read_text())
+    assert published['nifty_50'][0]['current_price'] == 105.0
+    assert published['refresh_mode'] == 'quotes'
+    state = indicator_state.IndicatorStore().get('RELIANCE.NS')
+    assert state.ema.count == 30 and state.last_close == 105.0
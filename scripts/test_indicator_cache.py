@@ -0,0 +1,102 @@
+"""
+Tests for indicator memoization
+"""
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.indicator_cache import IndicatorCache, get_indicator_cache
+from analysis.metrics import calculate_macd
+from fetchers.stocks_enhanced import calculate_rsi
+
+
+def series(values):
+    return pd.Series(values, index=pd.date_range('2025-01-01', periods=len(values)))
+
+
+def test_lru_eviction_and_stats():
+    cache = IndicatorCache(max_entries=2)
+    calls = []
+    compute = lambda name: (lambda: calls.append(name) or name)
+    data = [series(np.arange(30.0) + i) for i in range(3)]
+
+    assert cache.get_or_compute('rsi', data[0], compute('a')) == 'a'
+    assert cache.get_or_compute('rsi', data[0], compute('again')) == 'a'
+    cache.get_or_compute('rsi', data[1], compute('b'))
+    cache.get_or_compute('rsi', data[2], compute('c'))  # evicts data[0]
+    cache.get_or_compute('rsi', data[0], compute('a2'))
+    cache.get_or_compute('rsi', data[0], compute('a3'), params=(21,))  # params are part of the key
+
+    assert calls == ['a', 'b', 'c', 'a2', 'a3']
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 5 and stats['entries'] == 2
+
+
+def test_disk_tier_serves_reruns(tmp_path):
+    path = str(tmp_path / 'cache.npz')
+    data = series(np.linspace(1, 2, 50))
+    first = IndicatorCache(path=path)
+    first.get_or_compute('macd', data, lambda: (1.0, 2.0))
+    first.save()
+
+    rerun = IndicatorCache(path=path)
+    assert rerun.get_or_compute('macd', data, lambda: None) == (1.0, 2.0)
+    changed = data.copy()
+    changed.iloc[-1] += 1
+    assert rerun.get_or_compute('macd', changed, lambda: 'recomputed') == 'recomputed'
+    assert rerun.stats()['disk_hits'] == 1
+
+
+def test_disk_tier_round_trips_series_and_dicts_without_pickle(tmp_path):
+    path = str(tmp_path / 'cache.npz')
+    data = series(np.linspace(1, 2, 50))
+    index = pd.date_range('2025-01-01', periods=3, freq='D', tz='Asia/Kolkata')
+    result = {'macd': pd.Series([1.0, np.nan, 3.0], index=index, name='macd'), 'trend': 'BULLISH',
+              'bars': np.int64(50), 'levels': (np.arange(3.0), [1, None])}
+    first = IndicatorCache(path=path)
+    first.get_or_compute('bundle', data, lambda: result)
+    first.get_or_compute('opaque', data, lambda: object())  # not representable: memory only
+    first.save()
+
+    loaded = IndicatorCache(path=path).get_or_compute('bundle', data, lambda: None)
+    pd.testing.assert_series_equal(loaded['macd'], result['macd'])
+    assert loaded['trend'] == 'BULLISH' and loaded['bars'] == 50
+    assert loaded['levels'][0].tolist() == [0.0, 1.0, 2.0] and loaded['levels'][1] == [1, None]
+    assert IndicatorCache(path=path).get_or_compute('opaque', data, lambda: 'recomputed') == 'recomputed'
+
+    # A pickle at the cache path is never unpickled
+    with open(path, 'wb') as f:
+        pickle.dump({'version': 1, 'entries': {}}, f)
+    assert IndicatorCache(path=path).disk == {}
+
+
+def test_callers_cannot_mutate_cached_results():
+    cache = IndicatorCache()
+    data = series(np.arange(30.0))
+    compute = lambda: {'line': pd.Series([1.0, 2.0]), 'values': np.array([1.0, 2.0])}
+
+    first = cache.get_or_compute('bundle', data, compute)
+    first['line'].iloc[0] = 99.0
+    first['extra'] = True
+    with pytest.raises(ValueError):
+        first['values'][0] = 99.0
+
+    again = cache.get_or_compute('bundle', data, compute)
+    assert again['line'].tolist() == [1.0, 2.0] and 'extra' not in again
+
+
+def test_decorated_indicators_share_process_cache():
+    cache = get_indicator_cache()
+    cache.clear()
+    data = series(100 + np.sin(np.arange(60.0)))
+
+    assert calculate_rsi(data) == calculate_rsi.uncached(data)
+    calculate_rsi(data, symbol='AAPL')
+    calculate_rsi(data)
+    macd, signal = calculate_macd(data)
+    pd.testing.assert_series_equal(macd, calculate_macd.uncached(data)[0])
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 3
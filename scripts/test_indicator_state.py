@@ -0,0 +1,99 @@
+"""
+Tests that streaming indicator state matches the batch pandas calculations
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.indicator_state import (
+    AssetIndicatorState, EMAState, IndicatorStore, MACDState, RSIState, RollingStats
+)
+from fetchers.crypto_enhanced import build_price_frame, calculate_technical_indicators
+from fetchers.stocks_enhanced import calculate_rsi
+
+DAY = 86400
+
+
+def random_walk(n=260, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))))
+
+
+def test_ema_and_macd_match_batch():
+    close = random_walk()
+    ema, macd = EMAState(200), MACDState()
+    for x in close:
+        ema.update(x)
+        macd.update(x)
+
+    batch_macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    assert ema.value == pytest.approx(close.ewm(span=200, adjust=False).mean().iloc[-1])
+    assert macd.macd == pytest.approx(batch_macd.iloc[-1])
+    assert macd.signal.value == pytest.approx(batch_macd.ewm(span=9, adjust=False).mean().iloc[-1])
+    assert macd.slope == pytest.approx(batch_macd.iloc[-1] - batch_macd.iloc[-5])
+
+
+def test_rsi_matches_batch():
+    close = random_walk()
+    sma = RSIState(14)
+    wilder = RSIState(14, smoothing='wilder')
+    for i, x in enumerate(close):
+        sma.update(x)
+        wilder.update(x)
+        if i in (5, 14, 30, len(close) - 1):
+            assert sma.value == pytest.approx(calculate_rsi(close.iloc[:i + 1]))
+
+    delta = close.diff().iloc[1:]
+    gains, losses = delta.clip(lower=0), (-delta).clip(lower=0)
+    avg_gain = pd.concat([pd.Series([gains.iloc[:14].mean()]), gains.iloc[14:]]).ewm(alpha=1 / 14, adjust=False).mean()
+    avg_loss = pd.concat([pd.Series([losses.iloc[:14].mean()]), losses.iloc[14:]]).ewm(alpha=1 / 14, adjust=False).mean()
+    assert wilder.value == pytest.approx(100 - 100 / (1 + avg_gain.iloc[-1] / avg_loss.iloc[-1]))
+
+
+def test_rolling_stats_match_batch():
+    close = random_walk()
+    stats = RollingStats(20)
+    for x in close:
+        stats.update(x)
+    assert stats.mean == pytest.approx(close.rolling(20).mean().iloc[-1])
+    assert stats.std == pytest.approx(close.rolling(20).std().iloc[-1])
+    expected = (close.iloc[-1] - close.rolling(20).mean().iloc[-1]) / close.rolling(20).std().iloc[-1]
+    assert stats.zscore() == pytest.approx(expected)
+
+
+def test_asset_state_matches_crypto_indicators_and_round_trips(tmp_path):
+    close = random_walk()
+    timestamps = [1_700_000_000 + i * DAY for i in range(len(close))]
+
+    state = AssetIndicatorState.from_history(close.iloc[:-1], timestamps[:-1])
+    store = IndicatorStore(str(tmp_path / 'state.json'))
+    store.put('BTC', state)
+    store.save()
+    restored = IndicatorStore(str(tmp_path / 'state.json'))
+
+    # Intraday refresh then the day's final close: the second update replaces the first
+    restored.update('BTC', close.iloc[-1] * 1.05, timestamps[-1])
+    snapshot = restored.update('BTC', close.iloc[-1], timestamps[-1] + 3600)
+
+    frame = build_price_frame([[t * 1000, c] for t, c in zip(timestamps, close)])
+    batch = calculate_technical_indicators(frame)
+    for key in ('rsi', 'distance_from_200_ema', 'macd_slope', 'macd_vs_200ema'):
+        assert snapshot[key] == pytest.approx(batch[key])
+    assert snapshot['bars'] == len(close)
+    json.dumps(restored.get('BTC').to_dict())
+
+
+def test_nse_quote_in_the_same_session_replaces_the_bar(tmp_path):
+    close = random_walk()
+    bar = 1_760_466_600  # 2025-10-14 18:30 UTC: yfinance's 00:00 IST stamp of the 15 Oct bar
+    timestamps = [bar - (len(close) - 1 - i) * DAY for i in range(len(close))]
+    store = IndicatorStore(str(tmp_path / 'state.json'))
+    state = store.get_or_seed('RELIANCE.NS', (timestamps, close.to_numpy()))
+    assert store.get_or_seed('RELIANCE.NS', (timestamps, close.to_numpy())) is state
+
+    snapshot = store.update('RELIANCE.NS', close.iloc[-1] * 1.01, bar + 10.5 * 3600)  # 10:30 IST, 15 Oct
+    assert snapshot['bars'] == len(close)
+    snapshot = store.update('RELIANCE.NS', close.iloc[-1], bar + 34.5 * 3600)  # next session
+    assert snapshot['bars'] == len(close) + 1
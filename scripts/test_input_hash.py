@@ -0,0 +1,75 @@
+"""
+Tests for input-hash reuse of derived asset fields
+"""
+import numpy as np
+
+from analysis.input_hash import input_hash, reset_reuse_stats, reuse_derived, reuse_stats
+from main_optimized import analyze_and_score_stocks
+
+
+def test_hash_covers_inputs_and_rules_version():
+    closes = np.array([1.0, 2.0, 3.0])
+    info = {'trailingPE': 20.0, 'sector': 'Tech'}
+    digest = input_hash(info, closes, version=1)
+    assert digest == input_hash(dict(reversed(list(info.items()))), closes.copy(), version=1)
+    assert digest != input_hash(info, np.array([1.0, 2.0, 3.5]), version=1)
+    assert digest != input_hash(dict(info, trailingPE=21.0), closes, version=1)
+    assert digest != input_hash(info, closes, version=2)
+
+
+def test_unchanged_inputs_reuse_previous_scores():
+    reset_reuse_stats()
+    previous = {'symbol': 'AAA', 'score': 77, 'recommendation': 'Buy', 'reasons': ['kept']}
+    record = {'symbol': 'AAA', 'score': None}
+    assert not reuse_derived(record, previous, 'abc', ('score',), section='test')  # no hash yet
+    previous['input_hash'] = 'abc'
+    assert reuse_derived(record, previous, 'abc', ('score', 'recommendation'), section='test')
+    assert record['score'] == 77 and record['recommendation'] == 'Buy'
+    assert reuse_stats()['test'] == {'recomputed': 1, 'reused': 1}
+
+    # Fallback-fetcher records scored in the analysis stage
+    stocks = {'BBB': {'symbol': 'BBB', 'roce': 25, 'current_price': 10.0}}
+    first = analyze_and_score_stocks({k: dict(v) for k, v in stocks.items()})
+    first[0]['reasons'] = ['from last run']  # marks the previous output
+    again = analyze_and_score_stocks({k: dict(v) for k, v in stocks.items()}, previous=first)
+    assert again[0]['reasons'] == ['from last run']
+    changed = analyze_and_score_stocks({'BBB': dict(stocks['BBB'], roce=5)}, previous=first)
+    assert changed[0]['reasons'] != ['from last run']
+    assert reuse_stats()['stocks'] == {'recomputed': 2, 'reused': 1}
+    reset_reuse_stats()
+
+
+def test_stock_hash_ignores_info_fields_the_metrics_do_not_read(monkeypatch):
+    import pandas as pd
+
+    from fetchers import stocks_enhanced
+
+    class FakeContext:
+        attempts = 2
+
+        def __init__(self, info):
+            self.info = info
+            self.history = pd.DataFrame({'Close': np.linspace(90.0, 100.0, 150), 'Volume': 1e6},
+                                        index=pd.date_range('2026-03-01', periods=150))
+
+        def seed(self, **facets):
+            pass
+
+        def cached(self, facet):
+            return None
+
+    info = {'regularMarketPrice': 100.0, 'previousClose': 99.0, 'trailingPE': 20.0, 'marketCap': 1e9,
+            'volume': 100, 'bid': 99.9}
+    monkeypatch.setattr(stocks_enhanced, 'get_context', lambda symbol: FakeContext(info))
+    _, first = stocks_enhanced.fetch_single_stock('AAA')
+    first['score'] = -1  # marks the previous derivation
+
+    reset_reuse_stats()
+    info = dict(info, volume=250, bid=100.1)
+    _, again = stocks_enhanced.fetch_single_stock('AAA', previous=first)
+    assert again['score'] == -1
+    info = dict(info, trailingPE=25.0)
+    _, changed = stocks_enhanced.fetch_single_stock('AAA', previous=first)
+    assert changed['score'] != -1
+    assert reuse_stats()['stocks'] == {'recomputed': 1, 'reused': 1}
+    reset_reuse_stats()
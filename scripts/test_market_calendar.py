@@ -0,0 +1,53 @@
+"""
+Tests for the market calendars driving section skip/quote/full plans
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from pipeline.market_calendar import FULL, MARKETS, QUOTES, SKIP, plan_section
+from main_optimized import plan_sections
+
+NEW_YORK = ZoneInfo('America/New_York')
+KOLKATA = ZoneInfo('Asia/Kolkata')
+
+
+def ny(*args):
+    return datetime(*args, tzinfo=NEW_YORK)
+
+
+def test_nyse_weekends_sessions_and_holidays():
+    nyse = MARKETS['NYSE']
+    friday_evening = ny(2026, 10, 16, 18, 0)
+    assert nyse.plan(friday_evening, now=ny(2026, 10, 17, 12, 0)) == SKIP  # Saturday
+    assert nyse.plan(friday_evening, now=ny(2026, 10, 19, 10, 0)) == QUOTES  # Monday mid-session
+    assert nyse.plan(friday_evening, now=ny(2026, 10, 19, 17, 0)) == FULL  # Monday after the close
+    assert nyse.plan(None, now=ny(2026, 10, 17, 12, 0)) == FULL  # never fetched
+
+    # Open now, but Friday's session closed after the last (mid-session) fetch
+    friday_midday = ny(2026, 10, 16, 12, 0)
+    assert nyse.plan(friday_midday, now=ny(2026, 10, 16, 15, 0)) == QUOTES  # same session
+    assert nyse.plan(friday_midday, now=ny(2026, 10, 19, 10, 0)) == FULL
+
+    # Thanksgiving is closed; the next day closes early at 13:00
+    wednesday_evening = ny(2026, 11, 25, 17, 0)
+    assert nyse.plan(wednesday_evening, now=ny(2026, 11, 26, 12, 0)) == SKIP
+    assert nyse.plan(wednesday_evening, now=ny(2026, 11, 27, 12, 0)) == QUOTES
+    assert nyse.plan(wednesday_evening, now=ny(2026, 11, 27, 13, 30)) == FULL
+
+
+def test_nse_holiday_crypto_and_section_plans():
+    last_fetch = datetime(2026, 10, 19, 16, 0, tzinfo=KOLKATA).isoformat()
+    dussehra = datetime(2026, 10, 20, 12, 0, tzinfo=KOLKATA)
+    assert plan_section('NSE', last_fetch, now=dussehra) == SKIP
+    assert plan_section('CRYPTO', last_fetch, now=dussehra) == FULL
+
+    previous = {
+        'fetched_at': {'nifty_50': last_fetch, 'us_stocks': last_fetch},
+        'nifty_50': [{'symbol': 'RELIANCE.NS'}],
+        'us_stocks': [{'symbol': 'AAPL'}],
+    }
+    expected = {'nifty_50': ['RELIANCE.NS'], 'us_stocks': ['AAPL']}
+    assert plan_sections(previous, expected, now=dussehra) == {'nifty_50': SKIP, 'us_stocks': FULL}
+    # A symbol the previous snapshot lacks forces a full fetch
+    expected['nifty_50'].append('TCS.NS')
+    assert plan_sections(previous, expected, now=dussehra)['nifty_50'] == FULL
@@ -0,0 +1,98 @@
+"""
+Tests for the quota-aware NewsAPI/GNews client
+"""
+import pytest
+import requests
+
+from fetchers import news_api_client
+from fetchers.concurrency import AdaptiveLimiter
+from fetchers.news_api_client import NewsApiClient
+
+URL = 'https://newsapi.org/v2/everything'
+
+
+class FakeResponse:
+    def __init__(self, status, payload=None):
+        self.status_code = status
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Queue of responses (or exceptions) returned by requests.get, in order."""
+    queue = []
+
+    def fake_get(url, params=None, timeout=None):
+        item = queue.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+    monkeypatch.setattr(news_api_client.requests, 'get', fake_get)
+    monkeypatch.setattr(news_api_client, 'get_limiter', lambda name: AdaptiveLimiter(name, 4))
+    monkeypatch.setattr(news_api_client, '_day_fraction_elapsed', lambda: 1.0)
+    return queue
+
+
+def make_client(tmp_path, **kwargs):
+    return NewsApiClient(str(tmp_path / 'quota.json'), str(tmp_path / 'cache.json'), **kwargs)
+
+
+def test_fresh_cache_costs_no_quota(tmp_path, upstream):
+    client = make_client(tmp_path)
+    upstream.append(FakeResponse(200, {'articles': [1]}))
+    params = {'q': 'markets', 'apiKey': 'k1'}
+    assert client.get('newsapi', 'k1', URL, params) == {'articles': [1]}
+    assert client.get('newsapi', 'k1', URL, params) == {'articles': [1]}
+    assert client.remaining('newsapi', 'k1') == 99
+    assert upstream == []
+
+
+def test_ledger_is_per_key_and_persisted(tmp_path, upstream):
+    client = make_client(tmp_path, ttl=0, daily_limits={'newsapi': 2})
+    upstream.extend([FakeResponse(200, {'n': 1}), FakeResponse(200, {'n': 2})])
+    client.get('newsapi', 'k1', URL, {'q': 'a', 'apiKey': 'k1'})
+    client.get('newsapi', 'k1', URL, {'q': 'b', 'apiKey': 'k1'})
+    client.save()
+
+    reloaded = make_client(tmp_path, ttl=0, daily_limits={'newsapi': 2})
+    assert reloaded.remaining('newsapi', 'k1') == 0
+    assert reloaded.remaining('newsapi', 'k2') == 2
+    # Out of budget: the stale cached response is served without a request
+    assert reloaded.get('newsapi', 'k1', URL, {'q': 'b', 'apiKey': 'k1'}) == {'n': 2}
+    assert reloaded.get('newsapi', 'k1', URL, {'q': 'c', 'apiKey': 'k1'}) is None
+    assert 'k1' not in (tmp_path / 'quota.json').read_text()
+
+
+def test_429_marks_the_key_exhausted_and_serves_cache(tmp_path, upstream):
+    client = make_client(tmp_path, ttl=0)
+    params = {'q': 'markets', 'apiKey': 'k1'}
+    upstream.extend([FakeResponse(200, {'old': True}), FakeResponse(429)])
+    client.get('newsapi', 'k1', URL, params)
+    assert client.get('newsapi', 'k1', URL, params) == {'old': True}
+    assert client.remaining('newsapi', 'k1') == 0
+    assert client.get('newsapi', 'k1', URL, params) == {'old': True}  # no further request
+    assert upstream == []
+
+
+def test_errors_serve_cache_and_never_raise(tmp_path, upstream):
+    client = make_client(tmp_path, ttl=0)
+    params = {'q': 'markets', 'apiKey': 'k1'}
+    upstream.extend([FakeResponse(200, {'old': True}), FakeResponse(500),
+                     requests.ConnectionError('down'), FakeResponse(200, None)])
+    client.get('newsapi', 'k1', URL, params)
+    assert client.get('newsapi', 'k1', URL, params) == {'old': True}
+    assert client.get('newsapi', 'k1', URL, params) == {'old': True}
+    assert client.get('gnews', 'k9', URL, {'q': 'other', 'token': 'k9'}) is None
+    assert client.remaining('newsapi', 'k1') == 97
+
+
+def test_requests_are_paced_across_the_day(tmp_path, upstream, monkeypatch):
+    monkeypatch.setattr(news_api_client, '_day_fraction_elapsed', lambda: 0.0)
+    client = make_client(tmp_path, ttl=0)
+    upstream.extend(FakeResponse(200, {'i': i}) for i in range(news_api_client.PACE_BURST + 5))
+    for i in range(news_api_client.PACE_BURST + 5):
+        client.get('newsapi', 'k1', URL, {'q': str(i), 'apiKey': 'k1'})
+    assert client.remaining('newsapi', 'k1') == 100 - news_api_client.PACE_BURST
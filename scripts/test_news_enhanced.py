@@ -0,0 +1,34 @@
+"""
+Tests for the size and shape of the news section
+"""
+import time
+
+from fetchers import news_enhanced
+from fetchers.news_enhanced import fetch_news
+
+
+def fake_rss(monkeypatch, per_feed=10):
+    now = int(time.time())
+
+    def fetch_from_rss(feed_url, category):
+        return [{'title': f'{feed_url} {i}', 'link': f'{feed_url}/{i}', 'published_ts': now - i * 60,
+                 'category': category} for i in range(per_feed)]
+    monkeypatch.setattr(news_enhanced, 'fetch_from_rss', fetch_from_rss)
+    monkeypatch.setattr(news_enhanced, 'NEWSAPI_KEY', '')
+    monkeypatch.setattr(news_enhanced, 'GNEWS_KEY', '')
+
+
+def test_output_is_the_100_most_recent_articles(tmp_path, monkeypatch):
+    fake_rss(monkeypatch)
+    articles = fetch_news(store_path=str(tmp_path / 'news.db'))
+    assert len(articles) == news_enhanced.NEWS_LIMIT == 100
+    timestamps = [a['published_ts'] for a in articles]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_per_category_cap_is_opt_in(tmp_path, monkeypatch):
+    fake_rss(monkeypatch)
+    articles = fetch_news(per_category=2, store_path=str(tmp_path / 'news.db'))
+    categories = [a['category'] for a in articles]
+    assert len(articles) == 2 * len(news_enhanced.RSS_FEEDS)
+    assert all(categories.count(c) == 2 for c in news_enhanced.RSS_FEEDS)
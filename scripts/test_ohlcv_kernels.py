@@ -0,0 +1,89 @@
+"""
+Tests for the OHLCV indicator kernels against straightforward per-bar loops
+"""
+import numpy as np
+import pytest
+
+from analysis.ohlcv_kernels import adx, atr, cmf, supertrend, true_range
+
+
+def make_ohlcv(assets=3, bars=120, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (assets, bars)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.02, (assets, bars)))
+    low = close * (1 - rng.uniform(0, 0.02, (assets, bars)))
+    volume = rng.uniform(1e5, 1e6, (assets, bars))
+    return high, low, close, volume
+
+
+def reference_wilder(values, period):
+    out = [sum(values[:period]) / period]
+    for x in values[period:]:
+        out.append(out[-1] + (x - out[-1]) / period)
+    return out
+
+
+def test_atr_and_adx_match_reference():
+    high, low, close, _ = make_ohlcv()
+    h, l, c = high[1], low[1], close[1]
+    tr = [max(h[t] - l[t], abs(h[t] - c[t - 1]), abs(l[t] - c[t - 1])) for t in range(1, len(c))]
+    assert atr(h, l, c, 14)[-1] == pytest.approx(reference_wilder(tr, 14)[-1])
+    assert atr(high, low, close, 14)[1, -1] == pytest.approx(atr(h, l, c, 14)[-1])
+
+    plus_dm, minus_dm = [], []
+    for t in range(1, len(c)):
+        up, down = h[t] - h[t - 1], l[t - 1] - l[t]
+        plus_dm.append(up if up > down and up > 0 else 0.0)
+        minus_dm.append(down if down > up and down > 0 else 0.0)
+    s_tr, s_plus, s_minus = (reference_wilder(x, 14) for x in (tr, plus_dm, minus_dm))
+    dx = []
+    for t_, p_, m_ in zip(s_tr, s_plus, s_minus):
+        pdi, mdi = 100 * p_ / t_, 100 * m_ / t_
+        dx.append(100 * abs(pdi - mdi) / (pdi + mdi))
+
+    adx_values, plus_di, minus_di = adx(h, l, c, 14)
+    assert np.isnan(adx_values[2 * 14 - 2]) and not np.isnan(adx_values[2 * 14 - 1])
+    assert adx_values[-1] == pytest.approx(reference_wilder(dx, 14)[-1])
+    assert plus_di[-1] == pytest.approx(100 * s_plus[-1] / s_tr[-1])
+
+
+def test_supertrend_matches_reference():
+    high, low, close, _ = make_ohlcv()
+    line, direction = supertrend(high, low, close, 10, 3.0)
+    for row in range(len(close)):
+        h, l, c = high[row], low[row], close[row]
+        band_atr = atr(h, l, c, 10)
+        upper = (h + l) / 2 + 3 * band_atr
+        lower = (h + l) / 2 - 3 * band_atr
+        final_upper, final_lower, trend = upper[10], lower[10], 1
+        for t in range(11, len(c)):
+            if upper[t] < final_upper or c[t - 1] > final_upper:
+                final_upper = upper[t]
+            if lower[t] > final_lower or c[t - 1] < final_lower:
+                final_lower = lower[t]
+            if trend < 0 and c[t] > final_upper:
+                trend = 1
+            elif trend > 0 and c[t] < final_lower:
+                trend = -1
+        assert direction[row, -1] == trend
+        assert line[row, -1] == pytest.approx(final_lower if trend > 0 else final_upper)
+
+
+def test_cmf_and_true_range_edges():
+    high, low, close, volume = make_ohlcv(assets=1, bars=40)
+    h, l, c, v = high[0], low[0], close[0], volume[0]
+    mfm = ((c - l) - (h - c)) / (h - l)
+    assert cmf(h, l, c, v, 20)[-1] == pytest.approx((mfm[-20:] * v[-20:]).sum() / v[-20:].sum())
+    assert np.isnan(cmf(h, l, c, v, 20)[18])
+    flat = np.full(30, 10.0)
+    assert cmf(flat, flat, flat, v[:30], 20)[-1] == 0.0
+    assert true_range(flat, flat, flat)[0] == 0.0
+
+
+def test_supertrend_vectorised_path_matches_per_asset():
+    high, low, close, _ = make_ohlcv(assets=20, bars=80)
+    line, direction = supertrend(high, low, close)
+    for row in (0, 7, 19):
+        row_line, row_direction = supertrend(high[row], low[row], close[row])
+        np.testing.assert_allclose(line[row], row_line)
+        np.testing.assert_array_equal(direction[row], row_direction)
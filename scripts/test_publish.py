@@ -0,0 +1,105 @@
+"""
+Tests for progressive partial publishing
+"""
+import json
+import threading
+
+import pytest
+
+from pipeline.publish import ProgressivePublisher, atomic_file, merge_sections, write_json_atomic
+
+
+def test_partial_snapshots_keep_previous_sections(tmp_path):
+    path = str(tmp_path / 'latest.json')
+    previous = {'nifty_50': [{'symbol': 'OLD.NS'}, {'symbol': 'A.NS', 'price': 1}], 'crypto': [{'id': 'bitcoin'}],
+                'last_updated': 't0', 'complete': True}
+    publisher = ProgressivePublisher(
+        lambda data: write_json_atomic(path, data), base=previous, totals={'nifty_50': 3}, min_interval=0
+    )
+
+    records = [{'symbol': 'A.NS'}]
+    publisher.update('nifty_50', records, processed=1, total=3)
+    records[0]['rank'] = 1  # later mutation by the fetch thread must not leak into the snapshot
+    with open(path) as f:
+        data = json.load(f)
+    assert data['complete'] is False
+    # Assets not fetched yet keep their previous records, marked stale
+    assert data['nifty_50'] == [{'symbol': 'A.NS'}, {'symbol': 'OLD.NS', 'stale': True, 'stale_since': 't0'}]
+    assert data['crypto'] == [{'id': 'bitcoin'}]
+    assert data['coverage']['nifty_50'] == {'fetched': 1, 'processed': 1, 'total': 3, 'stale': 1}
+    assert list(tmp_path.iterdir()) == [tmp_path / 'latest.json']
+
+
+def test_publish_interval_throttles_writes():
+    writes = []
+    publisher = ProgressivePublisher(writes.append, min_interval=60)
+    publisher.update('us_stocks', [{'symbol': 'AAPL'}])
+    publisher.update('us_stocks', [{'symbol': 'AAPL'}, {'symbol': 'MSFT'}])
+    assert len(writes) == 1
+    assert publisher.maybe_publish(force=True)
+    assert writes[-1]['coverage']['us_stocks']['fetched'] == 2
+
+
+def test_merge_sections_keeps_other_sections():
+    current = {'nifty_50': [{'symbol': 'A.NS'}], 'news': [{'title': 'old'}], 'news_sentiment': {'a': 1},
+               'coverage': {'nifty_50': {'fetched': 1}}, 'updated_at': {'nifty_50': 't0'}, 'complete': True}
+    update = {'nifty_50': [], 'news': [{'title': 'new'}], 'news_sentiment': {'b': 2},
+              'coverage': {'nifty_50': {'fetched': 0}, 'news': {'fetched': 1}},
+              'updated_at': {'nifty_50': 't1', 'news': 't1'}, 'complete': False, 'last_updated': 't1'}
+    merged = merge_sections(current, update, ['news'])
+    assert merged['nifty_50'] == [{'symbol': 'A.NS'}]
+    assert merged['news'] == [{'title': 'new'}] and merged['news_sentiment'] == {'b': 2}
+    assert merged['coverage'] == {'nifty_50': {'fetched': 1}, 'news': {'fetched': 1}}
+    assert merged['updated_at'] == {'nifty_50': 't0', 'news': 't1'}
+    assert merged['complete'] is False and merged['last_updated'] == 't1'
+
+
+def test_concurrent_section_writes_do_not_lose_updates(tmp_path):
+    from main_optimized import write_output
+
+    path = str(tmp_path / 'latest.json')
+    write_json_atomic(path, {'crypto': [], 'news': []})
+
+    def writer(section):
+        for i in range(20):
+            write_output({section: [i], 'updated_at': {section: i}}, path=path, sections=[section])
+
+    threads = [threading.Thread(target=writer, args=(section,)) for section in ('crypto', 'news')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path) as f:
+        data = json.load(f)
+    assert data['crypto'] == [19] and data['news'] == [19]
+    assert data['updated_at'] == {'crypto': 19, 'news': 19}
+
+
+def test_partial_writes_leave_the_baseline_alone(tmp_path):
+    from main_optimized import load_previous_output, write_output
+
+    path, baseline = str(tmp_path / 'latest.json'), str(tmp_path / 'last_complete.json')
+    write_output({'crypto': [{'id': 'bitcoin'}, {'id': 'ethereum'}], 'complete': True}, path=path, baseline=baseline)
+    write_output({'crypto': [{'id': 'bitcoin'}], 'complete': False}, path=path, baseline=baseline, partial=True)
+    assert load_previous_output(path)['crypto'] == [{'id': 'bitcoin'}]
+    assert load_previous_output(baseline)['crypto'] == [{'id': 'bitcoin'}, {'id': 'ethereum'}]
+
+    # Section runs merge into both; a missing baseline starts from the published file
+    (tmp_path / 'last_complete.json').unlink()
+    write_output({'news': [{'title': 'new'}]}, path=path, sections=['news'], baseline=baseline)
+    assert load_previous_output(baseline) == {'crypto': [{'id': 'bitcoin'}], 'complete': False,
+                                              'news': [{'title': 'new'}]}
+
+
+def test_failed_atomic_write_keeps_the_previous_file(tmp_path):
+    path = str(tmp_path / 'cache.npz')
+    with atomic_file(path, 'wb') as f:
+        f.write(b'old')
+    with pytest.raises(TypeError):
+        write_json_atomic(path, {'value': object()})
+    with pytest.raises(RuntimeError):
+        with atomic_file(path, 'wb') as f:
+            f.write(b'partial')
+            raise RuntimeError('interrupted')
+    assert (tmp_path / 'cache.npz').read_bytes() == b'old'
+    assert list(tmp_path.iterdir()) == [tmp_path / 'cache.npz']
@@ -0,0 +1,86 @@
+"""
+Tests for the shared retry policy
+"""
+import pytest
+import requests
+
+from fetchers import retry
+from fetchers.retry import Backoff, HTTPStatusError, RetryBudget, call_with_retry, is_retryable, parse_retry_after
+
+
+def test_error_classification():
+    assert is_retryable(HTTPStatusError(429))
+    assert is_retryable(HTTPStatusError(503))
+    assert is_retryable(requests.ConnectionError('reset'))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(HTTPStatusError(404))
+    assert not is_retryable(ValueError('bad json'))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0  # in the past
+    assert parse_retry_after('soon') is None
+
+
+def test_retry_after_is_honoured_up_to_a_ceiling(monkeypatch):
+    backoff = Backoff(base=0.5, cap=10.0, max_wait=60.0)
+    assert backoff.next(30.0) == 30.0
+    assert backoff.next(None) <= 10.0
+    assert backoff.next(3600.0) is None
+
+    sleeps, calls = [], []
+    monkeypatch.setattr(retry.time, 'sleep', sleeps.append)
+    retry.reset_retry_budget()
+
+    def throttled():
+        calls.append(1)
+        raise HTTPStatusError(429, retry_after=2 * retry.MAX_RETRY_AFTER)
+
+    with pytest.raises(HTTPStatusError):
+        call_with_retry(throttled, attempts=3)
+    assert len(calls) == 1 and sleeps == []  # gave up instead of sleeping for two minutes
+    assert retry.get_retry_budget().stats()['retries'] == 0
+
+
+def test_retries_transient_errors_then_succeeds(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+    retry.reset_retry_budget()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise HTTPStatusError(503)
+        return 'ok'
+
+    assert call_with_retry(flaky, attempts=3) == 'ok'
+    assert len(calls) == 3
+    assert retry.get_retry_budget().stats()['retries'] == 2
+
+
+def test_permanent_errors_and_exhausted_budget_stop_retries(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+    calls = []
+
+    def not_found():
+        calls.append(1)
+        raise HTTPStatusError(404)
+
+    with pytest.raises(HTTPStatusError):
+        call_with_retry(not_found, attempts=3)
+    assert len(calls) == 1
+
+    retry.reset_retry_budget(ratio=0, minimum=1)
+    calls.clear()
+
+    def down():
+        calls.append(1)
+        raise HTTPStatusError(503)
+
+    with pytest.raises(HTTPStatusError):
+        call_with_retry(down, attempts=5)
+    assert len(calls) == 2  # one retry allowed, then the budget is spent
+    assert retry.get_retry_budget().stats()['denied'] == 1
+    retry.reset_retry_budget()
@@ -0,0 +1,48 @@
+"""
+Tests for the shared rolling-window kernel
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.rolling import rolling_window
+from fetchers.crypto import calculate_cmf, calculate_z_score
+
+
+@pytest.mark.parametrize('window', [1, 5, 20])
+def test_rolling_window_matches_pandas(window):
+    rng = np.random.default_rng(2)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (4, 500)), axis=1))
+    prices[1, 100] = np.nan
+    stats = rolling_window(prices, window)
+    for row in range(len(prices)):
+        rolling = pd.Series(prices[row]).rolling(window)
+        for name in ('mean', 'std', 'min', 'max'):
+            np.testing.assert_allclose(
+                getattr(stats, name)[row], getattr(rolling, name)().to_numpy(), rtol=1e-9, atol=1e-9
+            )
+
+
+def test_std_is_stable_on_a_drifting_series():
+    # A 1 -> 1e5 trend with tiny noise: row-wide prefix sums cancel catastrophically here
+    rng = np.random.default_rng(3)
+    bars = 20_000
+    prices = np.linspace(1, 1e5, bars) + rng.normal(0, 1e-6, bars)
+    for window in (20, 50):
+        stats = rolling_window(prices, window)
+        rolling = pd.Series(prices).rolling(window)
+        np.testing.assert_allclose(stats.std, rolling.std().to_numpy(), rtol=1e-6)
+        np.testing.assert_allclose(stats.mean, rolling.mean().to_numpy(), rtol=1e-12)
+        exact = np.std(np.lib.stride_tricks.sliding_window_view(prices, window), axis=1, ddof=1)
+        np.testing.assert_allclose(stats.std[window - 1:], exact, rtol=1e-9)
+
+
+def test_short_series_and_crypto_indicators():
+    assert np.isnan(rolling_window(np.arange(3.0), 5).mean).all()
+
+    series = pd.Series(100 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.02, 120))))
+    low, high = series.rolling(20).min(), series.rolling(20).max()
+    money_flow = (series - low) / (high - low + 1e-10)
+    assert calculate_cmf(series) == pytest.approx(np.clip((money_flow.rolling(20).mean().iloc[-1] - 0.5) * 2, -1, 1))
+    expected = (series.iloc[-1] - series.rolling(20).mean().iloc[-1]) / series.rolling(20).std().iloc[-1]
+    assert calculate_z_score(series) == pytest.approx(expected)
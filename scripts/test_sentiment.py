@@ -0,0 +1,50 @@
+"""
+Tests for batch lexicon sentiment scoring
+"""
+import os
+
+import pytest
+
+from analysis.sentiment import SentimentScorer, aggregate_sentiment, score_texts, sentiment_label, tokenize
+
+
+def test_negation_flips_and_damps_the_next_term():
+    assert tokenize("Shares did not rise") == ['shares', 'did', 'not_rise']
+    assert tokenize("Profits won't recover") == ['profits', 'not_recover']
+    plain, negated = score_texts(["Shares rise", "Shares did not rise"])
+    assert plain > 0 > negated
+    assert abs(negated) < abs(plain)
+
+
+def test_scores_and_labels():
+    scores = score_texts(["Stocks surge to record high on strong profits", "Bank fined after fraud probe",
+                          "Weather was fine today", ""])
+    assert [sentiment_label(s) for s in scores] == ['positive', 'negative', 'neutral', 'neutral']
+    assert all(-1 < s < 1 for s in scores)
+    assert score_texts([]).size == 0
+
+
+def test_memo_hits_across_runs(tmp_path):
+    path = str(tmp_path / 'sentiment.json')
+    articles = [{'title': 'Apple beats estimates', 'summary': ''}, {'title': 'Crypto exchange hacked'}]
+    scorer = SentimentScorer(path)
+    scorer.score_articles(articles)
+    scorer.save()
+    assert (scorer.hits, scorer.misses) == (0, 2)
+    assert os.listdir(tmp_path) == ['sentiment.json']  # written atomically, no temp files left
+
+    again = [dict(a) for a in articles] + [{'title': 'Oil prices fall'}]
+    rerun = SentimentScorer(path)
+    rerun.score_articles(again)
+    assert (rerun.hits, rerun.misses) == (2, 1)
+    assert [a['sentiment'] for a in again[:2]] == [a['sentiment'] for a in articles]
+    assert again[2]['sentiment_label'] == 'negative'
+
+
+def test_aggregate_by_symbol_and_category():
+    articles = [{'sentiment': 0.5, 'category': 'Tech', 'related_symbols': ['AAPL']},
+                {'sentiment': -0.3, 'category': 'Tech', 'related_symbols': ['AAPL', 'MSFT']},
+                {'sentiment': None, 'category': 'Tech'}]
+    summary = aggregate_sentiment(articles)
+    assert summary['symbols']['AAPL'] == {'score': pytest.approx(0.1), 'articles': 2, 'positive': 1, 'negative': 1}
+    assert summary['categories']['Tech']['articles'] == 2
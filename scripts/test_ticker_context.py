@@ -0,0 +1,60 @@
+"""
+Tests for the per-ticker fetch context
+"""
+import pytest
+
+from fetchers import retry
+from fetchers.ticker_context import TickerContext, context_stats, get_context, reset_contexts
+
+
+class FakeTicker:
+    def __init__(self, failures=0):
+        self.reads = 0
+        self.failures = failures
+
+    @property
+    def info(self):
+        self.reads += 1
+        if self.reads <= self.failures:
+            raise ConnectionError('reset by peer')
+        return {'shortName': 'Fake'}
+
+
+def test_facets_are_fetched_once_and_counted():
+    reset_contexts()
+    context = get_context('FAKE')
+    context._ticker = FakeTicker()
+    assert get_context('FAKE') is context
+
+    assert context.info == {'shortName': 'Fake'}
+    assert context.info is context.info
+    assert context._ticker.reads == 1
+
+    context.seed(financials={'Revenue': 10.0}, history=None)
+    assert context.financials == {'Revenue': 10.0}  # seeded: no request
+    assert context.cached('history') is None
+
+    stats = context_stats()
+    assert stats['tickers'] == 1
+    assert stats['calls'] == {'info': 1}
+    assert stats['hits'] == {'info': 2, 'financials': 1}
+    reset_contexts()
+    assert context_stats()['total_calls'] == 0
+
+
+def test_failures_are_retried_but_not_memoized(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+    context = TickerContext('FAKE', attempts=1)
+    context._ticker = FakeTicker(failures=1)
+
+    with pytest.raises(ConnectionError):
+        context.info
+    # A later stage (e.g. revalidation) gets a fresh attempt
+    assert context.info == {'shortName': 'Fake'}
+    assert context._ticker.reads == 2
+
+    with pytest.raises(ValueError):
+        context.seed(dividends=[])
+    # Quotes come from batch requests with their own Yahoo slots, never a context
+    with pytest.raises(ValueError):
+        context.seed(quote={'regularMarketPrice': 10.0})
@@ -0,0 +1,68 @@
+"""
+Tests for the universe registry and chunk scheduler
+"""
+import pytest
+
+from pipeline import universe
+from pipeline.scheduler import ChunkScheduler, chunked
+
+
+def test_shipped_universes():
+    nifty = universe.load_universe('nifty50')
+    assert len(nifty) == 50 and all(t.endswith('.NS') for t in nifty)
+    assert universe.load_universe('sp100', limit=5)[0] == 'AAPL'
+    assert 'bitcoin' in universe.load_universe('crypto')
+    # Defaults: the app's long-standing 30 Nifty / 28 US names
+    assert len(universe.load_universe('nifty_core')) == 30 and len(universe.load_universe('us_core')) == 28
+    with pytest.raises(ValueError):
+        universe.load_universe('ftse100')
+    # Registered lists without a shipped file are not offered
+    assert universe.universes_for('NYSE') == ['us_core', 'sp100']
+    assert universe.universes_for('NSE') == ['nifty_core', 'nifty50']
+
+
+def test_official_csv_formats(tmp_path, monkeypatch):
+    (tmp_path / 'nifty50.csv').write_text('symbol\nRELIANCE\nTCS\n')
+    (tmp_path / 'nifty500.csv').write_text(
+        'Company Name,Industry,Symbol,Series,ISIN Code\n'
+        'Reliance Industries Ltd.,Oil,RELIANCE,EQ,INE002A01018\n'
+        'Some Bond,Finance,SOMEBOND,N1,INE000000000\n'
+        'Tata Consultancy Services Ltd.,IT,TCS,EQ,INE467B01029\n'
+    )
+    (tmp_path / 'sp100.csv').write_text('Symbol,Security\nBRK.B,Berkshire Hathaway\nAAPL,Apple\n')
+    monkeypatch.setattr(universe, 'UNIVERSE_DIR', str(tmp_path))
+    monkeypatch.setattr(universe, '_cache', {})
+
+    assert universe.load_universe('nifty500') == ['RELIANCE.NS', 'TCS.NS']
+    assert universe.universes_for('NSE') == ['nifty50', 'nifty500']
+    assert universe.load_universe('sp100', limit=1) == ['BRK-B']
+
+
+def test_missing_universe_file_is_an_error(tmp_path, monkeypatch):
+    (tmp_path / 'sp100.csv').write_text('symbol\nAAPL\n')
+    monkeypatch.setattr(universe, 'UNIVERSE_DIR', str(tmp_path))
+    monkeypatch.setattr(universe, '_cache', {})
+    with pytest.raises(FileNotFoundError, match="sp500.*available: sp100"):
+        universe.load_universe('sp500')
+
+
+def test_scheduler_chunks_and_survives_failures():
+    assert chunked(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    progress = []
+
+    def worker(chunk):
+        if 4 in chunk:
+            raise RuntimeError('rate limited')
+        return {t: t * 10 for t in chunk}
+
+    scheduler = ChunkScheduler(chunk_size=2, pause=0, on_progress=lambda done, total, _: progress.append((done, total)))
+    results = scheduler.run(list(range(7)), worker)
+    assert results == {0: 0, 1: 10, 2: 20, 3: 30, 6: 60}
+    assert progress == [(2, 7), (4, 7), (6, 7), (7, 7)]
+    assert scheduler.failed_chunks == 1
+
+
+def test_prioritize_watchlist_then_market_cap():
+    tickers = ['A', 'B', 'C', 'D', 'E']
+    order = universe.prioritize(tickers, watchlist=['D', 'Z'], market_caps={'C': '300', 'E': 500, 'A': None})
+    assert order == ['D', 'E', 'C', 'A', 'B']
@@ -0,0 +1,144 @@
+"""
+Tests for the pooled Yahoo Finance client
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from fetchers import yahoo_client
+from fetchers.concurrency import AdaptiveLimiter
+from fetchers.yahoo_client import YahooClient, _flatten_modules, fetch_batch_quotes_async, history_to_arrays, parse_chart
+
+
+class FakeResponse:
+    def __init__(self, status, payload=None):
+        self.status = status
+        self.headers = {}
+        self.payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self, content_type=None):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.params = []
+
+    def get(self, url, params=None, timeout=None):
+        self.params.append(params)
+        return self.responses.pop(0)
+
+
+def client_with(responses, monkeypatch):
+    monkeypatch.setattr(yahoo_client, 'get_limiter', lambda name: AdaptiveLimiter(name, 8))
+    client = YahooClient()
+    client.session = FakeSession(responses)
+    client._crumb = 'crumb'
+    return client
+
+
+def test_error_status_does_not_throttle_yahoo(monkeypatch):
+    limiter = AdaptiveLimiter('yahoo', initial=8, min_limit=2, max_limit=64)
+    monkeypatch.setattr(yahoo_client, 'get_limiter', lambda name: limiter)
+    client = YahooClient()
+    client.session = FakeSession([FakeResponse(404), FakeResponse(200, {'ok': True})])
+
+    assert asyncio.run(client._get_json('https://example.test/delisted')) is None  # permanent: not retried
+    assert asyncio.run(client._get_json('https://example.test/listed')) == {'ok': True}
+    assert limiter.stats()['limit'] == 8 and limiter.stats()['errors'] == 0
+
+
+def test_batch_quotes_parse_batches_and_fill_gaps_from_yfinance(monkeypatch):
+    def quote_response(*symbols):
+        return FakeResponse(200, {'quoteResponse': {'result': [
+            {'symbol': s, 'regularMarketPrice': 10.0 + i, 'regularMarketPreviousClose': 10.0} for i, s in enumerate(symbols)
+        ] + [{'regularMarketPrice': 1.0}]}})  # entries without a symbol are ignored
+
+    client = client_with([quote_response('AAPL', 'MSFT'), quote_response('TCS.NS')], monkeypatch)
+    fallback_calls = []
+    monkeypatch.setattr(yahoo_client, '_quotes_from_yfinance',
+                        lambda symbols: fallback_calls.append(symbols) or {'NEW': {'symbol': 'NEW', 'regularMarketPrice': 5.0}})
+
+    async def run():
+        client_quotes = await client.quotes(['AAPL', 'MSFT', 'TCS.NS'], batch_size=2)
+        assert sorted(client_quotes) == ['AAPL', 'MSFT', 'TCS.NS']
+        client.session = FakeSession([quote_response('AAPL'), quote_response()])
+        return await fetch_batch_quotes_async(['AAPL', 'NEW'], client)
+
+    quotes = asyncio.run(run())
+    assert quotes['AAPL']['regularMarketPrice'] == 10.0
+    assert fallback_calls == [['NEW']] and quotes['NEW']['regularMarketPrice'] == 5.0
+    assert client.session.params[0]['symbols'] == 'AAPL,NEW' and client.session.params[0]['crumb'] == 'crumb'
+
+
+def test_yfinance_quote_fallback_parses_the_last_two_closes(monkeypatch):
+    import yfinance as yf
+
+    index = pd.date_range('2026-10-12', periods=3)
+    columns = pd.MultiIndex.from_product([['AAPL', 'MSFT'], ['Close', 'Volume']])
+    frame = pd.DataFrame([[100.0, 1e6, 50.0, 2e6], [101.0, 1.1e6, np.nan, np.nan], [102.0, 1.2e6, np.nan, np.nan]],
+                         index=index, columns=columns)
+    monkeypatch.setattr(yf, 'download', lambda *args, **kwargs: frame)
+    quotes = yahoo_client._quotes_from_yfinance(['AAPL', 'MSFT', 'GONE'])
+    assert quotes['AAPL'] == {'symbol': 'AAPL', 'regularMarketPrice': 102.0, 'regularMarketPreviousClose': 101.0,
+                              'regularMarketVolume': 1.2e6}
+    assert quotes['MSFT']['regularMarketPrice'] == quotes['MSFT']['regularMarketPreviousClose'] == 50.0
+    assert 'GONE' not in quotes
+
+
+def chart_payload(closes, adjclose=None):
+    timestamps = [1_760_000_000 + i * 86400 for i in range(len(closes))]
+    quote = {'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': [100] * len(closes)}
+    indicators = {'quote': [quote]}
+    if adjclose is not None:
+        indicators['adjclose'] = [{'adjclose': adjclose}]
+    return {'chart': {'result': [{'meta': {'regularMarketPrice': 12.0}, 'timestamp': timestamps,
+                                  'indicators': indicators}]}}
+
+
+def test_parse_chart_drops_bars_without_a_close():
+    arrays = parse_chart(chart_payload([10.0, None, 12.0], adjclose=[9.5, None, 11.5]))
+    assert arrays['timestamp'].tolist() == [1_760_000_000, 1_760_172_800]
+    assert arrays['close'].tolist() == [10.0, 12.0] and arrays['adjclose'].tolist() == [9.5, 11.5]
+    assert arrays['volume'].dtype == np.float64 and arrays['meta'] == {'regularMarketPrice': 12.0}
+
+    # No adjclose series: adjusted equals close
+    assert parse_chart(chart_payload([10.0, 11.0]))['adjclose'].tolist() == [10.0, 11.0]
+
+
+def test_parse_chart_rejects_empty_payloads():
+    assert parse_chart({'chart': {'result': None, 'error': {'code': 'Not Found'}}}) is None
+    assert parse_chart({'chart': {'result': [{'timestamp': []}]}}) is None
+    assert parse_chart(chart_payload([None, None])) is None
+
+
+def test_history_to_arrays_matches_the_chart_format():
+    index = pd.date_range('2026-10-12', periods=2, tz='America/New_York')
+    hist = pd.DataFrame({'Open': [1.0, 2.0], 'Close': [1.5, 2.5], 'Volume': [10, 20]}, index=index)
+    arrays = history_to_arrays(hist)
+    assert arrays['timestamp'].tolist() == [int(ts.timestamp()) for ts in index]
+    assert arrays['close'].tolist() == arrays['adjclose'].tolist() == [1.5, 2.5]
+    assert np.isnan(arrays['high']).all() and history_to_arrays(pd.DataFrame()) is None
+
+
+def test_quote_summary_modules_flatten_to_raw_values():
+    result = {
+        'price': {'regularMarketPrice': {'raw': 101.5, 'fmt': '101.50'}, 'currency': 'USD', 'marketCap': {}},
+        'financialData': {'returnOnEquity': {'raw': 0.25, 'fmt': '25%'}, 'regularMarketPrice': {'raw': 99.0},
+                          'debtToEquity': None},
+        'assetProfile': {'sector': 'Technology', 'companyOfficers': [{'name': 'x'}]},
+        'summaryDetail': None,
+    }
+    info = _flatten_modules(result)
+    assert info['regularMarketPrice'] == 101.5  # first module wins
+    assert info['returnOnEquity'] == 0.25 and info['currency'] == 'USD' and info['sector'] == 'Technology'
+    assert 'marketCap' not in info and 'debtToEquity' not in info
+    assert info['companyOfficers'] == [{'name': 'x'}]